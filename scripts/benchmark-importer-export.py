@@ -0,0 +1,374 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+IMPORTER_PATH = Path(__file__).resolve().parent / 'sync-osm-buildings.py'
+# Bump when the generated fixture rows change, so cached fixtures are rebuilt.
+FIXTURE_FORMAT = 1
+FIXTURE_SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+NDJSON_MODES = ('geojson', 'wkb_hex', 'geojson_feature', 'dual')
+CASE_ENGINES = {
+    'geojson': ('copy', 'python'),
+    'wkb_hex': ('copy', 'python'),
+    'geojson_feature': ('copy', 'python'),
+    'dual': ('copy', 'python'),
+    'parquet': ('duckdb',),
+    'pgcopy': ('python',),
+    'sqlite': ('duckdb', 'python'),
+}
+SAMPLES = 3
+SEED = 0.42
+
+# Synthetic quackosm_raw rows: building rings are mostly rectangles with an exponential tail of
+# detailed outlines, relations are two-part multipolygons, about 8% are building:part features,
+# and tag counts follow the usual mix of address, levels, name and roof tags.
+FIXTURE_SQL = '''
+CREATE TABLE quackosm_raw AS
+WITH base AS (
+  SELECT
+    i,
+    random() < 0.03 AS is_relation,
+    random() < 0.08 AS is_part,
+    least(64, 4 + CAST(floor(-ln(1 - random()) * 2.5) AS INTEGER)) AS vertex_count,
+    1.0 + 40.0 * random() AS lon,
+    40.0 + 20.0 * random() AS lat,
+    0.00005 * exp(random() * 2.5) AS radius,
+    random() AS tag_draw
+  FROM range({rows}) t(i)
+), rings AS (
+  SELECT
+    *,
+    list_transform(
+      range(vertex_count + 1),
+      k -> printf(
+        '%.7f %.7f',
+        lon + radius * cos(2 * pi() * (k % vertex_count) / vertex_count),
+        lat + radius * 0.7 * sin(2 * pi() * (k % vertex_count) / vertex_count)
+      )
+    ) AS ring_points,
+    list_transform(
+      range(vertex_count + 1),
+      k -> printf(
+        '%.7f %.7f',
+        lon + radius * (3 + cos(2 * pi() * (k % vertex_count) / vertex_count)),
+        lat + radius * 0.7 * sin(2 * pi() * (k % vertex_count) / vertex_count)
+      )
+    ) AS second_ring_points
+  FROM base
+)
+SELECT
+  (CASE WHEN is_relation THEN 'relation/' ELSE 'way/' END) || CAST(i + 1 AS VARCHAR) AS feature_id,
+  map_from_entries(list_filter([
+    CASE WHEN NOT is_part THEN {{
+      'k': 'building',
+      'v': ['yes', 'house', 'apartments', 'residential', 'detached', 'garage', 'commercial', 'industrial'][1 + CAST(floor(random() * 8) AS INTEGER)]
+    }} END,
+    CASE WHEN is_part THEN {{'k': 'building:part', 'v': 'yes'}} END,
+    CASE WHEN is_relation THEN {{'k': 'type', 'v': 'multipolygon'}} END,
+    CASE WHEN tag_draw < 0.45 THEN {{'k': 'addr:street', 'v': 'Street ' || CAST(i % 5000 AS VARCHAR)}} END,
+    CASE WHEN tag_draw < 0.45 THEN {{'k': 'addr:housenumber', 'v': CAST(1 + i % 250 AS VARCHAR)}} END,
+    CASE WHEN tag_draw < 0.30 THEN {{'k': 'building:levels', 'v': CAST(1 + CAST(floor(random() * 12) AS INTEGER) AS VARCHAR)}} END,
+    CASE WHEN tag_draw < 0.12 THEN {{'k': 'name', 'v': 'Building ' || CAST(i AS VARCHAR)}} END,
+    CASE WHEN tag_draw < 0.10 THEN {{'k': 'height', 'v': printf('%.1f', 3 + random() * 60)}} END,
+    CASE WHEN tag_draw < 0.06 THEN {{'k': 'roof:shape', 'v': ['flat', 'gabled', 'hipped'][1 + CAST(floor(random() * 3) AS INTEGER)]}} END,
+    CASE WHEN tag_draw < 0.04 THEN {{'k': 'start_date', 'v': CAST(1850 + CAST(floor(random() * 170) AS INTEGER) AS VARCHAR)}} END
+  ], entry -> entry IS NOT NULL)) AS tags,
+  ST_GeomFromText(CASE
+    WHEN is_relation THEN
+      'MULTIPOLYGON(((' || array_to_string(ring_points, ', ') || ')), ((' || array_to_string(second_ring_points, ', ') || ')))'
+    ELSE 'POLYGON((' || array_to_string(ring_points, ', ') || '))'
+  END) AS geometry
+FROM rings
+'''
+
+
+def load_importer() -> Any:
+    spec = importlib.util.spec_from_file_location('sync_osm_buildings', IMPORTER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+def ensure_fixture(fixtures_dir: Path, size: str) -> dict[str, Any]:
+    rows = FIXTURE_SIZES[size]
+    fixture_path = fixtures_dir / f'quackosm-raw-{size}-v{FIXTURE_FORMAT}.duckdb'
+    meta_path = fixture_path.with_suffix('.json')
+    if fixture_path.exists() and meta_path.exists():
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+
+    import duckdb
+
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = fixture_path.with_name(f'{fixture_path.name}.{os.getpid()}.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+    print(f'Generating {size} fixture ({rows} rows): {fixture_path}', file=sys.stderr, flush=True)
+    started_at = time.perf_counter()
+    with duckdb.connect(str(tmp_path)) as con:
+        con.load_extension('spatial')
+        con.execute(f'SELECT setseed({SEED})')
+        con.execute(FIXTURE_SQL.format(rows=int(rows)))
+        avg_vertices, avg_tags = con.execute(
+            'SELECT avg(ST_NPoints(geometry)), avg(cardinality(tags)) FROM quackosm_raw'
+        ).fetchone()
+    os.replace(tmp_path, fixture_path)
+    meta = {
+        'size': size,
+        'rows': rows,
+        'path': str(fixture_path),
+        'bytes': fixture_path.stat().st_size,
+        'avgVertices': round(float(avg_vertices), 2),
+        'avgTags': round(float(avg_tags), 2),
+        'generateSec': round(time.perf_counter() - started_at, 3),
+    }
+    meta_path.write_text(json.dumps(meta, indent=2) + '\n', encoding='utf-8')
+    return meta
+
+
+def run_case(fixture_path: Path, mode: str, engine: str, out_dir: Path) -> dict[str, Any]:
+    importer = load_importer()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rss_before = peak_rss_bytes()
+    started_at = time.perf_counter()
+    if mode == 'sqlite':
+        db_path = out_dir / 'osm.db'
+        conn = sqlite3.connect(str(db_path))
+        importer.ensure_sqlite_schema(conn)
+        importer.migrate_sqlite_schema_for_duckdb(conn)
+        sync_generation = importer.next_sqlite_sync_generation(conn)
+        setup_sec = time.perf_counter() - started_at
+        started_at = time.perf_counter()
+        processed, imported = importer.import_rows_direct_duckdb_sqlite(
+            duckdb_path=fixture_path,
+            sqlite_conn=conn,
+            import_limit=0,
+            run_marker='benchmark',
+            sync_generation=sync_generation,
+            engine=engine,
+        )
+        conn.commit()
+        conn.close()
+    else:
+        setup_sec = 0.0
+        outputs = {
+            'geojson': {'ndjson_path': out_dir / 'buildings.ndjson'},
+            'wkb_hex': {'db_ndjson_path': out_dir / 'buildings.db.ndjson'},
+            'geojson_feature': {'geojson_ndjson_path': out_dir / 'buildings.geojson.ndjson'},
+            'dual': {
+                'db_ndjson_path': out_dir / 'buildings.db.ndjson',
+                'geojson_ndjson_path': out_dir / 'buildings.geojson.ndjson',
+            },
+            'parquet': {'db_parquet_path': out_dir / 'buildings.parquet'},
+            'pgcopy': {'db_pgcopy_path': out_dir / 'buildings.pgcopy'},
+        }[mode]
+        processed, imported, _, _ = importer.export_rows_to_outputs(
+            duckdb_path=fixture_path,
+            ndjson_path=outputs.get('ndjson_path'),
+            db_ndjson_path=outputs.get('db_ndjson_path'),
+            geojson_ndjson_path=outputs.get('geojson_ndjson_path'),
+            import_limit=0,
+            engine=engine,
+            db_parquet_path=outputs.get('db_parquet_path'),
+            db_pgcopy_path=outputs.get('db_pgcopy_path'),
+        )
+    wall_sec = time.perf_counter() - started_at
+    return {
+        'processed': int(processed),
+        'rows': int(imported),
+        'wallSec': round(wall_sec, 4),
+        'setupSec': round(setup_sec, 4),
+        'rowsPerSec': round(imported / wall_sec, 1) if wall_sec > 0 else None,
+        'outputBytes': sum(path.stat().st_size for path in out_dir.iterdir() if path.is_file()),
+        'importRssBytes': rss_before,
+        'peakRssBytes': peak_rss_bytes(),
+    }
+
+
+def run_case_subprocess(python: str, fixture_path: Path, mode: str, engine: str, work_dir: Path) -> dict[str, Any]:
+    # One process per sample keeps ru_maxrss scoped to a single export.
+    with tempfile.TemporaryDirectory(prefix='export-', dir=work_dir) as out_dir:
+        result = subprocess.run(
+            [
+                python, str(Path(__file__).resolve()), '--run-case',
+                '--fixture', str(fixture_path), '--case-mode', mode, '--case-engine', engine, '--case-out', out_dir,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f'{mode}/{engine} failed with exit code {result.returncode}: {result.stderr.strip()[-800:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values: list[float]) -> dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        'min': round(ordered[0], 4),
+        'p50': round(statistics.median(ordered), 4),
+        'max': round(ordered[-1], 4),
+        'samples': [round(value, 4) for value in values],
+    }
+
+
+def benchmark_case(
+    python: str,
+    fixture: dict[str, Any],
+    mode: str,
+    engine: str,
+    samples: int,
+    work_dir: Path,
+) -> dict[str, Any]:
+    results = [
+        run_case_subprocess(python, Path(fixture['path']), mode, engine, work_dir)
+        for _ in range(samples)
+    ]
+    wall = summarize([result['wallSec'] for result in results])
+    rows = results[0]['rows']
+    peaks = [result['peakRssBytes'] for result in results if result['peakRssBytes'] is not None]
+    return {
+        'fixture': fixture['size'],
+        'mode': mode,
+        'engine': engine,
+        'rows': rows,
+        'wallSec': wall,
+        'rowsPerSec': round(rows / wall['p50'], 1) if wall['p50'] > 0 else None,
+        'outputBytes': results[0]['outputBytes'],
+        'importRssBytes': results[0]['importRssBytes'],
+        'peakRssBytes': max(peaks) if peaks else None,
+    }
+
+
+def compare_with_baseline(report: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    regressions = []
+    for name, result in report['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous:
+            continue
+        before_rate = float(previous.get('rowsPerSec') or 0.0)
+        after_rate = float(result.get('rowsPerSec') or 0.0)
+        result['baselineRowsPerSec'] = before_rate
+        if before_rate > 0 and after_rate < before_rate / (1 + max_regression):
+            regressions.append(f'{name}: {before_rate:.0f} rows/s -> {after_rate:.0f} rows/s')
+        before_peak = previous.get('peakRssBytes')
+        after_peak = result.get('peakRssBytes')
+        if before_peak and after_peak and after_peak > before_peak * (1 + max_regression):
+            regressions.append(f'{name}: peak RSS {before_peak} -> {after_peak} bytes')
+        if previous.get('rows') is not None and previous['rows'] != result['rows']:
+            regressions.append(f'{name}: exported {result["rows"]} rows, baseline exported {previous["rows"]}')
+    return regressions
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=IMPORTER_PATH.parent,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure export throughput, peak memory and output size of sync-osm-buildings.py on synthetic fixtures.'
+    )
+    parser.add_argument('--python', default=sys.executable)
+    parser.add_argument('--size', action='append', default=[], help=f'Fixture size; repeatable. One of {", ".join(FIXTURE_SIZES)}. Defaults to 10k.')
+    parser.add_argument('--mode', action='append', default=[], help='Export mode; repeatable. Defaults to all modes.')
+    parser.add_argument('--engine', action='append', default=[], help='Limit cases to these engines; repeatable.')
+    parser.add_argument('--samples', type=int, default=SAMPLES)
+    parser.add_argument(
+        '--fixtures-dir',
+        default=str(Path(tempfile.gettempdir()) / 'archimap-importer-benchmark'),
+        help='Where generated fixtures are cached between runs.',
+    )
+    parser.add_argument('--output', required=False, help='Also write the JSON report to this file.')
+    parser.add_argument('--baseline', required=False, help='Earlier JSON report; exit 1 on throughput or memory regressions.')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Allowed throughput drop or peak RSS growth ratio against --baseline.')
+    parser.add_argument('--run-case', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fixture', help=argparse.SUPPRESS)
+    parser.add_argument('--case-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--case-engine', help=argparse.SUPPRESS)
+    parser.add_argument('--case-out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        # The importer prints progress on stdout; keep stdout for the result line.
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_case(Path(args.fixture), args.case_mode, args.case_engine, Path(args.case_out))
+        print(json.dumps(result))
+        return
+
+    if args.samples < 1:
+        raise ValueError('--samples must be positive')
+    sizes = args.size or ['10k']
+    unknown = [size for size in sizes if size not in FIXTURE_SIZES]
+    if unknown:
+        raise ValueError(f'Unknown size(s): {", ".join(unknown)}. Available: {", ".join(FIXTURE_SIZES)}')
+    modes = args.mode or list(CASE_ENGINES.keys())
+    unknown = [mode for mode in modes if mode not in CASE_ENGINES]
+    if unknown:
+        raise ValueError(f'Unknown mode(s): {", ".join(unknown)}. Available: {", ".join(CASE_ENGINES)}')
+
+    fixtures_dir = Path(args.fixtures_dir).expanduser().resolve()
+    fixtures = {size: ensure_fixture(fixtures_dir, size) for size in sizes}
+    report: dict[str, Any] = {
+        'python': args.python,
+        'importer': str(IMPORTER_PATH),
+        'commit': git_commit(),
+        'samples': args.samples,
+        'fixtureFormat': FIXTURE_FORMAT,
+        'fixtures': fixtures,
+        'cases': {},
+    }
+    for size in sizes:
+        for mode in modes:
+            for engine in CASE_ENGINES[mode]:
+                if args.engine and engine not in args.engine:
+                    continue
+                name = f'{size}/{mode}/{engine}'
+                print(f'Running {name}', file=sys.stderr, flush=True)
+                report['cases'][name] = benchmark_case(
+                    args.python, fixtures[size], mode, engine, args.samples, fixtures_dir
+                )
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare_with_baseline(report, baseline, args.max_regression)
+        report['regressions'] = regressions
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + '\n', encoding='utf-8')
+    print(payload)
+
+    if regressions:
+        for line in regressions:
+            print(f'Export regression: {line}', file=sys.stderr, flush=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+IMPORTER_PATH = Path(__file__).resolve().parent / 'sync-osm-buildings.py'
+HEAVY_MODULES = ('duckdb', 'pandas', 'pyarrow', 'geopandas', 'quackosm', 'requests')
+SAMPLES = 5
+WARMUPS = 1
+
+
+def importer_modes(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    source = ['--extract-source', args.extract_source]
+    return {
+        'help': {'args': ['--help']},
+        'resolve-extract-query': {'args': ['--resolve-extract-query', args.query, *source, '--limit', '12']},
+        'resolve-exact-extract': {'args': ['--resolve-exact-extract', args.exact_query, *source]},
+        'resolve-batch': {
+            'args': ['--resolve-batch', '-', *source],
+            'input': ''.join(f'{query}\n' for query in [args.exact_query] * 10),
+        },
+        'serve-first-response': {
+            'args': ['--serve'],
+            'input': json.dumps({'id': 1, 'method': 'searchExtractCandidates', 'params': {
+                'query': args.query,
+                'source': args.extract_source,
+                'limit': 12,
+            }}) + '\n',
+        },
+    }
+
+
+def run_mode(python: str, mode: dict[str, Any], extra_flags: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [python, *extra_flags, str(IMPORTER_PATH), *mode['args']],
+        input=mode.get('input', ''),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def parse_importtime(stderr: str, top: int) -> dict[str, Any]:
+    # -X importtime lines: "import time: <self us> | <cumulative us> | <indented module name>".
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len('import time:'):].split('|', 2)]
+        rows.append((name, int(self_us), int(cumulative_us)))
+
+    # Lazily loaded packages run their body outside the import system, so only their
+    # submodules show up; self times are therefore grouped by root package name.
+    package_us: dict[str, int] = {}
+    for name, self_us, _ in rows:
+        package = name.split('.', 1)[0].lstrip('_')
+        package_us[package] = package_us.get(package, 0) + self_us
+    top_packages = sorted(package_us.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'totalImportMs': round(sum(package_us.values()) / 1000, 2),
+        'heavyModules': {name: name in package_us for name in HEAVY_MODULES},
+        'packageImportMs': {name: round(self_us / 1000, 2) for name, self_us in top_packages[:top]},
+    }
+
+
+def summarize(values: list[float]) -> dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        'min': round(ordered[0], 1),
+        'p50': round(statistics.median(ordered), 1),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max': round(ordered[-1], 1),
+        'avg': round(statistics.fmean(ordered), 1),
+        'samples': [round(value, 1) for value in values],
+    }
+
+
+def benchmark_mode(python: str, name: str, mode: dict[str, Any], samples: int, warmups: int, top: int) -> dict[str, Any]:
+    for _ in range(warmups):
+        run_mode(python, mode, [])
+
+    wall_ms = []
+    exit_codes = set()
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        result = run_mode(python, mode, [])
+        wall_ms.append((time.perf_counter() - started_at) * 1000)
+        exit_codes.add(result.returncode)
+    if exit_codes != {0}:
+        print(f'{name}: importer exited with {sorted(exit_codes)}: {result.stderr.strip()[-400:]}', file=sys.stderr, flush=True)
+
+    importtime = run_mode(python, mode, ['-X', 'importtime'])
+    return {
+        'args': mode['args'],
+        'exitCodes': sorted(exit_codes),
+        'wallMs': summarize(wall_ms),
+        'imports': parse_importtime(importtime.stderr, top),
+    }
+
+
+def compare_with_baseline(report: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    regressions = []
+    for name, result in report['modes'].items():
+        previous = baseline.get('modes', {}).get(name)
+        if not previous:
+            continue
+        before = float(previous['wallMs']['p50'])
+        after = float(result['wallMs']['p50'])
+        result['baselineP50Ms'] = before
+        if before > 0 and after > before * (1 + max_regression):
+            regressions.append(f'{name}: p50 {before:.1f} ms -> {after:.1f} ms')
+        for module, loaded in result['imports']['heavyModules'].items():
+            if loaded and not previous['imports']['heavyModules'].get(module, False):
+                regressions.append(f'{name}: now imports {module} at startup')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure cold-start latency and import cost of sync-osm-buildings.py CLI modes.'
+    )
+    parser.add_argument('--python', default=sys.executable)
+    parser.add_argument('--mode', action='append', default=[], help='Mode to run; repeatable. Defaults to all modes.')
+    parser.add_argument('--samples', type=int, default=SAMPLES)
+    parser.add_argument('--warmups', type=int, default=WARMUPS)
+    parser.add_argument('--top', type=int, default=8, help='Number of packages to report per mode, by import time.')
+    parser.add_argument('--query', default='Antarctica')
+    parser.add_argument('--exact-query', default='geofabrik_antarctica')
+    parser.add_argument('--extract-source', default='any')
+    parser.add_argument('--output', required=False, help='Also write the JSON report to this file.')
+    parser.add_argument('--baseline', required=False, help='Earlier JSON report; exit 1 on p50 regressions.')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Allowed p50 slowdown ratio against --baseline.')
+    args = parser.parse_args()
+
+    if args.samples < 1 or args.warmups < 0:
+        raise ValueError('--samples must be positive and --warmups non-negative')
+
+    modes = importer_modes(args)
+    selected = args.mode or list(modes.keys())
+    unknown = [name for name in selected if name not in modes]
+    if unknown:
+        raise ValueError(f'Unknown mode(s): {", ".join(unknown)}. Available: {", ".join(modes.keys())}')
+
+    report = {
+        'python': args.python,
+        'importer': str(IMPORTER_PATH),
+        'samples': args.samples,
+        'warmups': args.warmups,
+        'modes': {
+            name: benchmark_mode(args.python, name, modes[name], args.samples, args.warmups, args.top)
+            for name in selected
+        },
+    }
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare_with_baseline(report, baseline, args.max_regression)
+        report['regressions'] = regressions
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + '\n', encoding='utf-8')
+    print(payload)
+
+    if regressions:
+        for line in regressions:
+            print(f'Startup regression: {line}', file=sys.stderr, flush=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import importlib.metadata
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Any
+
+
+QUACKOSM_DATA_DIR = Path(__file__).resolve().parent.parent.parent / 'data' / 'quackosm'
+
+
+def lazy_module(name: str) -> Any:
+    # The module body runs on first attribute access, so resolver modes start without DuckDB or QuackOSM.
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def quackosm_version() -> str:
+    try:
+        return importlib.metadata.version('quackosm')
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def sql_string_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .common import QUACKOSM_DATA_DIR, lazy_module, quackosm_version, sql_string_literal
+from .phases import annotate_import_phase, recorded_phase
+from .resources import duckdb_resource_settings, duckdb_temp_directory
+
+quackosm = lazy_module('quackosm')
+
+
+CONVERSION_CACHE_FORMAT = 1
+BUILDING_TAGS_FILTER = {'building': True, 'building:part': True}
+
+
+def _conversion_cache_dir() -> Path:
+    return QUACKOSM_DATA_DIR / 'conversion-cache'
+
+
+def _conversion_cache_budget_bytes() -> int:
+    return int(max(0.0, float(os.getenv('CONVERSION_CACHE_MAX_GB', '0') or '0')) * 1024 ** 3)
+
+
+def _file_sha256(path: Path) -> str:
+    memo_path = _conversion_cache_dir() / 'pbf-hashes.json'
+    stat = path.stat()
+    memo_key = str(path.resolve())
+    try:
+        memo = json.loads(memo_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        memo = {}
+    known = memo.get(memo_key) or {}
+    if known.get('size') == stat.st_size and known.get('mtimeNs') == stat.st_mtime_ns and known.get('sha256'):
+        return str(known['sha256'])
+
+    digest = hashlib.sha256()
+    with path.open('rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+
+    memo[memo_key] = {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': sha256}
+    memo_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = memo_path.with_name(f'{memo_path.name}.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps(memo, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, memo_path)
+    return sha256
+
+
+def _conversion_cache_key(pbf_sha256: str, tags_filter: dict[str, Any]) -> str:
+    payload = json.dumps({
+        'format': CONVERSION_CACHE_FORMAT,
+        'pbfSha256': pbf_sha256,
+        'tagsFilter': tags_filter,
+        'quackosmVersion': quackosm_version(),
+        'keepAllTags': True,
+        'explodeTags': False,
+        'table': 'quackosm_raw',
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def break_hardlink(path: Path) -> None:
+    if not path.exists() or path.stat().st_nlink <= 1:
+        return
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.unlink-tmp')
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _conversion_cache_last_used(entry: Path) -> float:
+    try:
+        return entry.with_suffix('.json').stat().st_mtime
+    except OSError:
+        return entry.stat().st_mtime
+
+
+def evict_conversion_cache(budget_bytes: int, keep: Path | None = None) -> int:
+    # Entries still linked into a work directory would free no space, so they are skipped.
+    cache_dir = _conversion_cache_dir()
+    entries = sorted(
+        ((_conversion_cache_last_used(entry), entry.stat(), entry) for entry in cache_dir.glob('*.duckdb')),
+        key=lambda item: item[0],
+    )
+    total = sum(stat.st_size for _, stat, _ in entries)
+    evicted = 0
+    for _, stat, entry in entries:
+        if total <= budget_bytes:
+            break
+        if (keep is not None and entry == keep) or stat.st_nlink > 1:
+            continue
+        entry.unlink(missing_ok=True)
+        entry.with_suffix('.json').unlink(missing_ok=True)
+        total -= stat.st_size
+        evicted += 1
+    return evicted
+
+
+def release_converted_extracts(work_dir: Path) -> int:
+    released = 0
+    for path in work_dir.glob('quackosm-buildings*.duckdb'):
+        if path.stat().st_nlink > 1:
+            path.unlink()
+            released += 1
+    return released
+
+
+@recorded_phase('convert', rows=lambda result: None, outputs=lambda arguments: [arguments['duckdb_path']])
+def convert_pbf_to_duckdb_cached(
+    pbf_path: Path,
+    duckdb_path: Path,
+    working_directory: Path | str = 'files',
+    ignore_cache: bool = False,
+) -> Path:
+    if duckdb_path.exists():
+        duckdb_path.unlink()
+
+    annotate_import_phase(pbf=pbf_path.name, cacheHit=False)
+    budget_bytes = _conversion_cache_budget_bytes()
+    cache_entry = None
+    if budget_bytes > 0:
+        pbf_sha256 = _file_sha256(pbf_path)
+        cache_entry = _conversion_cache_dir() / f'{_conversion_cache_key(pbf_sha256, BUILDING_TAGS_FILTER)}.duckdb'
+        if cache_entry.exists():
+            cache_entry.with_suffix('.json').touch()
+            _link_or_copy(cache_entry, duckdb_path)
+            print(f'Conversion cache hit: pbf={pbf_path.name}, entry={cache_entry.name}', flush=True)
+            annotate_import_phase(cacheHit=True, bytes=0)
+            return duckdb_path
+
+    resources = duckdb_resource_settings()
+    provisioning_queries = [f'SET temp_directory = {sql_string_literal(duckdb_temp_directory())}']
+    if resources['memoryLimit']:
+        provisioning_queries.append(f'SET memory_limit = {sql_string_literal(resources["memoryLimit"])}')
+    reader = quackosm.PbfFileReader(
+        tags_filter=BUILDING_TAGS_FILTER,
+        working_directory=working_directory,
+        verbosity_mode='transient',
+        cpu_limit=resources['threads'],
+        duckdb_conn_kwargs={'provisioning_queries': provisioning_queries},
+    )
+
+    reader.convert_pbf_to_duckdb(
+        pbf_path=pbf_path,
+        result_file_path=duckdb_path,
+        keep_all_tags=True,
+        explode_tags=False,
+        ignore_cache=ignore_cache,
+        duckdb_table_name='quackosm_raw'
+    )
+
+    if cache_entry is not None:
+        try:
+            cache_entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp_entry = cache_entry.with_name(f'{cache_entry.name}.{os.getpid()}.tmp')
+            _link_or_copy(duckdb_path, tmp_entry)
+            os.replace(tmp_entry, cache_entry)
+            cache_entry.with_suffix('.json').write_text(json.dumps({
+                'format': CONVERSION_CACHE_FORMAT,
+                'pbfPath': str(pbf_path),
+                'pbfSha256': pbf_sha256,
+                'tagsFilter': BUILDING_TAGS_FILTER,
+                'quackosmVersion': quackosm_version(),
+                'createdAt': datetime.now(timezone.utc).isoformat(),
+                'sizeBytes': cache_entry.stat().st_size,
+            }, ensure_ascii=False), encoding='utf-8')
+            evicted = evict_conversion_cache(budget_bytes, keep=cache_entry)
+            if evicted:
+                print(f'Conversion cache: evicted {evicted} entries over {budget_bytes} bytes', flush=True)
+        except OSError as exc:
+            print(f'Conversion cache write failed ({exc}); continuing without cache.', file=sys.stderr, flush=True)
+    return duckdb_path
@@ -0,0 +1,755 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import struct
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Tuple
+
+from .common import lazy_module, sql_string_literal
+from .phases import recorded_phase
+from .resources import connect_duckdb, load_duckdb_extensions
+
+duckdb = lazy_module('duckdb')
+
+
+BATCH_SIZE = 20000
+PARQUET_ROW_GROUP_SIZE = 50000
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+_PGCOPY_TUPLE_START = struct.Struct('!hi')
+_PGCOPY_FIELD_LENGTH = struct.Struct('!i')
+_PGCOPY_INT8 = struct.Struct('!iq')
+_PGCOPY_BBOX = struct.Struct('!idididid')
+_PGCOPY_NULL = _PGCOPY_FIELD_LENGTH.pack(-1)
+_JSON_LOWER_HEX_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\u00([0-9a-f]{2})')
+EXPORT_ORDERS = ('none', 'feature_id', 'spatial')
+DELTA_STREAMS = ('added', 'changed', 'deleted')
+
+
+def encode_osm_feature_id(osm_type: str, osm_id: int) -> int:
+    type_bit = 1 if str(osm_type or '').strip() == 'relation' else 0
+    return (int(osm_id) * 2) + type_bit
+
+
+def normalize_feature_kind(value: Any) -> str:
+    kind = str(value or '').strip().lower()
+    return 'building_part' if kind == 'building_part' else 'building'
+
+
+def derive_feature_kind_from_tags_json(tags_json: str | None) -> str:
+    text = str(tags_json or '').strip()
+    if not text:
+        return 'building'
+    try:
+        tags = json.loads(text)
+    except Exception:
+        return 'building'
+    if not isinstance(tags, dict):
+        return 'building'
+    if 'building' in tags:
+        return 'building'
+    if 'building:part' in tags or 'building_part' in tags:
+        return 'building_part'
+    return 'building'
+
+
+def build_geojson_feature_line(
+    osm_type: str,
+    osm_id: int,
+    geometry_json: str,
+    tags_json: str | None = None,
+    feature_kind: str | None = None,
+) -> str:
+    normalized_geometry_json = str(geometry_json or '').strip()
+    if not normalized_geometry_json:
+        raise ValueError(f'Missing GeoJSON geometry for {str(osm_type or "").strip()}/{int(osm_id)}')
+    normalized_feature_kind = normalize_feature_kind(feature_kind or derive_feature_kind_from_tags_json(tags_json))
+    return (
+        f'{{"type":"Feature","id":{encode_osm_feature_id(osm_type, int(osm_id))},'
+        f'"properties":{{"osm_id":{int(osm_id)},"feature_kind":"{normalized_feature_kind}"}},"geometry":{normalized_geometry_json}}}\n'
+    )
+
+
+def _json_string(value: Any) -> str:
+    if value is None:
+        return 'null'
+    text = json.dumps(str(value), ensure_ascii=False)
+    if '\\u00' not in text:
+        return text
+    # DuckDB's JSON writer uses upper-case hex digits for control character escapes.
+    return _JSON_LOWER_HEX_ESCAPE.sub(lambda match: f'{match.group(1)}\\u00{match.group(2).upper()}', text)
+
+
+def _json_number(value: float) -> str:
+    # Same float formatting as DuckDB's JSON writer.
+    text = repr(float(value))
+    mantissa, _, exponent = text.partition('e')
+    if not exponent:
+        return text
+    if -7 < int(exponent) < 21:
+        text = format(Decimal(text), 'f')
+        return text if '.' in text else f'{text}.0'
+    return f'{mantissa}e{int(exponent)}'
+
+
+def build_export_row_line(row: Tuple[Any, ...], geometry_key: str) -> str:
+    osm_type, osm_id, tags_json, feature_kind, min_lon, min_lat, max_lon, max_lat, spatial_key, geometry = row
+    return (
+        f'{{"osm_type":{_json_string(osm_type)},"osm_id":{int(osm_id)},"tags_json":{_json_string(tags_json)},'
+        f'"feature_kind":{_json_string(feature_kind)},"min_lon":{_json_number(min_lon)},"min_lat":{_json_number(min_lat)},'
+        f'"max_lon":{_json_number(max_lon)},"max_lat":{_json_number(max_lat)},"spatial_key":{int(spatial_key)},'
+        f'"{geometry_key}":{_json_string(geometry)}}}\n'
+    )
+
+
+_FEATURE_KIND_SQL = """CASE
+      WHEN NOT map_contains(tags, 'building')
+        AND (map_contains(tags, 'building:part') OR map_contains(tags, 'building_part'))
+        THEN 'building_part'
+      ELSE 'building'
+    END"""
+
+_CONTENT_HASH_SQL = "md5_number_lower(concat(coalesce(tags_json, ''), '|', ST_AsHEXWKB(geometry)))"
+
+_SPATIAL_KEY_SQL = "ST_Hilbert(geometry, {'min_x': -180.0, 'min_y': -90.0, 'max_x': 180.0, 'max_y': 90.0}::BOX_2D)"
+
+
+def _filtered_rows_cte_sql(import_limit: int, order: str = 'none', source_table: str = 'quackosm_raw') -> str:
+    if order not in EXPORT_ORDERS:
+        raise ValueError(f'Unsupported export order: {order}')
+    if import_limit > 0:
+        filtered_sql = f'SELECT *\n  FROM src\n  ORDER BY feature_id\n  LIMIT {int(import_limit)}'
+        if order == 'spatial':
+            filtered_sql = f'SELECT *\n  FROM ({filtered_sql})\n  ORDER BY spatial_key, feature_id'
+    elif order == 'feature_id':
+        filtered_sql = 'SELECT *\n  FROM src\n  ORDER BY feature_id'
+    elif order == 'spatial':
+        filtered_sql = 'SELECT *\n  FROM src\n  ORDER BY spatial_key, feature_id'
+    else:
+        filtered_sql = 'SELECT *\n  FROM src'
+
+    return f'''
+WITH src AS (
+  SELECT
+    feature_id,
+    tags,
+    {_FEATURE_KIND_SQL} AS feature_kind,
+    geometry,
+    ST_XMin(geometry) AS min_lon,
+    ST_YMin(geometry) AS min_lat,
+    ST_XMax(geometry) AS max_lon,
+    ST_YMax(geometry) AS max_lat,
+    {_SPATIAL_KEY_SQL} AS spatial_key
+  FROM {source_table}
+  WHERE geometry IS NOT NULL
+    AND split_part(feature_id, '/', 1) IN ('way', 'relation')
+    AND ST_GeometryType(geometry) IN ('POLYGON', 'MULTIPOLYGON')
+), filtered AS (
+  {filtered_sql}
+)
+'''
+
+
+def _export_projection_sql(line_format: str) -> str:
+    if line_format == 'rows':
+        projection = """
+  *"""
+    elif line_format == 'sqlite':
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  CAST(ST_AsGeoJSON(geometry) AS VARCHAR) AS geometry_json,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat"""
+    elif line_format == 'pgcopy':
+        # Column order of region_import_tmp in scripts/region-sync/import-applier.ts.
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  CAST(ST_AsWKB(geometry) AS BLOB) AS geometry_wkb,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat,
+  spatial_key"""
+    elif line_format == 'parquet':
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  CAST(feature_kind AS ENUM('building', 'building_part')) AS feature_kind,
+  CAST(ST_AsWKB(geometry) AS BLOB) AS geometry_wkb,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat,
+  spatial_key"""
+    elif line_format == 'snapshot':
+        projection = f"""
+  osm_type,
+  osm_id,
+  {_CONTENT_HASH_SQL} AS content_hash"""
+    elif line_format == 'geojson':
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  feature_kind,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat,
+  spatial_key,
+  CAST(ST_AsGeoJSON(geometry) AS VARCHAR) AS geometry_json"""
+    elif line_format == 'wkb_hex':
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  feature_kind,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat,
+  spatial_key,
+  ST_AsHEXWKB(geometry) AS geometry_wkb_hex"""
+    elif line_format == 'dual':
+        projection = """
+  osm_type,
+  osm_id,
+  tags_json,
+  feature_kind,
+  min_lon,
+  min_lat,
+  max_lon,
+  max_lat,
+  spatial_key,
+  ST_AsHEXWKB(geometry) AS geometry_wkb_hex,
+  CAST(ST_AsGeoJSON(geometry) AS VARCHAR) AS geometry_json"""
+    elif line_format == 'geojson_feature':
+        projection = """
+  'Feature' AS type,
+  osm_id * 2 + CASE WHEN osm_type = 'relation' THEN 1 ELSE 0 END AS id,
+  {'osm_id': osm_id, 'feature_kind': feature_kind} AS properties,
+  CAST(ST_AsGeoJSON(geometry) AS JSON) AS geometry"""
+    else:
+        raise ValueError(f'Unsupported COPY export line format: {line_format}')
+    return projection
+
+
+def export_copy_select_sql(
+    import_limit: int,
+    line_format: str,
+    order: str = 'none',
+    row_filter_sql: str | None = None,
+    source_table: str = 'quackosm_raw',
+) -> str:
+    projection = _export_projection_sql(line_format)
+    return f"""
+{_filtered_rows_cte_sql(import_limit, order, source_table)}, export_rows AS (
+  SELECT
+    split_part(feature_id, '/', 1) AS osm_type,
+    try_cast(split_part(feature_id, '/', 2) AS BIGINT) AS osm_id,
+    CAST(to_json(tags) AS VARCHAR) AS tags_json,
+    feature_kind,
+    geometry,
+    min_lon,
+    min_lat,
+    max_lon,
+    max_lat,
+    spatial_key
+  FROM filtered
+  WHERE try_cast(split_part(feature_id, '/', 2) AS BIGINT) IS NOT NULL
+)
+SELECT{projection}
+FROM export_rows
+{f'WHERE {row_filter_sql}' if row_filter_sql else ''}
+"""
+
+
+def export_rows_duckdb_ndjson(
+    duckdb_path: Path,
+    out_path: Path,
+    import_limit: int,
+    geometry_mode: str = 'geojson',
+    append: bool = False,
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    geometry_mode_normalized = str(geometry_mode or 'geojson').strip().lower() or 'geojson'
+    if geometry_mode_normalized == 'wkb_hex':
+        line_format = 'wkb_hex'
+    elif geometry_mode_normalized in ('geojson', 'geojson_feature'):
+        line_format = 'geojson'
+    else:
+        raise ValueError(f'Unsupported geometry export mode: {geometry_mode}')
+    mode = 'a' if append else 'w'
+    imported = 0
+
+    with connect_duckdb(duckdb_path, read_only=True) as con:
+        load_duckdb_extensions(con)
+        cursor = con.execute(export_copy_select_sql(import_limit, line_format, order))
+        with out_path.open(mode, encoding='utf-8') as out:
+            while True:
+                chunk = cursor.fetchmany(BATCH_SIZE)
+                if not chunk:
+                    break
+                for row in chunk:
+                    if geometry_mode_normalized == 'geojson_feature':
+                        out.write(build_geojson_feature_line(str(row[0]), int(row[1]), str(row[9]), feature_kind=row[3]))
+                    elif geometry_mode_normalized == 'wkb_hex':
+                        out.write(build_export_row_line(row, 'geometry_wkb_hex'))
+                    else:
+                        out.write(build_export_row_line(row, 'geometry_json'))
+                imported += len(chunk)
+        _, bounds, feature_kind_counts = summarize_export_rows(con, import_limit)
+
+    return imported, imported, bounds, feature_kind_counts
+
+
+def export_rows_duckdb_dual_ndjson(
+    duckdb_path: Path,
+    db_out_path: Path,
+    geojson_out_path: Path,
+    import_limit: int,
+    append: bool = False,
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    mode = 'a' if append else 'w'
+    imported = 0
+
+    with connect_duckdb(duckdb_path, read_only=True) as con:
+        load_duckdb_extensions(con)
+        cursor = con.execute(export_copy_select_sql(import_limit, 'dual', order))
+        with db_out_path.open(mode, encoding='utf-8') as db_out, geojson_out_path.open(mode, encoding='utf-8') as geojson_out:
+            while True:
+                chunk = cursor.fetchmany(BATCH_SIZE)
+                if not chunk:
+                    break
+                for row in chunk:
+                    db_out.write(build_export_row_line(row[:10], 'geometry_wkb_hex'))
+                    geojson_out.write(build_geojson_feature_line(str(row[0]), int(row[1]), str(row[10]), feature_kind=row[3]))
+                imported += len(chunk)
+        _, bounds, feature_kind_counts = summarize_export_rows(con, import_limit)
+
+    return imported, imported, bounds, feature_kind_counts
+
+
+def summarize_export_rows(
+    con: duckdb.DuckDBPyConnection,
+    import_limit: int,
+    source_table: str = 'quackosm_raw',
+    staged_table: str | None = None,
+) -> Tuple[int, dict[str, float] | None, dict[str, int]]:
+    aggregates_sql = """
+  COUNT(*),
+  MIN(min_lon),
+  MIN(min_lat),
+  MAX(max_lon),
+  MAX(max_lat),
+  COUNT(*) FILTER (WHERE feature_kind = 'building'),
+  COUNT(*) FILTER (WHERE feature_kind = 'building_part')"""
+    if staged_table is not None:
+        row = con.execute(f'SELECT{aggregates_sql}\nFROM {staged_table};').fetchone()
+    else:
+        row = con.execute(f'''
+{_filtered_rows_cte_sql(import_limit, source_table=source_table)}
+SELECT{aggregates_sql}
+FROM filtered
+WHERE try_cast(split_part(feature_id, '/', 2) AS BIGINT) IS NOT NULL;
+''').fetchone()
+
+    count = int(row[0] or 0) if row else 0
+    if count == 0:
+        return 0, None, {'building': 0, 'building_part': 0}
+    return count, {
+        'west': float(row[1]),
+        'south': float(row[2]),
+        'east': float(row[3]),
+        'north': float(row[4]),
+    }, {
+        'building': int(row[5] or 0),
+        'building_part': int(row[6] or 0),
+    }
+
+
+def append_file(src_path: Path, out_path: Path) -> None:
+    with src_path.open('rb') as src, out_path.open('ab') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    src_path.unlink()
+
+
+def append_parquet_file(src_path: Path, out_path: Path) -> None:
+    if not out_path.exists() or out_path.stat().st_size == 0:
+        os.replace(src_path, out_path)
+        return
+    merged_path = out_path.with_name(f'{out_path.name}.merge-tmp')
+    sources_sql = f'[{sql_string_literal(str(out_path))}, {sql_string_literal(str(src_path))}]'
+    with connect_duckdb() as con:
+        con.execute(f'''
+COPY (
+  SELECT * EXCLUDE (filename, file_row_number)
+  FROM read_parquet({sources_sql}, filename = true, file_row_number = true)
+  ORDER BY list_position({sources_sql}, filename), file_row_number
+) TO {sql_string_literal(str(merged_path))} (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE})
+''')
+    os.replace(merged_path, out_path)
+    src_path.unlink()
+
+
+def export_rows_duckdb_parquet(
+    duckdb_path: Path,
+    out_path: Path,
+    import_limit: int,
+    append: bool = False,
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    tmp_path = out_path.with_name(f'{out_path.name}.copy-tmp')
+    try:
+        with connect_duckdb(duckdb_path, read_only=True) as con:
+            load_duckdb_extensions(con)
+            row = con.execute(
+                f'COPY ({export_copy_select_sql(import_limit, "parquet", order)}) '
+                f'TO {sql_string_literal(str(tmp_path))} '
+                f'(FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE})'
+            ).fetchone()
+            imported = int(row[0] or 0) if row else 0
+            _, bounds, feature_kind_counts = summarize_export_rows(con, import_limit)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+    if append:
+        append_parquet_file(tmp_path, out_path)
+    else:
+        os.replace(tmp_path, out_path)
+    return imported, imported, bounds, feature_kind_counts
+
+
+def _pgcopy_tuple(row: Tuple[Any, ...]) -> bytes:
+    osm_type, osm_id, tags_json, geometry_wkb, min_lon, min_lat, max_lon, max_lat, spatial_key = row
+    osm_type_bytes = str(osm_type).encode('utf-8')
+    parts = [
+        _PGCOPY_TUPLE_START.pack(9, len(osm_type_bytes)),
+        osm_type_bytes,
+        _PGCOPY_INT8.pack(8, int(osm_id)),
+    ]
+    if tags_json is None:
+        parts.append(_PGCOPY_NULL)
+    else:
+        tags_bytes = str(tags_json).encode('utf-8')
+        parts.append(_PGCOPY_FIELD_LENGTH.pack(len(tags_bytes)))
+        parts.append(tags_bytes)
+    parts.append(_PGCOPY_FIELD_LENGTH.pack(len(geometry_wkb)))
+    parts.append(bytes(geometry_wkb))
+    parts.append(_PGCOPY_BBOX.pack(8, min_lon, 8, min_lat, 8, max_lon, 8, max_lat))
+    parts.append(_PGCOPY_NULL if spatial_key is None else _PGCOPY_INT8.pack(8, int(spatial_key)))
+    return b''.join(parts)
+
+
+def append_pgcopy_file(src_path: Path, out_path: Path) -> None:
+    if not out_path.exists() or out_path.stat().st_size == 0:
+        os.replace(src_path, out_path)
+        return
+    with out_path.open('r+b') as dst:
+        dst.seek(-len(PGCOPY_TRAILER), os.SEEK_END)
+        dst.truncate()
+        dst.seek(0, os.SEEK_END)
+        with src_path.open('rb') as src:
+            src.seek(len(PGCOPY_HEADER))
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    src_path.unlink()
+
+
+def export_rows_pgcopy(
+    duckdb_path: Path,
+    out_path: Path,
+    import_limit: int,
+    append: bool = False,
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    tmp_path = out_path.with_name(f'{out_path.name}.copy-tmp')
+    imported = 0
+    try:
+        with connect_duckdb(duckdb_path, read_only=True) as con, tmp_path.open('wb') as out:
+            load_duckdb_extensions(con)
+            cursor = con.execute(export_copy_select_sql(import_limit, 'pgcopy', order))
+            out.write(PGCOPY_HEADER)
+            while True:
+                chunk = cursor.fetchmany(BATCH_SIZE)
+                if not chunk:
+                    break
+                out.write(b''.join(_pgcopy_tuple(row) for row in chunk))
+                imported += len(chunk)
+            out.write(PGCOPY_TRAILER)
+            _, bounds, feature_kind_counts = summarize_export_rows(con, import_limit)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+    if append:
+        append_pgcopy_file(tmp_path, out_path)
+    else:
+        os.replace(tmp_path, out_path)
+    return imported, imported, bounds, feature_kind_counts
+
+
+def export_rows_duckdb_copy(
+    duckdb_path: Path,
+    outputs: list[Tuple[Path, str]],
+    import_limit: int,
+    append: bool = False,
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    staged = [(out_path.with_name(f'{out_path.name}.copy-tmp'), out_path, line_format) for out_path, line_format in outputs]
+    imported = 0
+    try:
+        with connect_duckdb(duckdb_path, read_only=True) as con:
+            load_duckdb_extensions(con)
+            staged_table = None
+            if len(staged) > 1:
+                staged_table = 'export_rows_staged'
+                con.execute(f'CREATE TEMP TABLE {staged_table} AS {export_copy_select_sql(import_limit, "rows", order)}')
+            for position, (tmp_path, _, line_format) in enumerate(staged):
+                if staged_table is None:
+                    select_sql = export_copy_select_sql(import_limit, line_format, order)
+                else:
+                    select_sql = f'SELECT{_export_projection_sql(line_format)}\nFROM {staged_table}'
+                row = con.execute(
+                    f'COPY ({select_sql}) '
+                    f"TO {sql_string_literal(str(tmp_path))} (FORMAT json, COMPRESSION 'uncompressed')"
+                ).fetchone()
+                if position == 0:
+                    imported = int(row[0] or 0) if row else 0
+            _, bounds, feature_kind_counts = summarize_export_rows(con, import_limit, staged_table=staged_table)
+    except Exception:
+        for tmp_path, _, _ in staged:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        raise
+
+    for tmp_path, out_path, _ in staged:
+        if append:
+            append_file(tmp_path, out_path)
+        else:
+            os.replace(tmp_path, out_path)
+
+    return imported, imported, bounds, feature_kind_counts
+
+
+@recorded_phase(
+    'export',
+    rows=lambda result: result[1],
+    outputs=lambda arguments: [
+        arguments[name]
+        for name in ('ndjson_path', 'db_ndjson_path', 'geojson_ndjson_path', 'db_parquet_path', 'db_pgcopy_path')
+    ],
+)
+def export_rows_to_outputs(
+    duckdb_path: Path,
+    ndjson_path: Path | None,
+    db_ndjson_path: Path | None,
+    geojson_ndjson_path: Path | None,
+    import_limit: int,
+    append: bool = False,
+    engine: str = 'copy',
+    order: str = 'none',
+    db_parquet_path: Path | None = None,
+    db_pgcopy_path: Path | None = None,
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    if db_parquet_path is not None and db_pgcopy_path is not None:
+        raise ValueError('Use either a Parquet or a PostgreSQL COPY DB import output')
+    binary_result = None
+    if db_parquet_path is not None:
+        binary_result = export_rows_duckdb_parquet(duckdb_path, db_parquet_path, import_limit, append=append, order=order)
+    if db_pgcopy_path is not None:
+        binary_result = export_rows_pgcopy(duckdb_path, db_pgcopy_path, import_limit, append=append, order=order)
+    if binary_result is not None and ndjson_path is None and db_ndjson_path is None and geojson_ndjson_path is None:
+        return binary_result
+
+    if engine == 'copy':
+        outputs: list[Tuple[Path, str]] = []
+        if ndjson_path is not None:
+            outputs.append((ndjson_path, 'geojson'))
+        else:
+            if db_ndjson_path is not None:
+                outputs.append((db_ndjson_path, 'wkb_hex'))
+            if geojson_ndjson_path is not None:
+                outputs.append((geojson_ndjson_path, 'geojson_feature'))
+        try:
+            return export_rows_duckdb_copy(duckdb_path, outputs, import_limit, append=append, order=order)
+        except duckdb.Error as exc:
+            print(f'DuckDB COPY export failed ({exc}); falling back to the Python export engine.', flush=True)
+
+    if ndjson_path is not None:
+        return export_rows_duckdb_ndjson(
+            duckdb_path=duckdb_path,
+            out_path=ndjson_path,
+            import_limit=import_limit,
+            geometry_mode='geojson',
+            append=append,
+            order=order,
+        )
+    if db_ndjson_path is not None and geojson_ndjson_path is not None:
+        return export_rows_duckdb_dual_ndjson(
+            duckdb_path=duckdb_path,
+            db_out_path=db_ndjson_path,
+            geojson_out_path=geojson_ndjson_path,
+            import_limit=import_limit,
+            append=append,
+            order=order,
+        )
+    if db_ndjson_path is not None:
+        return export_rows_duckdb_ndjson(
+            duckdb_path=duckdb_path,
+            out_path=db_ndjson_path,
+            import_limit=import_limit,
+            geometry_mode='wkb_hex',
+            append=append,
+            order=order,
+        )
+    if geojson_ndjson_path is None:
+        raise ValueError('At least one export output path is required')
+    return export_rows_duckdb_ndjson(
+        duckdb_path=duckdb_path,
+        out_path=geojson_ndjson_path,
+        import_limit=import_limit,
+        geometry_mode='geojson_feature',
+        append=append,
+        order=order,
+    )
+
+
+def _write_snapshot_parquet(con: duckdb.DuckDBPyConnection, table_name: str, snapshot_path: Path) -> None:
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(f'{snapshot_path.name}.tmp')
+    con.execute(
+        f'COPY (SELECT osm_type, osm_id, content_hash FROM {table_name} ORDER BY osm_type, osm_id) '
+        f"TO {sql_string_literal(str(tmp_path))} (FORMAT parquet, COMPRESSION zstd)"
+    )
+    os.replace(tmp_path, snapshot_path)
+
+
+@recorded_phase('export', rows=lambda result: result[1], outputs=lambda arguments: [arguments['snapshot_path']])
+def write_export_snapshot(
+    duckdb_path: Path,
+    snapshot_path: Path,
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    with connect_duckdb(duckdb_path, read_only=True) as con:
+        load_duckdb_extensions(con)
+        con.execute(f'CREATE OR REPLACE TEMP TABLE snapshot_current AS {export_copy_select_sql(0, "snapshot")}')
+        _write_snapshot_parquet(con, 'snapshot_current', snapshot_path)
+        count, bounds, feature_kind_counts = summarize_export_rows(con, 0)
+    print(f'Snapshot written: rows={count}, path={snapshot_path}', flush=True)
+    return count, count, bounds, feature_kind_counts
+
+
+def write_delta_streams(
+    con: duckdb.DuckDBPyConnection,
+    current_table: str,
+    previous_table: str,
+    delta_dir: Path,
+    geometry_mode: str = 'wkb_hex',
+    order: str = 'none',
+    source_table: str = 'quackosm_raw',
+) -> dict[str, int]:
+    if geometry_mode not in ('wkb_hex', 'geojson'):
+        raise ValueError(f'Unsupported delta geometry mode: {geometry_mode}')
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    staged = {
+        stream: (delta_dir / f'{stream}.ndjson.tmp', delta_dir / f'{stream}.ndjson')
+        for stream in DELTA_STREAMS
+    }
+    delta_counts: dict[str, int] = {}
+    try:
+        con.execute(f'''
+CREATE OR REPLACE TEMP TABLE delta_status AS
+SELECT
+  cur.osm_type,
+  cur.osm_id,
+  CASE WHEN prev.osm_id IS NULL THEN 'added' ELSE 'changed' END AS status
+FROM {current_table} cur
+LEFT JOIN {previous_table} prev
+  ON prev.osm_type = cur.osm_type
+ AND prev.osm_id = cur.osm_id
+WHERE prev.osm_id IS NULL
+   OR prev.content_hash <> cur.content_hash
+''')
+        for stream in ('added', 'changed'):
+            row_filter_sql = (
+                'EXISTS (SELECT 1 FROM delta_status ds WHERE ds.osm_type = export_rows.osm_type '
+                f"AND ds.osm_id = export_rows.osm_id AND ds.status = '{stream}')"
+            )
+            select_sql = export_copy_select_sql(0, geometry_mode, order, row_filter_sql, source_table)
+            row = con.execute(
+                f'COPY ({select_sql}) '
+                f"TO {sql_string_literal(str(staged[stream][0]))} (FORMAT json, COMPRESSION 'uncompressed')"
+            ).fetchone()
+            delta_counts[stream] = int(row[0] or 0) if row else 0
+        row = con.execute(f'''
+COPY (
+  SELECT prev.osm_type, prev.osm_id
+  FROM {previous_table} prev
+  ANTI JOIN {current_table} cur
+    ON cur.osm_type = prev.osm_type
+   AND cur.osm_id = prev.osm_id
+  ORDER BY prev.osm_type, prev.osm_id
+) TO {sql_string_literal(str(staged['deleted'][0]))} (FORMAT json, COMPRESSION 'uncompressed')
+''').fetchone()
+        delta_counts['deleted'] = int(row[0] or 0) if row else 0
+    except Exception:
+        for tmp_path, _ in staged.values():
+            if tmp_path.exists():
+                tmp_path.unlink()
+        raise
+
+    for tmp_path, out_path in staged.values():
+        os.replace(tmp_path, out_path)
+    return delta_counts
+
+
+@recorded_phase(
+    'export',
+    rows=lambda result: result[1],
+    outputs=lambda arguments: [
+        arguments['snapshot_path'],
+        *(arguments['delta_dir'] / f'{stream}.ndjson' for stream in DELTA_STREAMS),
+    ],
+)
+def export_rows_delta(
+    duckdb_path: Path,
+    previous_snapshot_path: Path,
+    delta_dir: Path,
+    geometry_mode: str = 'wkb_hex',
+    order: str = 'none',
+    snapshot_path: Path | None = None,
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int], dict[str, int]]:
+    with connect_duckdb(duckdb_path, read_only=True) as con:
+        load_duckdb_extensions(con)
+        con.execute(f'CREATE OR REPLACE TEMP TABLE snapshot_current AS {export_copy_select_sql(0, "snapshot")}')
+        con.execute(f'''
+CREATE OR REPLACE TEMP TABLE snapshot_previous AS
+SELECT CAST(osm_type AS VARCHAR) AS osm_type, CAST(osm_id AS BIGINT) AS osm_id, CAST(content_hash AS UBIGINT) AS content_hash
+FROM read_parquet({sql_string_literal(str(previous_snapshot_path))})
+''')
+        delta_counts = write_delta_streams(con, 'snapshot_current', 'snapshot_previous', delta_dir, geometry_mode, order)
+        if snapshot_path is not None:
+            _write_snapshot_parquet(con, 'snapshot_current', snapshot_path)
+        count, bounds, feature_kind_counts = summarize_export_rows(con, 0)
+
+    delta_counts['unchanged'] = count - delta_counts['added'] - delta_counts['changed']
+    print(
+        f"Delta export done: added={delta_counts['added']}, changed={delta_counts['changed']}, "
+        f"deleted={delta_counts['deleted']}, unchanged={delta_counts['unchanged']}, dir={delta_dir}",
+        flush=True,
+    )
+    return count, count, bounds, feature_kind_counts, delta_counts
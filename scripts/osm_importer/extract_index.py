@@ -0,0 +1,578 @@
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Tuple
+
+from .common import QUACKOSM_DATA_DIR, lazy_module, quackosm_version, sql_string_literal
+from .resources import connect_duckdb
+
+duckdb = lazy_module('duckdb')
+pd = lazy_module('pandas')
+requests = lazy_module('requests')
+
+
+# Bump when the cached extract index columns or alias rules change.
+EXTRACT_INDEX_CACHE_FORMAT = 1
+OSM_EXTRACT_SOURCE_VALUES = ('any', 'Geofabrik', 'osmfr', 'BBBike')
+_EXTRACT_INDEX_LOCK = threading.Lock()
+EXTRACT_INDEX_CACHE_COLUMNS = (
+    'id',
+    'name',
+    'file_name',
+    'parent',
+    'url',
+    'area',
+    'source_name',
+    'normalized_name',
+    'normalized_file_name',
+)
+
+
+def normalize_extract_source(value: str) -> str:
+    raw = str(value or 'any').strip() or 'any'
+    for source_value in OSM_EXTRACT_SOURCE_VALUES:
+        if raw == source_value or raw.lower() == source_value.lower():
+            return source_value
+    raise ValueError(f'Unknown OSM extract source: {raw}')
+
+
+def normalize_search_text(value: str) -> str:
+    text = str(value or '').strip().casefold()
+    text = text.replace('_', ' ')
+    text = re.sub(r'[/\\|:;,.()+-]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def tokenize_search_text(value: str) -> list[str]:
+    return [token for token in normalize_search_text(value).split(' ') if token]
+
+
+def infer_extract_source(file_name: str) -> str:
+    value = str(file_name or '').strip().casefold()
+    if value.startswith('osmfr_'):
+        return 'osmfr'
+    if value.startswith('geofabrik_'):
+        return 'geofabrik'
+    if value.startswith('bbbike_'):
+        return 'bbbike'
+    return 'any'
+
+
+def _is_quackosm_index_rate_limit_error(exc: requests.HTTPError) -> bool:
+    response = getattr(exc, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    if status_code not in {403, 429}:
+        return False
+
+    details = f'{exc} {getattr(response, "text", "")}'.casefold()
+    return status_code == 429 or 'rate limit' in details or 'too many requests' in details
+
+
+def serialize_extract(extract: Any, *, match_kind: str | None = None, exact: bool | None = None) -> dict[str, Any]:
+    file_name = str(getattr(extract, 'file_name', '') or '').strip()
+    return {
+        'extractSource': infer_extract_source(file_name),
+        'extractId': file_name,
+        'extractLabel': str(getattr(extract, 'name', '') or file_name).strip() or file_name,
+        'downloadUrl': str(getattr(extract, 'url', '') or '').strip() or None,
+        'matchKind': match_kind,
+        'exact': bool(exact),
+    }
+
+
+def trim_extract_archive_suffix(value: str) -> str:
+    text = str(value or '').strip()
+    for suffix in ('-latest.osm.pbf', '.osm.pbf', '-latest.pbf', '.pbf'):
+        if text.casefold().endswith(suffix):
+            return text[: -len(suffix)]
+    return text
+
+
+def normalize_path_alias(value: str) -> str:
+    text = str(value or '').strip().replace('\\', '/')
+    text = re.sub(r'/+', '/', text)
+    return text.strip('/').casefold()
+
+
+def build_path_aliases_for_row(row: Any) -> set[str]:
+    aliases: set[str] = set()
+    file_name = str(getattr(row, 'file_name', '') or '').strip()
+    source_name = infer_extract_source(file_name)
+    url = str(getattr(row, 'url', '') or '').strip()
+    if not url:
+        return aliases
+
+    parsed = urllib.parse.urlparse(url)
+    path = trim_extract_archive_suffix(parsed.path).lstrip('/')
+    if source_name == 'osmfr' and path.startswith('extracts/'):
+        path = path[len('extracts/') :]
+
+    normalized_path = normalize_path_alias(path)
+    if normalized_path:
+        aliases.add(normalized_path)
+
+    if source_name == 'geofabrik' and normalized_path:
+        parts = [part for part in normalized_path.split('/') if part]
+        for start in range(1, len(parts)):
+            suffix_alias = '/'.join(parts[start:])
+            if suffix_alias:
+                aliases.add(suffix_alias)
+
+    return aliases
+
+
+def _load_extract_index(source: Any) -> Any:
+    from quackosm.osm_extracts import OSM_EXTRACT_SOURCE_INDEX_FUNCTION  # type: ignore
+
+    loader = OSM_EXTRACT_SOURCE_INDEX_FUNCTION[source]
+    try:
+        return loader()
+    except requests.HTTPError as exc:
+        if not _is_quackosm_index_rate_limit_error(exc):
+            raise
+
+        print(
+            'QuackOSM precalculated index download was rate-limited for '
+            f'source={source.value}; retrying with local recalculation.',
+            file=sys.stderr,
+            flush=True,
+        )
+        return loader(force_recalculation=True)
+
+
+def build_extract_path_aliases(index: Any) -> dict[str, list[str]]:
+    matches: dict[str, list[str]] = {}
+
+    for row in index.itertuples(index=False):
+        file_name = str(getattr(row, 'file_name', '') or '').strip()
+        if not file_name:
+            continue
+        for alias in build_path_aliases_for_row(row):
+            matches.setdefault(alias, []).append(file_name)
+
+    return matches
+
+
+def get_extract_path_aliases(source: str) -> dict[str, list[str]]:
+    return _extract_index_bundle(normalize_extract_source(source))[1]
+
+
+def resolve_exact_extract_alias(query: str, source: str = 'any') -> dict[str, Any]:
+    normalized_source = normalize_extract_source(source)
+    normalized_query = normalize_path_alias(trim_extract_archive_suffix(str(query or '').strip()))
+    if not normalized_query:
+        return {
+            'candidate': None,
+            'errorCode': 'not_found',
+            'message': 'Empty extract query.',
+            'matchingExtractIds': [],
+        }
+
+    alias_matches = get_extract_path_aliases(normalized_source).get(normalized_query, [])
+    unique_matches = sorted(set(str(item or '').strip() for item in alias_matches if str(item or '').strip()))
+    if len(unique_matches) == 1:
+        index = get_extract_index(normalized_source)
+        extract = next(index[index['file_name'] == unique_matches[0]].itertuples(index=False))
+        return {
+            'candidate': serialize_extract(extract, match_kind='exact_alias', exact=True),
+            'errorCode': None,
+            'message': None,
+            'matchingExtractIds': [],
+        }
+    if len(unique_matches) > 1:
+        return {
+            'candidate': None,
+            'errorCode': 'multiple',
+            'message': (
+                f'Extract query "{str(query or "").strip()}" matches multiple canonical extracts. '
+                f'Select one manually.'
+            ),
+            'matchingExtractIds': unique_matches,
+        }
+    return {
+        'candidate': None,
+        'errorCode': 'not_found',
+        'message': None,
+        'matchingExtractIds': [],
+    }
+
+
+def _extract_index_cache_dir() -> Path:
+    return QUACKOSM_DATA_DIR / 'extract-index'
+
+
+def _extract_index_cache_paths(source_name: str) -> Tuple[Path, Path]:
+    cache_dir = _extract_index_cache_dir()
+    slug = source_name.casefold()
+    return cache_dir / f'{slug}.parquet', cache_dir / f'{slug}.json'
+
+
+def _extract_index_cache_ttl_seconds() -> float:
+    return max(0.0, float(os.getenv('EXTRACT_INDEX_CACHE_TTL_HOURS', '24') or '24')) * 3600.0
+
+
+def invalidate_extract_index_cache(source_name: str) -> None:
+    with _EXTRACT_INDEX_LOCK:
+        for path in _extract_index_cache_paths(source_name):
+            if path.exists():
+                path.unlink()
+        _get_extract_index_bundle.cache_clear()
+        _get_extract_search_index.cache_clear()
+
+
+def _read_extract_index_cache(source_name: str) -> Tuple[Any, dict[str, list[str]]] | None:
+    ttl_seconds = _extract_index_cache_ttl_seconds()
+    parquet_path, meta_path = _extract_index_cache_paths(source_name)
+    if ttl_seconds <= 0 or not meta_path.exists() or not parquet_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if (
+        meta.get('format') != EXTRACT_INDEX_CACHE_FORMAT
+        or meta.get('quackosmVersion') != quackosm_version()
+        or time.time() - float(meta.get('createdAt') or 0) > ttl_seconds
+    ):
+        return None
+    with connect_duckdb() as con:
+        index = con.execute(f'SELECT * FROM read_parquet({sql_string_literal(str(parquet_path))})').df()
+    return index, {str(alias): list(file_names) for alias, file_names in dict(meta.get('aliases') or {}).items()}
+
+
+def _write_extract_index_cache(source_name: str, index: Any, aliases: dict[str, list[str]]) -> None:
+    parquet_path, meta_path = _extract_index_cache_paths(source_name)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = f'.tmp-{os.getpid()}'
+    parquet_tmp = parquet_path.with_name(parquet_path.name + suffix)
+    meta_tmp = meta_path.with_name(meta_path.name + suffix)
+    with connect_duckdb() as con:
+        con.register('extract_index', index)
+        con.execute(f'COPY extract_index TO {sql_string_literal(str(parquet_tmp))} (FORMAT parquet, COMPRESSION zstd)')
+    meta_tmp.write_text(json.dumps({
+        'format': EXTRACT_INDEX_CACHE_FORMAT,
+        'quackosmVersion': quackosm_version(),
+        'source': source_name,
+        'createdAt': time.time(),
+        'rows': int(len(index)),
+        'aliases': aliases,
+    }, ensure_ascii=False), encoding='utf-8')
+    os.replace(parquet_tmp, parquet_path)
+    os.replace(meta_tmp, meta_path)
+
+
+def _build_extract_index(source_name: str) -> Any:
+    from quackosm.osm_extracts import OSM_EXTRACT_SOURCE_INDEX_FUNCTION, OsmExtractSource  # type: ignore
+
+    source_enum = OsmExtractSource(source_name)
+    if source_enum == OsmExtractSource.any:
+        index = pd.concat(
+            [
+                _load_extract_index(get_source_enum)
+                for get_source_enum in OSM_EXTRACT_SOURCE_INDEX_FUNCTION.keys()
+            ],
+            ignore_index=True,
+        )
+    else:
+        index = _load_extract_index(source_enum)
+
+    index = index.copy()
+    index['source_name'] = index['file_name'].map(infer_extract_source)
+    index['normalized_name'] = index['name'].map(normalize_search_text)
+    index['normalized_file_name'] = index['file_name'].map(normalize_search_text)
+    columns = [column for column in EXTRACT_INDEX_CACHE_COLUMNS if column in index.columns]
+    return pd.DataFrame(index[columns]).reset_index(drop=True)
+
+
+@lru_cache(maxsize=None)
+def _get_extract_index_bundle(source_name: str) -> Tuple[Any, dict[str, list[str]]]:
+    cached = _read_extract_index_cache(source_name)
+    if cached is not None:
+        return cached
+
+    index = _build_extract_index(source_name)
+    aliases = build_extract_path_aliases(index)
+    if _extract_index_cache_ttl_seconds() > 0:
+        try:
+            _write_extract_index_cache(source_name, index, aliases)
+        except (OSError, duckdb.Error) as exc:
+            print(f'Extract index cache write failed ({exc}); continuing without cache.', file=sys.stderr, flush=True)
+    return index, aliases
+
+
+def _extract_index_bundle(source_name: str) -> Tuple[Any, dict[str, list[str]]]:
+    with _EXTRACT_INDEX_LOCK:
+        return _get_extract_index_bundle(source_name)
+
+
+def get_extract_index(source: str) -> Any:
+    return _extract_index_bundle(normalize_extract_source(source))[0]
+
+
+def resolve_exact_extract(query: str, source: str = 'any') -> dict[str, Any]:
+    normalized_source = normalize_extract_source(source)
+    raw_query = str(query or '').strip()
+    if raw_query:
+        get_extract_index(normalized_source)
+    if '/' in raw_query or '\\' in raw_query:
+        alias_result = resolve_exact_extract_alias(raw_query, normalized_source)
+        if alias_result.get('candidate') or alias_result.get('errorCode') == 'multiple':
+            return alias_result
+
+    from quackosm.osm_extracts import (  # type: ignore
+        OsmExtractMultipleMatchesError,
+        OsmExtractZeroMatchesError,
+        get_extract_by_query,
+    )
+
+    try:
+        extract = get_extract_by_query(query, source=normalized_source)
+        return {
+            'candidate': serialize_extract(extract, match_kind='exact', exact=True),
+            'errorCode': None,
+            'message': None,
+            'matchingExtractIds': [],
+        }
+    except OsmExtractMultipleMatchesError as exc:
+        return {
+            'candidate': None,
+            'errorCode': 'multiple',
+            'message': str(exc),
+            'matchingExtractIds': list(getattr(exc, 'matching_full_names', []) or []),
+        }
+    except OsmExtractZeroMatchesError as exc:
+        return {
+            'candidate': None,
+            'errorCode': 'not_found',
+            'message': str(exc),
+            'matchingExtractIds': list(getattr(exc, 'matching_full_names', []) or []),
+        }
+
+
+def refresh_extract_index(source: str = 'any') -> dict[str, Any]:
+    source_name = normalize_extract_source(source)
+    invalidate_extract_index_cache(source_name)
+    index, aliases = _extract_index_bundle(source_name)
+    return {
+        'extractSource': source_name,
+        'rows': int(len(index)),
+        'aliases': len(aliases),
+    }
+
+
+EXTRACT_FUZZY_MIN_RATIO = 0.72
+EXTRACT_FUZZY_MAX_SCORE = 420
+
+
+def _search_trigrams(text: str) -> set[str]:
+    return {text[offset:offset + 3] for offset in range(len(text) - 2)}
+
+
+def build_extract_search_index(index: Any) -> dict[str, Any]:
+    entries: list[dict[str, Any]] = []
+    token_postings: dict[str, list[int]] = {}
+    trigram_postings: dict[str, set[int]] = {}
+    positions_by_id: dict[str, list[int]] = {}
+
+    for position, row in enumerate(index.itertuples(index=False)):
+        normalized_name = str(getattr(row, 'normalized_name', '') or '')
+        normalized_file_name = str(getattr(row, 'normalized_file_name', '') or '')
+        extract_id = str(getattr(row, 'file_name', '') or '').strip()
+        name_tokens = frozenset(tokenize_search_text(normalized_name))
+        file_tokens = frozenset(tokenize_search_text(normalized_file_name))
+        entries.append({
+            'row': row,
+            'extract_id': extract_id,
+            'normalized_name': normalized_name,
+            'normalized_file_name': normalized_file_name,
+            'name_tokens': name_tokens,
+            'file_tokens': file_tokens,
+            'name_chars': Counter(normalized_name),
+            'file_chars': Counter(normalized_file_name),
+        })
+        for token in name_tokens | file_tokens:
+            token_postings.setdefault(token, []).append(position)
+        for trigram in _search_trigrams(normalized_name) | _search_trigrams(normalized_file_name):
+            trigram_postings.setdefault(trigram, set()).add(position)
+        if extract_id:
+            positions_by_id.setdefault(extract_id, []).append(position)
+
+    return {
+        'entries': entries,
+        'tokens': token_postings,
+        'trigrams': trigram_postings,
+        'duplicates': {
+            extract_id: positions
+            for extract_id, positions in positions_by_id.items()
+            if len(positions) > 1
+        },
+    }
+
+
+@lru_cache(maxsize=None)
+def _get_extract_search_index(source_name: str) -> dict[str, Any]:
+    return build_extract_search_index(_get_extract_index_bundle(source_name)[0])
+
+
+def get_extract_search_index(source: str) -> dict[str, Any]:
+    with _EXTRACT_INDEX_LOCK:
+        return _get_extract_search_index(normalize_extract_source(source))
+
+
+def _search_ratio(query: str, query_chars: Counter, text: str, text_chars: Counter, min_ratio: float) -> float:
+    if not text:
+        return 0.0
+    length = len(query) + len(text)
+    if 2.0 * min(len(query), len(text)) / length < min_ratio:
+        return 0.0
+    if min_ratio > 0:
+        common = sum(min(count, text_chars[char]) for char, count in query_chars.items())
+        if 2.0 * common / length < min_ratio:
+            return 0.0
+    return difflib.SequenceMatcher(None, query, text).ratio()
+
+
+def _score_extract_entry(
+    entry: dict[str, Any],
+    normalized_query: str,
+    query_chars: Counter,
+    query_tokens: set[str],
+) -> Tuple[int, str, bool]:
+    normalized_name = entry['normalized_name']
+    normalized_file_name = entry['normalized_file_name']
+    if normalized_query == normalized_file_name:
+        return 1000, 'exact_file_name', True
+    if normalized_query == normalized_name:
+        return 950, 'exact_name', True
+    if normalized_query in normalized_file_name:
+        return 820, 'file_name_contains', False
+    if normalized_query in normalized_name:
+        return 780, 'name_contains', False
+
+    name_tokens = entry['name_tokens']
+    file_tokens = entry['file_tokens']
+    overlap = len(query_tokens & name_tokens) + len(query_tokens & file_tokens)
+    if query_tokens and (query_tokens <= name_tokens or query_tokens <= file_tokens):
+        return 720 + overlap, 'token_subset', False
+
+    min_ratio = 0.0 if overlap > 0 else EXTRACT_FUZZY_MIN_RATIO
+    ratio = max(
+        _search_ratio(normalized_query, query_chars, normalized_name, entry['name_chars'], min_ratio),
+        _search_ratio(normalized_query, query_chars, normalized_file_name, entry['file_chars'], min_ratio),
+    )
+    if overlap > 0:
+        return 520 + (overlap * 20) + int(ratio * 100), 'token_overlap', False
+    if ratio >= EXTRACT_FUZZY_MIN_RATIO:
+        return 320 + int(ratio * 100), 'fuzzy', False
+    return 0, 'fuzzy', False
+
+
+def _extract_search_candidates(search_index: dict[str, Any], normalized_query: str, query_tokens: set[str]) -> set[int]:
+    positions: set[int] = set()
+    for token in query_tokens:
+        positions.update(search_index['tokens'].get(token, ()))
+
+    trigrams = _search_trigrams(normalized_query)
+    if trigrams:
+        postings = sorted((search_index['trigrams'].get(trigram, set()) for trigram in trigrams), key=len)
+        positions.update(postings[0].intersection(*postings[1:]))
+    else:
+        positions.update(
+            position
+            for position, entry in enumerate(search_index['entries'])
+            if normalized_query in entry['normalized_name'] or normalized_query in entry['normalized_file_name']
+        )
+    return positions
+
+
+def _extract_candidate_item(row: Any, extract_id: str, score: int, match_kind: str, exact: bool) -> dict[str, Any]:
+    return {
+        'extractSource': infer_extract_source(extract_id),
+        'extractId': extract_id,
+        'extractLabel': str(getattr(row, 'name', '') or extract_id).strip() or extract_id,
+        'downloadUrl': str(getattr(row, 'url', '') or '').strip() or None,
+        'matchKind': match_kind,
+        'exact': exact,
+        'score': score,
+        'area': float(getattr(row, 'area', 0.0) or 0.0),
+    }
+
+
+def _format_extract_candidates(query: str, ranked: list[dict[str, Any]], limit: int) -> dict[str, Any]:
+    ranked.sort(key=lambda item: (-int(item['score']), float(item['area']), str(item['extractId'])))
+    items = [
+        {
+            'extractSource': item['extractSource'],
+            'extractId': item['extractId'],
+            'extractLabel': item['extractLabel'],
+            'downloadUrl': item['downloadUrl'],
+            'matchKind': item['matchKind'],
+            'exact': item['exact'],
+        }
+        for item in ranked[:limit]
+    ]
+
+    return {
+        'query': str(query or '').strip(),
+        'items': items,
+    }
+
+
+def search_extract_candidates(query: str, source: str = 'any', limit: int = 12) -> dict[str, Any]:
+    normalized_source = normalize_extract_source(source)
+    normalized_query = normalize_search_text(query)
+    query_tokens = set(tokenize_search_text(query))
+    if not normalized_query:
+        return {
+            'query': '',
+            'items': [],
+        }
+
+    limit = max(1, min(50, int(limit or 12)))
+    search_index = get_extract_search_index(normalized_source)
+    entries = search_index['entries']
+    duplicates = search_index['duplicates']
+    query_chars = Counter(normalized_query)
+    scores: dict[int, Tuple[int, str, bool]] = {}
+
+    def score_positions(positions: Any) -> None:
+        for position in positions:
+            if position not in scores:
+                scores[position] = _score_extract_entry(entries[position], normalized_query, query_chars, query_tokens)
+
+    candidates = _extract_search_candidates(search_index, normalized_query, query_tokens)
+    score_positions(candidates)
+    for position in candidates:
+        score_positions(duplicates.get(entries[position]['extract_id'], ()))
+
+    matched_ids = {
+        entries[position]['extract_id']
+        for position, scored in scores.items()
+        if scored[0] > EXTRACT_FUZZY_MAX_SCORE
+    }
+    matched_ids.discard('')
+    if len(matched_ids) < limit:
+        score_positions(range(len(entries)))
+
+    ranked: list[dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    for position in sorted(scores):
+        score, match_kind, exact = scores[position]
+        extract_id = entries[position]['extract_id']
+        if score <= 0 or not extract_id or extract_id in seen_ids:
+            continue
+        seen_ids.add(extract_id)
+        ranked.append(_extract_candidate_item(entries[position]['row'], extract_id, score, match_kind, exact))
+
+    return _format_extract_candidates(query, ranked, limit)
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import gzip
+import time
+from pathlib import Path
+from typing import Any, Tuple
+from xml.etree import ElementTree
+
+from .common import lazy_module, sql_string_literal
+from .conversion_cache import break_hardlink
+from .exporters import DELTA_STREAMS, export_copy_select_sql, summarize_export_rows, write_delta_streams
+from .phases import recorded_phase
+from .resources import connect_duckdb, load_duckdb_extensions
+
+duckdb = lazy_module('duckdb')
+
+
+OSC_ACTIONS = ('create', 'modify', 'delete')
+_OSM_BUILDING_TAGS_SQL = "(map_contains(tags, 'building') OR map_contains(tags, 'building:part'))"
+_OSM_BUILDING_RELATION_SQL = f"(tags['type'] = 'multipolygon' AND {_OSM_BUILDING_TAGS_SQL})"
+
+
+def read_osc_changes(osc_path: Path) -> dict[str, dict[int, dict[str, Any]]]:
+    changes: dict[str, dict[int, dict[str, Any]]] = {'node': {}, 'way': {}, 'relation': {}}
+    action: str | None = None
+    opener = gzip.open if osc_path.suffix == '.gz' else open
+    with opener(osc_path, 'rb') as handle:
+        for event, elem in ElementTree.iterparse(handle, events=('start', 'end')):
+            if elem.tag in OSC_ACTIONS:
+                if event == 'start':
+                    action = elem.tag
+                else:
+                    action = None
+                    elem.clear()
+                continue
+            if event != 'end' or elem.tag not in changes or action is None:
+                continue
+
+            osm_id = int(elem.get('id'))
+            version = int(elem.get('version') or 0)
+            previous = changes[elem.tag].get(osm_id)
+            if previous is None or version >= previous['version']:
+                entry: dict[str, Any] = {
+                    'action': action,
+                    'version': version,
+                    'tags': {tag.get('k'): tag.get('v') for tag in elem.iter('tag')},
+                }
+                if elem.tag == 'node':
+                    entry['lon'] = float(elem.get('lon')) if elem.get('lon') else None
+                    entry['lat'] = float(elem.get('lat')) if elem.get('lat') else None
+                elif elem.tag == 'way':
+                    entry['refs'] = [int(nd.get('ref')) for nd in elem.iter('nd')]
+                else:
+                    members = list(elem.iter('member'))
+                    entry['member_types'] = [str(member.get('type')) for member in members]
+                    entry['member_ids'] = [int(member.get('ref')) for member in members]
+                    entry['member_roles'] = [str(member.get('role') or '') for member in members]
+                changes[elem.tag][osm_id] = entry
+            elem.clear()
+    return changes
+
+
+def ensure_osm_store_schema(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute('CREATE TABLE IF NOT EXISTS osm_store_nodes (id BIGINT, lon DOUBLE, lat DOUBLE)')
+    con.execute('CREATE TABLE IF NOT EXISTS osm_store_ways (id BIGINT, refs BIGINT[], tags MAP(VARCHAR, VARCHAR))')
+    con.execute('''
+CREATE TABLE IF NOT EXISTS osm_store_relations (
+  id BIGINT,
+  member_types VARCHAR[],
+  member_ids BIGINT[],
+  member_roles VARCHAR[],
+  tags MAP(VARCHAR, VARCHAR)
+)
+''')
+
+
+def _osm_store_exists(con: duckdb.DuckDBPyConnection) -> bool:
+    row = con.execute('''
+SELECT COUNT(*)
+FROM information_schema.tables
+WHERE table_name IN ('osm_store_nodes', 'osm_store_ways', 'osm_store_relations')
+''').fetchone()
+    return bool(row) and int(row[0] or 0) == 3
+
+
+def seed_osm_store_from_pbf(con: duckdb.DuckDBPyConnection, pbf_path: Path) -> None:
+    started_at = time.time()
+    source_sql = f'ST_ReadOSM({sql_string_literal(str(pbf_path))})'
+    con.execute(f'''
+CREATE OR REPLACE TABLE osm_store_relations AS
+SELECT id, CAST(ref_types AS VARCHAR[]) AS member_types, refs AS member_ids, ref_roles AS member_roles, tags
+FROM {source_sql}
+WHERE kind = 'relation'
+  AND {_OSM_BUILDING_RELATION_SQL}
+''')
+    con.execute(f'''
+CREATE OR REPLACE TABLE osm_store_ways AS
+SELECT id, refs, tags
+FROM {source_sql}
+WHERE kind = 'way'
+  AND (
+    {_OSM_BUILDING_TAGS_SQL}
+    OR id IN (
+      SELECT member_id
+      FROM (SELECT unnest(member_ids) AS member_id, unnest(member_types) AS member_type FROM osm_store_relations)
+      WHERE member_type = 'way'
+    )
+  )
+''')
+    con.execute(f'''
+CREATE OR REPLACE TABLE osm_store_nodes AS
+SELECT id, lon, lat
+FROM {source_sql}
+WHERE kind = 'node'
+  AND id IN (SELECT unnest(refs) FROM osm_store_ways)
+''')
+    counts = [
+        int(con.execute(f'SELECT COUNT(*) FROM osm_store_{name}').fetchone()[0] or 0)
+        for name in ('nodes', 'ways', 'relations')
+    ]
+    print(
+        f'OSM store seeded from {pbf_path}: nodes={counts[0]}, ways={counts[1]}, relations={counts[2]}, '
+        f'elapsed={time.time() - started_at:.1f}s',
+        flush=True,
+    )
+
+
+def _load_osc_changes(con: duckdb.DuckDBPyConnection, changes: dict[str, dict[int, dict[str, Any]]]) -> None:
+    nodes = changes['node']
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_nodes AS
+SELECT
+  unnest(?::BIGINT[]) AS id,
+  unnest(?::VARCHAR[]) AS action,
+  unnest(?::DOUBLE[]) AS lon,
+  unnest(?::DOUBLE[]) AS lat
+''', [
+        list(nodes),
+        [entry['action'] for entry in nodes.values()],
+        [entry['lon'] for entry in nodes.values()],
+        [entry['lat'] for entry in nodes.values()],
+    ])
+    ways = changes['way']
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_ways AS
+SELECT id, action, refs, map(tag_keys, tag_values) AS tags
+FROM (
+  SELECT
+    unnest(?::BIGINT[]) AS id,
+    unnest(?::VARCHAR[]) AS action,
+    unnest(?::BIGINT[][]) AS refs,
+    unnest(?::VARCHAR[][]) AS tag_keys,
+    unnest(?::VARCHAR[][]) AS tag_values
+)
+''', [
+        list(ways),
+        [entry['action'] for entry in ways.values()],
+        [entry['refs'] for entry in ways.values()],
+        [list(entry['tags'].keys()) for entry in ways.values()],
+        [list(entry['tags'].values()) for entry in ways.values()],
+    ])
+    relations = changes['relation']
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_relations AS
+SELECT id, action, member_types, member_ids, member_roles, map(tag_keys, tag_values) AS tags
+FROM (
+  SELECT
+    unnest(?::BIGINT[]) AS id,
+    unnest(?::VARCHAR[]) AS action,
+    unnest(?::VARCHAR[][]) AS member_types,
+    unnest(?::BIGINT[][]) AS member_ids,
+    unnest(?::VARCHAR[][]) AS member_roles,
+    unnest(?::VARCHAR[][]) AS tag_keys,
+    unnest(?::VARCHAR[][]) AS tag_values
+)
+''', [
+        list(relations),
+        [entry['action'] for entry in relations.values()],
+        [entry['member_types'] for entry in relations.values()],
+        [entry['member_ids'] for entry in relations.values()],
+        [entry['member_roles'] for entry in relations.values()],
+        [list(entry['tags'].keys()) for entry in relations.values()],
+        [list(entry['tags'].values()) for entry in relations.values()],
+    ])
+
+
+def _apply_osc_to_store(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_nodes_kept AS
+SELECT id, lon, lat
+FROM osc_nodes
+WHERE action <> 'delete'
+  AND (
+    id IN (SELECT id FROM osm_store_nodes)
+    OR id IN (SELECT unnest(refs) FROM osc_ways WHERE action <> 'delete')
+  )
+''')
+    con.execute('DELETE FROM osm_store_relations WHERE id IN (SELECT id FROM osc_relations)')
+    con.execute(f'''
+INSERT INTO osm_store_relations
+SELECT id, member_types, member_ids, member_roles, tags
+FROM osc_relations
+WHERE action <> 'delete'
+  AND {_OSM_BUILDING_RELATION_SQL}
+''')
+    con.execute('DELETE FROM osm_store_ways WHERE id IN (SELECT id FROM osc_ways)')
+    con.execute(f'''
+INSERT INTO osm_store_ways
+SELECT id, refs, tags
+FROM osc_ways
+WHERE action <> 'delete'
+  AND (
+    {_OSM_BUILDING_TAGS_SQL}
+    OR id IN (
+      SELECT member_id
+      FROM (SELECT unnest(member_ids) AS member_id, unnest(member_types) AS member_type FROM osm_store_relations)
+      WHERE member_type = 'way'
+    )
+  )
+''')
+    con.execute('DELETE FROM osm_store_nodes WHERE id IN (SELECT id FROM osc_nodes)')
+    con.execute('INSERT INTO osm_store_nodes SELECT id, lon, lat FROM osc_nodes_kept')
+
+
+def _collect_osc_affected_features(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_affected_ways AS
+SELECT id FROM osc_ways
+UNION
+SELECT id
+FROM (SELECT id, unnest(refs) AS ref FROM osm_store_ways)
+WHERE ref IN (SELECT id FROM osc_nodes)
+''')
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_affected_relations AS
+SELECT id FROM osc_relations
+UNION
+SELECT id
+FROM (
+  SELECT id, unnest(member_ids) AS member_id, unnest(member_types) AS member_type
+  FROM osm_store_relations
+)
+WHERE member_type = 'way'
+  AND member_id IN (SELECT id FROM osc_affected_ways)
+''')
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_affected AS
+SELECT 'way/' || id AS feature_id FROM osc_affected_ways
+UNION
+SELECT 'relation/' || id AS feature_id FROM osc_affected_relations
+''')
+
+
+def _rebuild_osc_affected_geometries(con: duckdb.DuckDBPyConnection) -> int:
+    con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_way_lines AS
+WITH targets AS (
+  SELECT id, refs
+  FROM osm_store_ways
+  WHERE id IN (SELECT id FROM osc_affected_ways)
+     OR id IN (
+       SELECT member_id
+       FROM (
+         SELECT unnest(member_ids) AS member_id, unnest(member_types) AS member_type
+         FROM osm_store_relations
+         WHERE id IN (SELECT id FROM osc_affected_relations)
+       )
+       WHERE member_type = 'way'
+     )
+), way_points AS (
+  SELECT id, unnest(refs) AS ref, generate_subscripts(refs, 1) AS pos
+  FROM targets
+)
+SELECT
+  wp.id,
+  COUNT(*) AS ref_count,
+  COUNT(n.id) AS located_count,
+  ST_MakeLine(list(ST_Point(n.lon, n.lat) ORDER BY wp.pos) FILTER (WHERE n.id IS NOT NULL)) AS line
+FROM way_points wp
+LEFT JOIN osm_store_nodes n ON n.id = wp.ref
+GROUP BY wp.id
+''')
+    con.execute('DELETE FROM quackosm_raw WHERE feature_id IN (SELECT feature_id FROM osc_affected)')
+    con.execute(f'''
+INSERT INTO quackosm_raw (feature_id, tags, geometry)
+SELECT 'way/' || w.id, w.tags, ST_MakePolygon(l.line)
+FROM osm_store_ways w
+JOIN osc_way_lines l ON l.id = w.id
+WHERE w.id IN (SELECT id FROM osc_affected_ways)
+  AND {_OSM_BUILDING_TAGS_SQL.replace('tags', 'w.tags')}
+  AND l.located_count = l.ref_count
+  AND len(w.refs) >= 4
+  AND w.refs[1] = w.refs[-1]
+''')
+    con.execute('''
+INSERT INTO quackosm_raw (feature_id, tags, geometry)
+SELECT 'relation/' || r.id, r.tags, ST_BuildArea(ST_Collect(m.lines))
+FROM osm_store_relations r
+JOIN (
+  SELECT
+    members.id,
+    COUNT(*) AS member_count,
+    COUNT(l.id) FILTER (WHERE l.located_count = l.ref_count) AS located_count,
+    list(l.line) FILTER (WHERE l.located_count = l.ref_count) AS lines
+  FROM (
+    SELECT id, unnest(member_ids) AS member_id
+    FROM osm_store_relations
+    WHERE id IN (SELECT id FROM osc_affected_relations)
+  ) members
+  JOIN (
+    SELECT id, unnest(member_ids) AS member_id, unnest(member_types) AS member_type
+    FROM osm_store_relations
+  ) typed ON typed.id = members.id AND typed.member_id = members.member_id AND typed.member_type = 'way'
+  LEFT JOIN osc_way_lines l ON l.id = members.member_id
+  GROUP BY members.id
+) m ON m.id = r.id
+WHERE m.member_count = m.located_count
+''')
+    row = con.execute(f'''
+SELECT
+  (SELECT COUNT(*) FROM osm_store_ways WHERE id IN (SELECT id FROM osc_affected_ways) AND {_OSM_BUILDING_TAGS_SQL})
+  + (SELECT COUNT(*) FROM osm_store_relations WHERE id IN (SELECT id FROM osc_affected_relations))
+  - (SELECT COUNT(*) FROM quackosm_raw WHERE feature_id IN (SELECT feature_id FROM osc_affected))
+''').fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+@recorded_phase(
+    'osc-apply',
+    rows=lambda result: result[1],
+    outputs=lambda arguments: [
+        arguments['duckdb_path'],
+        *(
+            arguments['delta_dir'] / f'{stream}.ndjson' for stream in DELTA_STREAMS
+            if arguments['delta_dir'] is not None
+        ),
+    ],
+)
+def apply_osc_to_region_duckdb(
+    duckdb_path: Path,
+    osc_path: Path,
+    pbf_path: Path | None = None,
+    delta_dir: Path | None = None,
+    geometry_mode: str = 'wkb_hex',
+    order: str = 'none',
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int], dict[str, int] | None]:
+    started_at = time.time()
+    changes = read_osc_changes(osc_path)
+    print(
+        f'OSC parsed: nodes={len(changes["node"])}, ways={len(changes["way"])}, '
+        f'relations={len(changes["relation"])}, file={osc_path}',
+        flush=True,
+    )
+    new_region = not duckdb_path.exists()
+    break_hardlink(duckdb_path)
+
+    with connect_duckdb(duckdb_path) as con:
+        load_duckdb_extensions(con)
+        if new_region:
+            con.execute('CREATE TABLE quackosm_raw (feature_id VARCHAR, tags MAP(VARCHAR, VARCHAR), geometry GEOMETRY)')
+            ensure_osm_store_schema(con)
+        elif not _osm_store_exists(con):
+            if pbf_path is None:
+                raise ValueError(
+                    f'{duckdb_path} has no OSM store yet; pass --pbf with the extract it was built from to seed it'
+                )
+            seed_osm_store_from_pbf(con, pbf_path)
+
+        _load_osc_changes(con, changes)
+        con.execute('BEGIN TRANSACTION')
+        try:
+            _apply_osc_to_store(con)
+            _collect_osc_affected_features(con)
+            con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_raw_before AS
+SELECT * FROM quackosm_raw WHERE feature_id IN (SELECT feature_id FROM osc_affected)
+''')
+            skipped = _rebuild_osc_affected_geometries(con)
+            con.execute('''
+CREATE OR REPLACE TEMP TABLE osc_raw_after AS
+SELECT * FROM quackosm_raw WHERE feature_id IN (SELECT feature_id FROM osc_affected)
+''')
+            con.execute('COMMIT')
+        except Exception:
+            con.execute('ROLLBACK')
+            raise
+
+        affected = int(con.execute('SELECT COUNT(*) FROM osc_affected').fetchone()[0] or 0)
+        if skipped > 0:
+            print(f'OSC apply: skipped {skipped} features with nodes or member ways missing from the store', flush=True)
+
+        delta_counts: dict[str, int] | None = None
+        if delta_dir is not None:
+            con.execute(
+                'CREATE OR REPLACE TEMP TABLE osc_keys_before AS '
+                f'{export_copy_select_sql(0, "snapshot", source_table="osc_raw_before")}'
+            )
+            con.execute(
+                'CREATE OR REPLACE TEMP TABLE osc_keys_after AS '
+                f'{export_copy_select_sql(0, "snapshot", source_table="osc_raw_after")}'
+            )
+            delta_counts = write_delta_streams(
+                con,
+                'osc_keys_after',
+                'osc_keys_before',
+                delta_dir,
+                geometry_mode,
+                order,
+                source_table='osc_raw_after',
+            )
+        count, bounds, feature_kind_counts = summarize_export_rows(con, 0, source_table='osc_raw_after')
+
+    print(
+        f'OSC apply done: affected={affected}, rebuilt={count}, '
+        + (
+            f"added={delta_counts['added']}, changed={delta_counts['changed']}, deleted={delta_counts['deleted']}, "
+            if delta_counts is not None else ''
+        )
+        + f'elapsed={time.time() - started_at:.1f}s',
+        flush=True,
+    )
+    return affected, count, bounds, feature_kind_counts, delta_counts
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+IMPORT_PHASES = ('resolve', 'convert', 'export', 'sqlite-apply', 'cleanup', 'rtree', 'osc-apply')
+_IMPORT_EVENTS: dict[str, Any] = {
+    'stream': None,
+    'metrics_path': None,
+    'run': None,
+    'records': [],
+    'active': [],
+}
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+def _file_stats(paths: list[Path | None]) -> dict[Path, Tuple[int, int]]:
+    stats = {}
+    for path in paths:
+        if path is not None and path.is_file():
+            stat = path.stat()
+            stats[path] = (stat.st_ino, stat.st_size)
+    return stats
+
+
+def _bytes_written(before: dict[Path, Tuple[int, int]], after: dict[Path, Tuple[int, int]]) -> int:
+    total = 0
+    for path, (inode, size) in after.items():
+        previous = before.get(path)
+        total += max(0, size - previous[1]) if previous is not None and previous[0] == inode else size
+    return total
+
+
+def emit_import_event(event: dict[str, Any]) -> None:
+    stream = _IMPORT_EVENTS['stream']
+    if stream is None:
+        return
+    stream.write(json.dumps(event, ensure_ascii=False))
+    stream.write('\n')
+    stream.flush()
+
+
+@contextmanager
+def import_phase(phase: str, **labels: Any) -> Any:
+    if phase not in IMPORT_PHASES:
+        raise ValueError(f'Unknown import phase: {phase}')
+    record: dict[str, Any] = {'event': 'phase', 'phase': phase, **labels, 'rows': None, 'bytes': None}
+    _IMPORT_EVENTS['active'].append(record)
+    started_at = time.perf_counter()
+    cpu_started_at = _cpu_seconds()
+    status = 'error'
+    try:
+        yield record
+        status = 'ok'
+    finally:
+        _IMPORT_EVENTS['active'].remove(record)
+        duration = time.perf_counter() - started_at
+        rows = record['rows']
+        record.update({
+            'status': status,
+            'durationSec': round(duration, 3),
+            'cpuSec': round(_cpu_seconds() - cpu_started_at, 3),
+            'rowsPerSec': round(rows / duration, 1) if rows is not None and duration > 0 else None,
+            'peakRssBytes': _peak_rss_bytes(),
+            'finishedAt': datetime.now(timezone.utc).isoformat(),
+        })
+        record_import_phases([record])
+
+
+def current_import_phase() -> str | None:
+    return _IMPORT_EVENTS['active'][-1]['phase'] if _IMPORT_EVENTS['active'] else None
+
+
+def annotate_import_phase(**labels: Any) -> None:
+    if _IMPORT_EVENTS['active']:
+        _IMPORT_EVENTS['active'][-1].update(labels)
+
+
+def record_import_phases(records: list[dict[str, Any]]) -> None:
+    for record in records:
+        _IMPORT_EVENTS['records'].append(record)
+        emit_import_event(record)
+
+
+def import_phase_records() -> list[dict[str, Any]]:
+    return list(_IMPORT_EVENTS['records'])
+
+
+def drain_import_phase_records() -> list[dict[str, Any]]:
+    records = _IMPORT_EVENTS['records']
+    _IMPORT_EVENTS['records'] = []
+    return records
+
+
+def recorded_phase(
+    phase: str,
+    rows: Callable[[Any], int | None],
+    outputs: Callable[[dict[str, Any]], list[Path | None]] | None = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            stats_before = _file_stats(outputs(bound.arguments)) if outputs is not None else {}
+            with import_phase(phase) as record:
+                result = func(*args, **kwargs)
+                record['rows'] = rows(result)
+                if outputs is not None and record['bytes'] is None:
+                    record['bytes'] = _bytes_written(stats_before, _file_stats(outputs(bound.arguments)))
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def start_import_run(mode: str, events_target: str | None, metrics_path: str | None) -> None:
+    if events_target:
+        if events_target.startswith('fd:'):
+            stream = os.fdopen(int(events_target[3:]), 'w', encoding='utf-8')
+        else:
+            events_path = Path(events_target).expanduser().resolve()
+            events_path.parent.mkdir(parents=True, exist_ok=True)
+            stream = events_path.open('w', encoding='utf-8')
+        _IMPORT_EVENTS['stream'] = stream
+    _IMPORT_EVENTS['metrics_path'] = Path(metrics_path).expanduser().resolve() if metrics_path else None
+    _IMPORT_EVENTS['records'] = []
+    _IMPORT_EVENTS['run'] = {
+        'mode': mode,
+        'startedAt': time.time(),
+        'perfStartedAt': time.perf_counter(),
+        'cpuStartedAt': _cpu_seconds(),
+    }
+    emit_import_event({
+        'event': 'run_start',
+        'mode': mode,
+        'pid': os.getpid(),
+        'startedAt': datetime.now(timezone.utc).isoformat(),
+    })
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_import_metrics(run: dict[str, Any], records: list[dict[str, Any]]) -> str:
+    phases: dict[str, dict[str, float]] = {}
+    for record in records:
+        totals = phases.setdefault(record['phase'], {'count': 0, 'duration': 0.0, 'rows': 0, 'bytes': 0})
+        totals['count'] += 1
+        totals['duration'] = round(totals['duration'] + float(record.get('durationSec') or 0.0), 3)
+        totals['rows'] += int(record.get('rows') or 0)
+        totals['bytes'] += int(record.get('bytes') or 0)
+
+    mode_label = f'mode="{_prometheus_label(run["mode"])}"'
+    lines: list[str] = []
+
+    def metric(name: str, help_text: str, samples: list[Tuple[str, float]]) -> None:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            lines.append(f'{name}{{{labels}}} {value!r}')
+
+    def phase_samples(key: str) -> list[Tuple[str, float]]:
+        return [
+            (f'{mode_label},phase="{_prometheus_label(phase)}"', value[key])
+            for phase, value in sorted(phases.items())
+        ]
+
+    metric('archimap_import_last_run_timestamp_seconds', 'Unix time the last importer run finished', [(mode_label, run['finishedAt'])])
+    metric('archimap_import_last_run_success', 'Whether the last importer run succeeded', [(mode_label, 1 if run['status'] == 'ok' else 0)])
+    metric('archimap_import_run_duration_seconds', 'Wall-clock duration of the last importer run', [(mode_label, run['durationSec'])])
+    metric('archimap_import_rows_processed', 'Rows processed by the last importer run', [(mode_label, run['processed'])])
+    metric('archimap_import_rows_imported', 'Rows imported or exported by the last importer run', [(mode_label, run['imported'])])
+    metric('archimap_import_rows_deleted', 'Stale rows deleted by the last importer run', [(mode_label, run['deleted'])])
+    if run.get('peakRssBytes') is not None:
+        metric('archimap_import_peak_rss_bytes', 'Peak resident set size of the last importer run', [(mode_label, run['peakRssBytes'])])
+    metric('archimap_import_phase_duration_seconds', 'Time spent per phase in the last importer run', phase_samples('duration'))
+    metric('archimap_import_phase_rows', 'Rows handled per phase in the last importer run', phase_samples('rows'))
+    metric('archimap_import_phase_bytes_written', 'Bytes written per phase in the last importer run', phase_samples('bytes'))
+    metric('archimap_import_phase_executions', 'Phase executions in the last importer run', phase_samples('count'))
+    return '\n'.join(lines) + '\n'
+
+
+def finish_import_run(status: str, processed: int = 0, imported: int = 0, deleted: int = 0) -> dict[str, Any] | None:
+    run = _IMPORT_EVENTS['run']
+    if run is None:
+        return None
+    _IMPORT_EVENTS['run'] = None
+    run.update({
+        'status': status,
+        'finishedAt': time.time(),
+        'durationSec': round(time.perf_counter() - run['perfStartedAt'], 3),
+        'cpuSec': round(_cpu_seconds() - run['cpuStartedAt'], 3),
+        'processed': int(processed),
+        'imported': int(imported),
+        'deleted': int(deleted),
+        'peakRssBytes': _peak_rss_bytes(),
+    })
+    emit_import_event({
+        'event': 'run_end',
+        'mode': run['mode'],
+        'status': status,
+        'durationSec': run['durationSec'],
+        'processed': run['processed'],
+        'imported': run['imported'],
+        'deleted': run['deleted'],
+        'rowsPerSec': round(run['imported'] / run['durationSec'], 1) if run['durationSec'] > 0 else None,
+        'peakRssBytes': run['peakRssBytes'],
+    })
+
+    metrics_path = _IMPORT_EVENTS['metrics_path']
+    if metrics_path is not None:
+        metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = metrics_path.with_name(f'{metrics_path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(render_import_metrics(run, _IMPORT_EVENTS['records']), encoding='utf-8')
+        os.replace(tmp_path, metrics_path)
+
+    stream = _IMPORT_EVENTS['stream']
+    if stream is not None:
+        _IMPORT_EVENTS['stream'] = None
+        stream.close()
+    return run
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Tuple
+
+from .common import sql_string_literal
+from .phases import current_import_phase
+
+
+_IMPORT_PROFILE: dict[str, Any] = {
+    'dir': None,
+    'profiler': None,
+    'prefix': 'main',
+    'queries': 0,
+}
+PROFILE_REPORT_QUERIES = 10
+PROFILE_REPORT_FUNCTIONS = 25
+
+
+def start_import_profile(profile_dir: Path, prefix: str = 'main') -> None:
+    import cProfile
+
+    (profile_dir / 'duckdb').mkdir(parents=True, exist_ok=True)
+    _IMPORT_PROFILE.update({'dir': profile_dir, 'prefix': prefix, 'queries': 0})
+    profiler = cProfile.Profile()
+    _IMPORT_PROFILE['profiler'] = profiler
+    profiler.enable()
+
+
+def dump_import_profile(file_name: str) -> Path | None:
+    profiler = _IMPORT_PROFILE['profiler']
+    if profiler is None:
+        return None
+    profiler.disable()
+    _IMPORT_PROFILE['profiler'] = None
+    stats_path = _IMPORT_PROFILE['dir'] / file_name
+    profiler.dump_stats(str(stats_path))
+    return stats_path
+
+
+def import_profile_dir() -> Path | None:
+    return _IMPORT_PROFILE['dir']
+
+
+def profile_duckdb_connection(con: Any) -> Any:
+    if _IMPORT_PROFILE['dir'] is None:
+        return con
+    con.execute("SET enable_profiling = 'json'")
+    return _ProfiledDuckDBConnection(con)
+
+
+class _ProfiledDuckDBConnection:
+    # Each statement gets its own profiling_output file; the SET itself is not profiled.
+    def __init__(self, con: Any) -> None:
+        self._con = con
+
+    def execute(self, query: str, parameters: Any = None) -> Any:
+        _IMPORT_PROFILE['queries'] += 1
+        phase = current_import_phase() or 'none'
+        profile_path = (
+            _IMPORT_PROFILE['dir'] / 'duckdb'
+            / f'{_IMPORT_PROFILE["prefix"]}-{_IMPORT_PROFILE["queries"]:04d}-{phase}.json'
+        )
+        self._con.execute(f'SET profiling_output = {sql_string_literal(str(profile_path))}')
+        if parameters is None:
+            return self._con.execute(query)
+        return self._con.execute(query, parameters)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._con, name)
+
+    def __enter__(self) -> _ProfiledDuckDBConnection:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._con.close()
+
+
+def _duckdb_profile_summary(profile_path: Path) -> dict[str, Any] | None:
+    try:
+        profile = json.loads(profile_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    operators: list[Tuple[float, str]] = []
+    pending = list(profile.get('children') or [])
+    while pending:
+        node = pending.pop()
+        operators.append((float(node.get('operator_timing') or 0.0), str(node.get('operator_name') or '').strip()))
+        pending.extend(node.get('children') or [])
+    operators.sort(reverse=True)
+    return {
+        'file': profile_path.name,
+        'query': ' '.join(str(profile.get('query_name') or '').split()),
+        'latency': float(profile.get('latency') or 0.0),
+        'cpuTime': float(profile.get('cpu_time') or 0.0),
+        'operators': operators[:3],
+    }
+
+
+def render_import_profile_report(run: dict[str, Any], records: list[dict[str, Any]], profile_dir: Path) -> str:
+    import io
+    import pstats
+
+    lines = [
+        f'Import profile: mode={run["mode"]}, status={run["status"]}, wall={run["durationSec"]:.3f}s, '
+        f'cpu={run["cpuSec"]:.3f}s, peak_rss={run["peakRssBytes"]}',
+        '',
+        'Phases:',
+        f'  {"phase":<14}{"calls":>6}{"wall_s":>10}{"cpu_s":>10}{"cpu/wall":>10}{"rows":>12}{"rows/s":>12}',
+    ]
+    phases: dict[str, dict[str, float]] = {}
+    for record in records:
+        totals = phases.setdefault(record['phase'], {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0})
+        totals['calls'] += 1
+        totals['wall'] += float(record.get('durationSec') or 0.0)
+        totals['cpu'] += float(record.get('cpuSec') or 0.0)
+        totals['rows'] += int(record.get('rows') or 0)
+    for phase, totals in sorted(phases.items(), key=lambda item: item[1]['wall'], reverse=True):
+        ratio = totals['cpu'] / totals['wall'] if totals['wall'] > 0 else 0.0
+        rate = totals['rows'] / totals['wall'] if totals['wall'] > 0 else 0.0
+        lines.append(
+            f'  {phase:<14}{int(totals["calls"]):>6}{totals["wall"]:>10.3f}{totals["cpu"]:>10.3f}'
+            f'{ratio:>10.2f}{int(totals["rows"]):>12}{rate:>12.1f}'
+        )
+
+    summaries = [
+        summary for summary in map(_duckdb_profile_summary, sorted((profile_dir / 'duckdb').glob('*.json')))
+        if summary is not None
+    ]
+    summaries.sort(key=lambda summary: summary['latency'], reverse=True)
+    lines.extend(['', f'Slowest DuckDB queries ({len(summaries)} profiled):'])
+    for summary in summaries[:PROFILE_REPORT_QUERIES]:
+        lines.append(f'  {summary["latency"]:>8.3f}s  cpu={summary["cpuTime"]:.3f}s  {summary["file"]}  {summary["query"][:120]}')
+        if summary['operators']:
+            lines.append('            ' + ', '.join(f'{name} {timing:.3f}s' for timing, name in summary['operators']))
+
+    stats_paths = sorted(str(path) for path in profile_dir.glob('*.pstats'))
+    if stats_paths:
+        for sort_key, title in (('cumulative', 'cumulative'), ('tottime', 'own')):
+            buffer = io.StringIO()
+            stats = pstats.Stats(*stats_paths, stream=buffer)
+            stats.strip_dirs().sort_stats(sort_key).print_stats(PROFILE_REPORT_FUNCTIONS)
+            body = buffer.getvalue()
+            header_at = body.find('   ncalls')
+            lines.extend(['', f'Python hotspots by {title} time ({len(stats_paths)} profiles):', body[header_at:].rstrip()])
+    return '\n'.join(lines) + '\n'
+
+
+def write_import_profile(run: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    profile_dir = _IMPORT_PROFILE['dir']
+    if profile_dir is None:
+        return
+    dump_import_profile('python-main.pstats')
+    (profile_dir / 'phases.json').write_text(
+        json.dumps({'run': run, 'phases': records}, ensure_ascii=False, indent=2) + '\n',
+        encoding='utf-8',
+    )
+    report_path = profile_dir / 'report.txt'
+    report_path.write_text(render_import_profile_report(run, records, profile_dir), encoding='utf-8')
+    _IMPORT_PROFILE['dir'] = None
+    print(f'Profile written: {report_path}', file=sys.stderr, flush=True)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+from pathlib import Path
+from typing import Any, Tuple
+
+from .common import QUACKOSM_DATA_DIR, lazy_module
+from .phases import emit_import_event
+from .profiling import profile_duckdb_connection
+
+duckdb = lazy_module('duckdb')
+
+
+DUCKDB_MEMORY_SHARE = 0.75
+DUCKDB_MIN_MEMORY_MB = 256
+_DUCKDB_RESOURCES: dict[str, Any] = {}
+_DUCKDB_TEMP_SEQUENCE = itertools.count(1)
+
+
+def _read_cgroup_value(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+
+
+def _cgroup_dirs(root: Path, controller: str, proc_cgroup_path: Path) -> list[Path]:
+    own_path = None
+    for line in (_read_cgroup_value(proc_cgroup_path) or '').splitlines():
+        parts = line.split(':', 2)
+        if len(parts) == 3 and controller in parts[1].split(','):
+            own_path = parts[2]
+    base = root / controller if controller else root
+    dirs = [base / own_path.lstrip('/')] if own_path and own_path != '/' else []
+    return [*dirs, base]
+
+
+def detect_cgroup_limits(
+    root: Path = Path('/sys/fs/cgroup'),
+    proc_cgroup_path: Path = Path('/proc/self/cgroup'),
+) -> dict[str, Any]:
+    limits: dict[str, Any] = {'version': None, 'cpus': None, 'memoryBytes': None}
+    if (root / 'cgroup.controllers').exists():
+        limits['version'] = 2
+        for directory in _cgroup_dirs(root, '', proc_cgroup_path):
+            cpu_max = _read_cgroup_value(directory / 'cpu.max')
+            memory_max = _read_cgroup_value(directory / 'memory.max')
+            if cpu_max is None and memory_max is None:
+                continue
+            quota, _, period = (cpu_max or 'max').partition(' ')
+            if quota != 'max' and int(period or 100000) > 0:
+                limits['cpus'] = int(quota) / int(period or 100000)
+            if memory_max and memory_max != 'max':
+                limits['memoryBytes'] = int(memory_max)
+            break
+        return limits
+
+    for directory in _cgroup_dirs(root, 'cpu', proc_cgroup_path):
+        quota = _read_cgroup_value(directory / 'cpu.cfs_quota_us')
+        period = _read_cgroup_value(directory / 'cpu.cfs_period_us')
+        if quota is None or period is None:
+            continue
+        limits['version'] = 1
+        if int(quota) > 0 and int(period) > 0:
+            limits['cpus'] = int(quota) / int(period)
+        break
+    for directory in _cgroup_dirs(root, 'memory', proc_cgroup_path):
+        memory_limit = _read_cgroup_value(directory / 'memory.limit_in_bytes')
+        if memory_limit is None:
+            continue
+        limits['version'] = 1
+        # An unlimited v1 cgroup reports a page-aligned value close to 2**63.
+        if int(memory_limit) < 2 ** 60:
+            limits['memoryBytes'] = int(memory_limit)
+        break
+    return limits
+
+
+def _physical_memory_bytes() -> int | None:
+    try:
+        return int(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES'))
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _available_cpus() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_duckdb_resources(jobs: int = 1, work_dir: Path | None = None, announce: bool = False) -> dict[str, Any]:
+    limits = detect_cgroup_limits()
+    cpus = _available_cpus()
+    if limits['cpus'] is not None:
+        cpus = min(cpus, max(1, math.ceil(limits['cpus'])))
+    memory_bytes = limits['memoryBytes'] or _physical_memory_bytes()
+
+    threads_env = str(os.getenv('DUCKDB_THREADS', '') or '').strip()
+    if threads_env:
+        if not threads_env.isdigit() or int(threads_env) < 1:
+            raise ValueError('DUCKDB_THREADS must be a positive integer')
+        threads = int(threads_env)
+    else:
+        threads = max(1, cpus // max(1, jobs))
+
+    memory_limit = str(os.getenv('DUCKDB_MEMORY_LIMIT', '') or '').strip() or None
+    if memory_limit is None and memory_bytes:
+        memory_mb = int(memory_bytes * DUCKDB_MEMORY_SHARE / max(1, jobs) / 1024 ** 2)
+        memory_limit = f'{max(DUCKDB_MIN_MEMORY_MB, memory_mb)}MiB'
+
+    temp_root = str(os.getenv('DUCKDB_TEMP_DIRECTORY', '') or '').strip()
+    if temp_root:
+        temp_directory = Path(temp_root).expanduser().resolve()
+    else:
+        temp_directory = (work_dir or QUACKOSM_DATA_DIR) / 'duckdb-tmp'
+
+    _DUCKDB_RESOURCES.clear()
+    _DUCKDB_RESOURCES.update({
+        'threads': threads,
+        'memoryLimit': memory_limit,
+        'tempDirectory': str(temp_directory),
+        'jobs': max(1, jobs),
+        'cgroupVersion': limits['version'],
+        'cgroupCpus': limits['cpus'],
+        'cgroupMemoryBytes': limits['memoryBytes'],
+    })
+    if announce:
+        print(
+            f'DuckDB resources: threads={threads}, memory_limit={memory_limit or "default"}, '
+            f'temp_directory={temp_directory} (cgroup v{limits["version"] or "-"}: cpus={limits["cpus"] or "unlimited"}, '
+            f'memory={limits["memoryBytes"] or "unlimited"}; jobs={max(1, jobs)})',
+            flush=True,
+        )
+        emit_import_event({'event': 'resources', **_DUCKDB_RESOURCES})
+    return dict(_DUCKDB_RESOURCES)
+
+
+def duckdb_resource_settings() -> dict[str, Any]:
+    if not _DUCKDB_RESOURCES:
+        configure_duckdb_resources()
+    return _DUCKDB_RESOURCES
+
+
+def apply_duckdb_resources(settings: dict[str, Any]) -> None:
+    _DUCKDB_RESOURCES.clear()
+    _DUCKDB_RESOURCES.update(settings)
+
+
+def duckdb_temp_directory() -> str:
+    # DuckDB removes its temp directory on close, so connections must not share one.
+    temp_root = Path(duckdb_resource_settings()['tempDirectory'])
+    temp_root.mkdir(parents=True, exist_ok=True)
+    return str(temp_root / f'{os.getpid()}-{next(_DUCKDB_TEMP_SEQUENCE)}')
+
+
+def _duckdb_config() -> dict[str, Any]:
+    settings = duckdb_resource_settings()
+    config = {'threads': settings['threads'], 'temp_directory': duckdb_temp_directory()}
+    if settings['memoryLimit']:
+        config['memory_limit'] = settings['memoryLimit']
+    return config
+
+
+def connect_duckdb(database: Path | None = None, read_only: bool = False) -> Any:
+    if database is None:
+        con = duckdb.connect(':memory:', config=_duckdb_config())
+    else:
+        con = duckdb.connect(str(database), read_only=read_only, config=_duckdb_config())
+    return profile_duckdb_connection(con)
+
+
+def load_duckdb_extensions(con: Any, extensions: Tuple[str, ...] = ('spatial',)) -> None:
+    for ext in extensions:
+        try:
+            con.load_extension(ext)
+        except Exception:
+            con.install_extension(ext)
+            con.load_extension(ext)
@@ -93,6 +93,7 @@ function parseRowPayload(line, options: LooseRecord = {}) {
   const minLat = Number(payload?.min_lat);
   const maxLon = Number(payload?.max_lon);
   const maxLat = Number(payload?.max_lat);
+  const spatialKey = payload?.spatial_key == null ? null : Number(payload.spatial_key);
   if (!['way', 'relation'].includes(osmType) || !Number.isInteger(osmId) || osmId <= 0) {
     throw new Error('Importer produced invalid OSM identity');
   }
@@ -120,7 +121,8 @@ function parseRowPayload(line, options: LooseRecord = {}) {
     min_lon: minLon,
     min_lat: minLat,
     max_lon: maxLon,
-    max_lat: maxLat
+    max_lat: maxLat,
+    spatial_key: Number.isSafeInteger(spatialKey) ? spatialKey : null
   };
 }
 
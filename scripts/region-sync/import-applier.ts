@@ -1,5 +1,7 @@
 const fs = require('fs');
+const { pipeline } = require('stream/promises');
 const { Client } = require('pg');
+const { from: copyFrom } = require('pg-copy-streams');
 const { resolveRegionPmtilesPath } = require('../../src/lib/server/services/data-settings.service');
 const { buildPmtilesSwap, readImportRows } = require('./common');
 const { openSqliteRegionDb } = require('./region-db');
@@ -15,7 +17,7 @@ async function insertImportRowsIntoPostgres(client, ndjsonPath) {
     const params = [];
     let cursor = 1;
     for (const row of rows) {
-      values.push(`($${cursor++}, $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++})`);
+      values.push(`($${cursor++}, $${cursor++}, $${cursor++}, decode($${cursor++}, 'hex'), $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++}, $${cursor++})`);
       params.push(
         row.osm_type,
         row.osm_id,
@@ -24,7 +26,8 @@ async function insertImportRowsIntoPostgres(client, ndjsonPath) {
         row.min_lon,
         row.min_lat,
         row.max_lon,
-        row.max_lat
+        row.max_lat,
+        row.spatial_key
       );
     }
     await client.query(`
@@ -32,11 +35,12 @@ async function insertImportRowsIntoPostgres(client, ndjsonPath) {
         osm_type,
         osm_id,
         tags_json,
-        geometry_wkb_hex,
+        geometry_wkb,
         min_lon,
         min_lat,
         max_lon,
-        max_lat
+        max_lat,
+        spatial_key
       )
       VALUES ${values.join(', ')}
     `, params);
@@ -54,6 +58,25 @@ async function insertImportRowsIntoPostgres(client, ndjsonPath) {
   return importedFeatureCount;
 }
 
+async function copyImportRowsIntoPostgres(client, pgcopyPath) {
+  const copyStream = client.query(copyFrom(`
+    COPY region_import_tmp (
+      osm_type,
+      osm_id,
+      tags_json,
+      geometry_wkb,
+      min_lon,
+      min_lat,
+      max_lon,
+      max_lat,
+      spatial_key
+    )
+    FROM STDIN (FORMAT binary)
+  `));
+  await pipeline(fs.createReadStream(pgcopyPath, { highWaterMark: 1024 * 1024 }), copyStream);
+  return copyStream.rowCount;
+}
+
 function insertImportRowsIntoSqlite(db, ndjsonPath) {
   const insertRow = db.prepare(`
     INSERT INTO temp.region_import_tmp (
@@ -64,9 +87,10 @@ function insertImportRowsIntoSqlite(db, ndjsonPath) {
       min_lon,
       min_lat,
       max_lon,
-      max_lat
+      max_lat,
+      spatial_key
     )
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
   `);
   const insertBatch = db.transaction((rows) => {
     for (const row of rows) {
@@ -78,7 +102,8 @@ function insertImportRowsIntoSqlite(db, ndjsonPath) {
         row.min_lon,
         row.min_lat,
         row.max_lon,
-        row.max_lat
+        row.max_lat,
+        row.spatial_key
       );
     }
   });
@@ -118,7 +143,8 @@ async function applyRegionImportToSqlite({ region, ndjsonPath, builtPmtilesPath,
         min_lon REAL NOT NULL,
         min_lat REAL NOT NULL,
         max_lon REAL NOT NULL,
-        max_lat REAL NOT NULL
+        max_lat REAL NOT NULL,
+        spatial_key INTEGER
       );
       DELETE FROM temp.region_import_tmp;
     `);
@@ -152,6 +178,7 @@ async function applyRegionImportToSqlite({ region, ndjsonPath, builtPmtilesPath,
           max_lat,
           ?
         FROM temp.region_import_tmp
+        ORDER BY spatial_key
         ON CONFLICT(osm_type, osm_id) DO UPDATE SET
           tags_json = excluded.tags_json,
           geometry_json = excluded.geometry_json,
@@ -234,7 +261,7 @@ async function applyRegionImportToSqlite({ region, ndjsonPath, builtPmtilesPath,
   }
 }
 
-async function applyRegionImportToPostgres({ region, ndjsonPath, builtPmtilesPath, databaseUrl, dataDir }) {
+async function applyRegionImportToPostgres({ region, ndjsonPath, pgcopyPath, builtPmtilesPath, databaseUrl, dataDir }) {
   const client = new Client({ connectionString: databaseUrl });
   const runMarker = new Date().toISOString();
   const finalPmtilesPath = resolveRegionPmtilesPath(dataDir, region);
@@ -249,14 +276,17 @@ async function applyRegionImportToPostgres({ region, ndjsonPath, builtPmtilesPat
           osm_type text NOT NULL,
           osm_id bigint NOT NULL,
           tags_json text,
-          geometry_wkb_hex text NOT NULL,
+          geometry_wkb bytea NOT NULL,
           min_lon double precision NOT NULL,
           min_lat double precision NOT NULL,
           max_lon double precision NOT NULL,
-          max_lat double precision NOT NULL
+          max_lat double precision NOT NULL,
+          spatial_key bigint
         ) ON COMMIT DROP
       `);
-      const importedFeatureCount = await insertImportRowsIntoPostgres(client, ndjsonPath);
+      const importedFeatureCount = pgcopyPath
+        ? await copyImportRowsIntoPostgres(client, pgcopyPath)
+        : await insertImportRowsIntoPostgres(client, ndjsonPath);
 
       swap = buildPmtilesSwap(finalPmtilesPath, builtPmtilesPath);
 
@@ -280,9 +310,10 @@ async function applyRegionImportToPostgres({ region, ndjsonPath, builtPmtilesPat
           min_lat,
           max_lon,
           max_lat,
-          ST_Multi(ST_GeomFromWKB(decode(geometry_wkb_hex, 'hex'), 4326)),
+          ST_Multi(ST_GeomFromWKB(geometry_wkb, 4326)),
           $1::timestamptz
         FROM region_import_tmp
+        ORDER BY spatial_key
         ON CONFLICT (osm_type, osm_id) DO UPDATE SET
           tags_json = excluded.tags_json,
           min_lon = excluded.min_lon,
@@ -386,5 +417,6 @@ function publishPmtilesArchive({ dataDir, region, builtPmtilesPath }) {
 
 module.exports = {
   applyRegionImport,
+  copyImportRowsIntoPostgres,
   publishPmtilesArchive
 };
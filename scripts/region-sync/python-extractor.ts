@@ -1,4 +1,4 @@
-const { spawnSync } = require('child_process');
+const { spawn, spawnSync } = require('child_process');
 const path = require('path');
 
 function getDefaultImporterPath() {
@@ -70,68 +70,162 @@ function ensurePythonImporterDeps(env = process.env) {
   );
 }
 
-function parseJsonPayload(raw) {
-  const text = String(raw || '').trim();
-  if (!text) {
-    throw new Error('Python extractor returned empty JSON payload');
+function createPythonExtractResolver(options: LooseRecord = {}) {
+  const importerPath = String(options.importerPath || getDefaultImporterPath()).trim() || getDefaultImporterPath();
+  const env = options.env || process.env;
+  const idleTimeoutMs = Math.max(0, Number(options.idleTimeoutMs ?? 5 * 60 * 1000) || 0);
+  let pythonCandidate = options.pythonCandidate || null;
+  let server = null;
+  let idleTimer = null;
+  let nextRequestId = 1;
+
+  function setServerActive(state, active) {
+    // An idle service must not keep the Node process alive on its own.
+    for (const handle of [state.child, state.child.stdin, state.child.stdout, state.child.stderr]) {
+      if (active) handle?.ref?.();
+      else handle?.unref?.();
+    }
   }
-  try {
-    return JSON.parse(text);
-  } catch (error) {
-    throw new Error(`Failed to parse Python extractor JSON: ${String(error?.message || error)}`, {
-      cause: error
-    });
+
+  function clearIdleTimer() {
+    if (idleTimer) {
+      clearTimeout(idleTimer);
+      idleTimer = null;
+    }
   }
-}
 
-function runImporterJson(importerPath, args, env = process.env) {
-  const pythonCandidate = ensurePythonImporterDeps(env);
-  const result = spawnSync(pythonCandidate.exe, [
-    ...pythonCandidate.prefixArgs,
-    importerPath,
-    ...args
-  ], {
-    stdio: ['ignore', 'pipe', 'pipe'],
-    shell: false,
-    env
-  });
+  function scheduleIdleClose(state) {
+    clearIdleTimer();
+    if (idleTimeoutMs <= 0 || server !== state) return;
+    idleTimer = setTimeout(() => {
+      idleTimer = null;
+      if (server === state && state.pending.size === 0) close();
+    }, idleTimeoutMs);
+    idleTimer.unref?.();
+  }
 
-  const stdout = String(result.stdout || '');
-  const stderr = String(result.stderr || '');
-  if (result.status !== 0) {
-    const message = stderr.trim() || stdout.trim() || 'Python extractor command failed';
-    throw new Error(message);
+  function failServer(state, error) {
+    if (server === state) {
+      server = null;
+      clearIdleTimer();
+    }
+    for (const pending of state.pending.values()) {
+      pending.reject(error);
+    }
+    state.pending.clear();
   }
 
-  return parseJsonPayload(stdout);
-}
+  function handleResponseLine(state, line) {
+    let payload;
+    try {
+      payload = JSON.parse(line);
+    } catch {
+      state.stderrTail = `${state.stderrTail}${line}\n`.slice(-4000);
+      return;
+    }
+    const pending = state.pending.get(payload?.id);
+    if (!pending) return;
+    state.pending.delete(payload.id);
+    if (state.pending.size === 0) {
+      setServerActive(state, false);
+      scheduleIdleClose(state);
+    }
+    if (payload.error) {
+      pending.reject(new Error(String(payload.error.message || 'Python extractor request failed')));
+    } else {
+      pending.resolve(payload.result);
+    }
+  }
 
-function createPythonExtractResolver(options: LooseRecord = {}) {
-  const importerPath = String(options.importerPath || getDefaultImporterPath()).trim() || getDefaultImporterPath();
-  const env = options.env || process.env;
+  function startServer() {
+    if (!pythonCandidate) {
+      pythonCandidate = ensurePythonImporterDeps(env);
+    }
+    const child = spawn(pythonCandidate.exe, [
+      ...pythonCandidate.prefixArgs,
+      importerPath,
+      '--serve'
+    ], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+      shell: false,
+      env
+    });
+    const state = { child, pending: new Map(), stdoutBuffer: '', stderrTail: '' };
+
+    child.stdout.setEncoding('utf8');
+    child.stdout.on('data', (chunk) => {
+      state.stdoutBuffer += chunk;
+      let newlineIndex = state.stdoutBuffer.indexOf('\n');
+      while (newlineIndex >= 0) {
+        const line = state.stdoutBuffer.slice(0, newlineIndex).trim();
+        state.stdoutBuffer = state.stdoutBuffer.slice(newlineIndex + 1);
+        if (line) handleResponseLine(state, line);
+        newlineIndex = state.stdoutBuffer.indexOf('\n');
+      }
+    });
+    child.stderr.setEncoding('utf8');
+    child.stderr.on('data', (chunk) => {
+      state.stderrTail = `${state.stderrTail}${chunk}`.slice(-4000);
+    });
+    // Write failures surface through the exit handler with the captured stderr.
+    child.stdin.on('error', () => {});
+    child.on('error', (error) => failServer(state, error));
+    child.on('exit', (code, signal) => {
+      const detail = state.stderrTail.trim();
+      failServer(state, new Error(detail || `Python extractor service exited (${signal || code})`));
+    });
+    setServerActive(state, false);
+    return state;
+  }
+
+  function request(method, params) {
+    return new Promise((resolve, reject) => {
+      if (!server) {
+        server = startServer();
+      }
+      clearIdleTimer();
+      const state = server;
+      const id = nextRequestId++;
+      state.pending.set(id, { resolve, reject });
+      if (state.pending.size === 1) setServerActive(state, true);
+      state.child.stdin.write(`${JSON.stringify({ id, method, params })}\n`);
+    });
+  }
+
+  function close() {
+    clearIdleTimer();
+    const state = server;
+    if (!state) return;
+    server = null;
+    // EOF lets the service finish in-flight requests before it exits.
+    state.child.stdin.end();
+    const killTimer = setTimeout(() => state.child.kill(), 5000);
+    killTimer.unref?.();
+    state.child.once('exit', () => clearTimeout(killTimer));
+  }
 
   return {
     async searchExtractCandidates(query, searchOptions: LooseRecord = {}) {
       const limit = Math.max(1, Math.min(50, Number(searchOptions.limit || 12) || 12));
       const source = String(searchOptions.source || 'any').trim() || 'any';
-      return runImporterJson(importerPath, [
-        '--resolve-extract-query',
-        String(query || ''),
-        '--extract-source',
+      return request('searchExtractCandidates', {
+        query: String(query || ''),
         source,
-        '--limit',
-        String(limit)
-      ], env);
+        limit
+      });
     },
     async resolveExactExtract(query, resolveOptions: LooseRecord = {}) {
       const source = String(resolveOptions.source || 'any').trim() || 'any';
-      return runImporterJson(importerPath, [
-        '--resolve-exact-extract',
-        String(query || ''),
-        '--extract-source',
+      return request('resolveExactExtract', {
+        query: String(query || ''),
         source
-      ], env);
-    }
+      });
+    },
+    async refreshExtractIndex(refreshOptions: LooseRecord = {}) {
+      const source = String(refreshOptions.source || 'any').trim() || 'any';
+      return request('refreshExtractIndex', { source });
+    },
+    close
   };
 }
 
@@ -140,6 +234,7 @@ function exportRegionExtractToNdjson({
   region,
   outputPath,
   dbOutputPath,
+  dbPgcopyOutputPath,
   geojsonOutputPath,
   summaryOutputPath,
   env = process.env
@@ -153,12 +248,13 @@ function exportRegionExtractToNdjson({
 
   const legacyOutputPath = String(outputPath || '').trim();
   const nextDbOutputPath = String(dbOutputPath || '').trim();
+  const nextDbPgcopyOutputPath = String(dbPgcopyOutputPath || '').trim();
   const nextGeojsonOutputPath = String(geojsonOutputPath || '').trim();
   const nextSummaryOutputPath = String(summaryOutputPath || '').trim();
-  if (legacyOutputPath && (nextDbOutputPath || nextGeojsonOutputPath)) {
-    throw new Error('Use either outputPath or dbOutputPath/geojsonOutputPath for region extract export');
+  if (legacyOutputPath && (nextDbOutputPath || nextDbPgcopyOutputPath || nextGeojsonOutputPath)) {
+    throw new Error('Use either outputPath or dbOutputPath/dbPgcopyOutputPath/geojsonOutputPath for region extract export');
   }
-  if (!legacyOutputPath && !nextDbOutputPath && !nextGeojsonOutputPath) {
+  if (!legacyOutputPath && !nextDbOutputPath && !nextDbPgcopyOutputPath && !nextGeojsonOutputPath) {
     throw new Error('Region extract export requires at least one output path');
   }
 
@@ -173,6 +269,9 @@ function exportRegionExtractToNdjson({
     if (nextDbOutputPath) {
       args.push('--out-db-ndjson', nextDbOutputPath);
     }
+    if (nextDbPgcopyOutputPath) {
+      args.push('--out-db-pgcopy', nextDbPgcopyOutputPath);
+    }
     if (nextGeojsonOutputPath) {
       args.push('--out-geojson-ndjson', nextGeojsonOutputPath);
     }
@@ -1,58 +1,95 @@
+from __future__ import annotations
+
 import argparse
-import difflib
 import json
+import multiprocessing
 import os
-import re
 import sqlite3
 import sys
+import threading
 import time
-import urllib.parse
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
-from functools import lru_cache
 from pathlib import Path
 from typing import Any, Tuple
 
-import duckdb  # type: ignore
-import pandas as pd  # type: ignore
-from requests import HTTPError  # type: ignore
-from quackosm import PbfFileReader, convert_osm_extract_to_duckdb  # type: ignore
-from quackosm.osm_extracts import (  # type: ignore
-    OSM_EXTRACT_SOURCE_INDEX_FUNCTION,
-    OsmExtractMultipleMatchesError,
-    OsmExtractSource,
-    OsmExtractZeroMatchesError,
-    get_extract_by_query,
+SCRIPTS_DIR = str(Path(__file__).resolve().parent)
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from osm_importer.common import QUACKOSM_DATA_DIR, lazy_module, sql_string_literal
+from osm_importer.conversion_cache import convert_pbf_to_duckdb_cached, release_converted_extracts
+from osm_importer.exporters import (
+    BATCH_SIZE,
+    EXPORT_ORDERS,
+    append_file,
+    append_parquet_file,
+    append_pgcopy_file,
+    export_copy_select_sql,
+    export_rows_delta,
+    export_rows_to_outputs,
+    write_export_snapshot,
+)
+from osm_importer.extract_index import (
+    get_extract_index,
+    invalidate_extract_index_cache,
+    normalize_extract_source,
+    refresh_extract_index,
+    resolve_exact_extract,
+    resolve_exact_extract_alias,
+    search_extract_candidates,
+)
+from osm_importer.osc import apply_osc_to_region_duckdb
+from osm_importer.phases import (
+    drain_import_phase_records,
+    finish_import_run,
+    import_phase,
+    import_phase_records,
+    record_import_phases,
+    recorded_phase,
+    start_import_run,
+)
+from osm_importer.profiling import (
+    dump_import_profile,
+    import_profile_dir,
+    start_import_profile,
+    write_import_profile,
+)
+from osm_importer.resources import (
+    apply_duckdb_resources,
+    configure_duckdb_resources,
+    connect_duckdb,
+    duckdb_resource_settings,
+    load_duckdb_extensions,
 )
 
 
-BATCH_SIZE = 20000
+duckdb = lazy_module('duckdb')
 
 
-def encode_osm_feature_id(osm_type: str, osm_id: int) -> int:
-    type_bit = 1 if str(osm_type or '').strip() == 'relation' else 0
-    return (int(osm_id) * 2) + type_bit
+SQLITE_ENGINES = ('duckdb', 'python')
+SQLITE_RTREE_TRIGGERS = (
+    'trg_building_contours_rtree_insert',
+    'trg_building_contours_rtree_update',
+    'trg_building_contours_rtree_delete',
+)
 
 
-def normalize_feature_kind(value: Any) -> str:
-    kind = str(value or '').strip().lower()
-    return 'building_part' if kind == 'building_part' else 'building'
+def _sqlite_output_paths(arguments: dict[str, Any]) -> list[Path | None]:
+    conn = arguments.get('sqlite_conn') or arguments.get('conn')
+    if conn is None:
+        return []
+    row = conn.execute("SELECT file FROM pragma_database_list WHERE name = 'main'").fetchone()
+    if not row or not row[0]:
+        return []
+    db_path = Path(row[0])
+    return [db_path, db_path.with_name(f'{db_path.name}-wal')]
 
 
-def derive_feature_kind_from_tags_json(tags_json: str | None) -> str:
-    text = str(tags_json or '').strip()
-    if not text:
-        return 'building'
-    try:
-        tags = json.loads(text)
-    except Exception:
-        return 'building'
-    if not isinstance(tags, dict):
-        return 'building'
-    if 'building' in tags:
-        return 'building'
-    if 'building:part' in tags or 'building_part' in tags:
-        return 'building_part'
-    return 'building'
+def finish_import(status: str, processed: int = 0, imported: int = 0, deleted: int = 0) -> None:
+    run = finish_import_run(status, processed, imported, deleted)
+    if run is not None:
+        write_import_profile(run, import_phase_records())
 
 
 def merge_bounds(
@@ -77,344 +114,31 @@ def merge_bounds(
     }
 
 
-def build_geojson_feature_line(
-    osm_type: str,
-    osm_id: int,
-    geometry_json: str,
-    tags_json: str | None = None,
-    feature_kind: str | None = None,
-) -> str:
-    normalized_geometry_json = str(geometry_json or '').strip()
-    if not normalized_geometry_json:
-        raise ValueError(f'Missing GeoJSON geometry for {str(osm_type or "").strip()}/{int(osm_id)}')
-    normalized_feature_kind = normalize_feature_kind(feature_kind or derive_feature_kind_from_tags_json(tags_json))
-    return (
-        f'{{"type":"Feature","id":{encode_osm_feature_id(osm_type, int(osm_id))},'
-        f'"properties":{{"osm_id":{int(osm_id)},"feature_kind":"{normalized_feature_kind}"}},"geometry":{normalized_geometry_json}}}\n'
-    )
-
-
-def write_export_summary(summary_path: Path, processed: int, imported: int, bounds: dict[str, float] | None) -> None:
-    summary_path.parent.mkdir(parents=True, exist_ok=True)
-    summary_path.write_text(
-        json.dumps({
-            'processed': int(processed),
-            'importedFeatureCount': int(imported),
-            'bounds': bounds,
-        }, ensure_ascii=False),
-        encoding='utf-8',
-    )
-
-
-def normalize_extract_source(value: str) -> str:
-    raw = str(value or 'any').strip() or 'any'
-    try:
-        return str(OsmExtractSource(raw).value)
-    except ValueError as exc:
-        raise ValueError(f'Unknown OSM extract source: {raw}') from exc
-
-
-def normalize_search_text(value: str) -> str:
-    text = str(value or '').strip().casefold()
-    text = text.replace('_', ' ')
-    text = re.sub(r'[/\\|:;,.()+-]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-
-def tokenize_search_text(value: str) -> list[str]:
-    return [token for token in normalize_search_text(value).split(' ') if token]
-
-
-def infer_extract_source(file_name: str) -> str:
-    value = str(file_name or '').strip().casefold()
-    if value.startswith('osmfr_'):
-        return 'osmfr'
-    if value.startswith('geofabrik_'):
-        return 'geofabrik'
-    if value.startswith('bbbike_'):
-        return 'bbbike'
-    return 'any'
-
-
-def _is_quackosm_index_rate_limit_error(exc: HTTPError) -> bool:
-    response = getattr(exc, 'response', None)
-    status_code = getattr(response, 'status_code', None)
-    if status_code not in {403, 429}:
-        return False
-
-    details = f'{exc} {getattr(response, "text", "")}'.casefold()
-    return status_code == 429 or 'rate limit' in details or 'too many requests' in details
-
-
-def serialize_extract(extract: Any, *, match_kind: str | None = None, exact: bool | None = None) -> dict[str, Any]:
-    file_name = str(getattr(extract, 'file_name', '') or '').strip()
-    return {
-        'extractSource': infer_extract_source(file_name),
-        'extractId': file_name,
-        'extractLabel': str(getattr(extract, 'name', '') or file_name).strip() or file_name,
-        'downloadUrl': str(getattr(extract, 'url', '') or '').strip() or None,
-        'matchKind': match_kind,
-        'exact': bool(exact),
-    }
-
-
-def trim_extract_archive_suffix(value: str) -> str:
-    text = str(value or '').strip()
-    for suffix in ('-latest.osm.pbf', '.osm.pbf', '-latest.pbf', '.pbf'):
-        if text.casefold().endswith(suffix):
-            return text[: -len(suffix)]
-    return text
-
-
-def normalize_path_alias(value: str) -> str:
-    text = str(value or '').strip().replace('\\', '/')
-    text = re.sub(r'/+', '/', text)
-    return text.strip('/').casefold()
-
-
-def build_path_aliases_for_row(row: Any) -> set[str]:
-    aliases: set[str] = set()
-    file_name = str(getattr(row, 'file_name', '') or '').strip()
-    source_name = infer_extract_source(file_name)
-    url = str(getattr(row, 'url', '') or '').strip()
-    if not url:
-        return aliases
-
-    parsed = urllib.parse.urlparse(url)
-    path = trim_extract_archive_suffix(parsed.path).lstrip('/')
-    if source_name == 'osmfr' and path.startswith('extracts/'):
-        path = path[len('extracts/') :]
-
-    normalized_path = normalize_path_alias(path)
-    if normalized_path:
-        aliases.add(normalized_path)
-
-    if source_name == 'geofabrik' and normalized_path:
-        parts = [part for part in normalized_path.split('/') if part]
-        for start in range(1, len(parts)):
-            suffix_alias = '/'.join(parts[start:])
-            if suffix_alias:
-                aliases.add(suffix_alias)
-
-    return aliases
-
-
-def _load_extract_index(source: OsmExtractSource) -> Any:
-    loader = OSM_EXTRACT_SOURCE_INDEX_FUNCTION[source]
-    try:
-        return loader()
-    except HTTPError as exc:
-        if not _is_quackosm_index_rate_limit_error(exc):
-            raise
-
-        print(
-            'QuackOSM precalculated index download was rate-limited for '
-            f'source={source.value}; retrying with local recalculation.',
-            file=sys.stderr,
-            flush=True,
-        )
-        return loader(force_recalculation=True)
-
-
-@lru_cache(maxsize=None)
-def get_extract_path_aliases(source: str) -> dict[str, list[str]]:
-    index = get_extract_index(source)
-    matches: dict[str, list[str]] = {}
-
-    for row in index.itertuples(index=False):
-        file_name = str(getattr(row, 'file_name', '') or '').strip()
-        if not file_name:
-            continue
-        for alias in build_path_aliases_for_row(row):
-            matches.setdefault(alias, []).append(file_name)
-
-    return matches
-
-
-def resolve_exact_extract_alias(query: str, source: str = 'any') -> dict[str, Any]:
-    normalized_source = normalize_extract_source(source)
-    normalized_query = normalize_path_alias(trim_extract_archive_suffix(str(query or '').strip()))
-    if not normalized_query:
-        return {
-            'candidate': None,
-            'errorCode': 'not_found',
-            'message': 'Empty extract query.',
-            'matchingExtractIds': [],
-        }
-
-    alias_matches = get_extract_path_aliases(normalized_source).get(normalized_query, [])
-    unique_matches = sorted(set(str(item or '').strip() for item in alias_matches if str(item or '').strip()))
-    if len(unique_matches) == 1:
-        extract = get_extract_by_query(unique_matches[0], source=normalized_source)
-        return {
-            'candidate': serialize_extract(extract, match_kind='exact_alias', exact=True),
-            'errorCode': None,
-            'message': None,
-            'matchingExtractIds': [],
-        }
-    if len(unique_matches) > 1:
-        return {
-            'candidate': None,
-            'errorCode': 'multiple',
-            'message': (
-                f'Extract query "{str(query or "").strip()}" matches multiple canonical extracts. '
-                f'Select one manually.'
-            ),
-            'matchingExtractIds': unique_matches,
-        }
-    return {
-        'candidate': None,
-        'errorCode': 'not_found',
-        'message': None,
-        'matchingExtractIds': [],
-    }
-
-
-@lru_cache(maxsize=None)
-def get_extract_index(source: str) -> Any:
-    source_name = normalize_extract_source(source)
-    source_enum = OsmExtractSource(source_name)
-    if source_enum == OsmExtractSource.any:
-        index = pd.concat(
-            [
-                _load_extract_index(get_source_enum)
-                for get_source_enum in OSM_EXTRACT_SOURCE_INDEX_FUNCTION.keys()
-            ],
-            ignore_index=True,
-        )
-    else:
-        index = _load_extract_index(source_enum)
-
-    index = index.copy()
-    index['source_name'] = index['file_name'].map(infer_extract_source)
-    index['normalized_name'] = index['name'].map(normalize_search_text)
-    index['normalized_file_name'] = index['file_name'].map(normalize_search_text)
-    return index
+def merge_feature_kind_counts(counts: dict[str, int], other: dict[str, int] | None) -> dict[str, int]:
+    merged = dict(counts)
+    for kind, count in (other or {}).items():
+        merged[kind] = merged.get(kind, 0) + int(count)
+    return merged
 
 
-def resolve_exact_extract(query: str, source: str = 'any') -> dict[str, Any]:
-    normalized_source = normalize_extract_source(source)
-    raw_query = str(query or '').strip()
-    if raw_query:
-        get_extract_index(normalized_source)
-    if '/' in raw_query or '\\' in raw_query:
-        alias_result = resolve_exact_extract_alias(raw_query, normalized_source)
-        if alias_result.get('candidate') or alias_result.get('errorCode') == 'multiple':
-            return alias_result
-    try:
-        extract = get_extract_by_query(query, source=normalized_source)
-        return {
-            'candidate': serialize_extract(extract, match_kind='exact', exact=True),
-            'errorCode': None,
-            'message': None,
-            'matchingExtractIds': [],
-        }
-    except OsmExtractMultipleMatchesError as exc:
-        return {
-            'candidate': None,
-            'errorCode': 'multiple',
-            'message': str(exc),
-            'matchingExtractIds': list(getattr(exc, 'matching_full_names', []) or []),
-        }
-    except OsmExtractZeroMatchesError as exc:
-        return {
-            'candidate': None,
-            'errorCode': 'not_found',
-            'message': str(exc),
-            'matchingExtractIds': list(getattr(exc, 'matching_full_names', []) or []),
-        }
-
-
-def search_extract_candidates(query: str, source: str = 'any', limit: int = 12) -> dict[str, Any]:
-    normalized_source = normalize_extract_source(source)
-    normalized_query = normalize_search_text(query)
-    query_tokens = set(tokenize_search_text(query))
-    if not normalized_query:
-        return {
-            'query': '',
-            'items': [],
-        }
-
-    index = get_extract_index(normalized_source)
-    ranked: list[dict[str, Any]] = []
-    seen_ids: set[str] = set()
-
-    for row in index.itertuples(index=False):
-        normalized_name = str(getattr(row, 'normalized_name', '') or '')
-        normalized_file_name = str(getattr(row, 'normalized_file_name', '') or '')
-        name_tokens = set(tokenize_search_text(normalized_name))
-        file_tokens = set(tokenize_search_text(normalized_file_name))
-        overlap = len(query_tokens & name_tokens) + len(query_tokens & file_tokens)
-        ratio = max(
-            difflib.SequenceMatcher(None, normalized_query, normalized_name).ratio() if normalized_name else 0.0,
-            difflib.SequenceMatcher(None, normalized_query, normalized_file_name).ratio() if normalized_file_name else 0.0,
-        )
-
-        score = 0
-        match_kind = 'fuzzy'
-        exact = False
-
-        if normalized_query == normalized_file_name:
-            score = 1000
-            match_kind = 'exact_file_name'
-            exact = True
-        elif normalized_query == normalized_name:
-            score = 950
-            match_kind = 'exact_name'
-            exact = True
-        elif normalized_query in normalized_file_name:
-            score = 820
-            match_kind = 'file_name_contains'
-        elif normalized_query in normalized_name:
-            score = 780
-            match_kind = 'name_contains'
-        elif query_tokens and (query_tokens <= name_tokens or query_tokens <= file_tokens):
-            score = 720 + overlap
-            match_kind = 'token_subset'
-        elif overlap > 0:
-            score = 520 + (overlap * 20) + int(ratio * 100)
-            match_kind = 'token_overlap'
-        elif ratio >= 0.72:
-            score = 320 + int(ratio * 100)
-            match_kind = 'fuzzy'
-
-        if score <= 0:
-            continue
-
-        extract_id = str(getattr(row, 'file_name', '') or '').strip()
-        if not extract_id or extract_id in seen_ids:
-            continue
-        seen_ids.add(extract_id)
-
-        ranked.append({
-            'extractSource': infer_extract_source(extract_id),
-            'extractId': extract_id,
-            'extractLabel': str(getattr(row, 'name', '') or extract_id).strip() or extract_id,
-            'downloadUrl': str(getattr(row, 'url', '') or '').strip() or None,
-            'matchKind': match_kind,
-            'exact': exact,
-            'score': score,
-            'area': float(getattr(row, 'area', 0.0) or 0.0),
-        })
-
-    ranked.sort(key=lambda item: (-int(item['score']), float(item['area']), str(item['extractId'])))
-    items = [
-        {
-            'extractSource': item['extractSource'],
-            'extractId': item['extractId'],
-            'extractLabel': item['extractLabel'],
-            'downloadUrl': item['downloadUrl'],
-            'matchKind': item['matchKind'],
-            'exact': item['exact'],
-        }
-        for item in ranked[: max(1, min(50, int(limit or 12)))]
-    ]
-
-    return {
-        'query': str(query or '').strip(),
-        'items': items,
+def write_export_summary(
+    summary_path: Path,
+    processed: int,
+    imported: int,
+    bounds: dict[str, float] | None,
+    feature_kind_counts: dict[str, int] | None = None,
+    delta_counts: dict[str, int] | None = None,
+) -> None:
+    summary = {
+        'processed': int(processed),
+        'importedFeatureCount': int(imported),
+        'bounds': bounds,
+        'featureKindCounts': dict(feature_kind_counts or {}),
     }
+    if delta_counts is not None:
+        summary['deltaCounts'] = dict(delta_counts)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(summary, ensure_ascii=False), encoding='utf-8')
 
 
 def ensure_sqlite_schema(conn: sqlite3.Connection) -> None:
@@ -433,6 +157,7 @@ CREATE TABLE IF NOT EXISTS building_contours (
   max_lon REAL NOT NULL,
   max_lat REAL NOT NULL,
   updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+  sync_generation INTEGER NOT NULL DEFAULT 0,
   PRIMARY KEY (osm_type, osm_id)
 );
 ''')
@@ -440,9 +165,36 @@ CREATE TABLE IF NOT EXISTS building_contours (
 CREATE INDEX IF NOT EXISTS idx_building_contours_bbox
 ON building_contours (min_lon, max_lon, min_lat, max_lat);
 ''')
+    ensure_sqlite_sync_generation_schema(conn)
+    conn.execute('''
+CREATE TABLE IF NOT EXISTS building_contours_sync_state (
+  singleton_id INTEGER PRIMARY KEY CHECK (singleton_id = 1),
+  contour_count INTEGER NOT NULL,
+  contour_max_rowid INTEGER NOT NULL,
+  rtree_count INTEGER NOT NULL,
+  rtree_max_rowid INTEGER NOT NULL,
+  updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+''')
+    if sqlite_rtree_suspended(conn):
+        refill_suspended_sqlite_rtree(conn)
     ensure_sqlite_rtree_schema(conn)
 
 
+def ensure_sqlite_sync_generation_schema(conn: sqlite3.Connection) -> None:
+    columns = {str(row[1]) for row in conn.execute('PRAGMA table_info(building_contours);').fetchall()}
+    if 'sync_generation' not in columns:
+        conn.execute('ALTER TABLE building_contours ADD COLUMN sync_generation INTEGER NOT NULL DEFAULT 0;')
+    conn.execute('''
+CREATE INDEX IF NOT EXISTS idx_building_contours_sync_generation
+ON building_contours (sync_generation);
+''')
+
+
+def next_sqlite_sync_generation(conn: sqlite3.Connection) -> int:
+    return int(conn.execute('SELECT COALESCE(MAX(sync_generation), 0) + 1 FROM building_contours').fetchone()[0] or 1)
+
+
 def ensure_sqlite_rtree_schema(conn: sqlite3.Connection) -> bool:
     compile_options = [str(row[0]) for row in conn.execute('PRAGMA compile_options').fetchall()]
     if not any('ENABLE_RTREE' in option for option in compile_options):
@@ -484,10 +236,79 @@ END;
     return True
 
 
-def rebuild_sqlite_rtree_if_needed(conn: sqlite3.Connection) -> None:
+def _sqlite_rowid_watermarks(conn: sqlite3.Connection) -> Tuple[int, int]:
+    contour_max_rowid = int(conn.execute('SELECT MAX(rowid) FROM building_contours').fetchone()[0] or 0)
+    has_rtree = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'building_contours_rtree_rowid';"
+    ).fetchone() is not None
+    rtree_max_rowid = 0
+    if has_rtree:
+        rtree_max_rowid = int(conn.execute('SELECT MAX(rowid) FROM building_contours_rtree_rowid').fetchone()[0] or 0)
+    return contour_max_rowid, rtree_max_rowid
+
+
+def read_sqlite_sync_state(conn: sqlite3.Connection) -> dict[str, int] | None:
+    row = conn.execute('''
+SELECT contour_count, contour_max_rowid, rtree_count, rtree_max_rowid
+FROM building_contours_sync_state
+WHERE singleton_id = 1;
+''').fetchone()
+    if row is None:
+        return None
+    return {
+        'contour_count': int(row[0]),
+        'contour_max_rowid': int(row[1]),
+        'rtree_count': int(row[2]),
+        'rtree_max_rowid': int(row[3]),
+    }
+
+
+def record_sqlite_sync_state(conn: sqlite3.Connection, contour_count: int, rtree_count: int) -> None:
+    contour_max_rowid, rtree_max_rowid = _sqlite_rowid_watermarks(conn)
+    conn.execute('''
+INSERT INTO building_contours_sync_state
+  (singleton_id, contour_count, contour_max_rowid, rtree_count, rtree_max_rowid, updated_at)
+VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT(singleton_id) DO UPDATE SET
+  contour_count = excluded.contour_count,
+  contour_max_rowid = excluded.contour_max_rowid,
+  rtree_count = excluded.rtree_count,
+  rtree_max_rowid = excluded.rtree_max_rowid,
+  updated_at = excluded.updated_at;
+''', (contour_count, contour_max_rowid, rtree_count, rtree_max_rowid))
+
+
+def advance_sqlite_sync_state(
+    conn: sqlite3.Connection,
+    watermarks_before: Tuple[int, int],
+    contour_delta: int,
+    rtree_suspended: bool = False,
+) -> None:
+    state = read_sqlite_sync_state(conn)
+    if rtree_suspended or state is None or (state['contour_max_rowid'], state['rtree_max_rowid']) != watermarks_before:
+        conn.execute('DELETE FROM building_contours_sync_state;')
+        return
+    record_sqlite_sync_state(conn, state['contour_count'] + contour_delta, state['rtree_count'] + contour_delta)
+
+
+@recorded_phase('rtree', rows=lambda result: None, outputs=_sqlite_output_paths)
+def rebuild_sqlite_rtree_if_needed(conn: sqlite3.Connection, verify: bool = False) -> None:
+    if sqlite_rtree_suspended(conn):
+        refill_suspended_sqlite_rtree(conn)
+        return
     if not ensure_sqlite_rtree_schema(conn):
         return
 
+    state = read_sqlite_sync_state(conn)
+    if not verify and state is not None and state['contour_count'] == state['rtree_count']:
+        if (state['contour_max_rowid'], state['rtree_max_rowid']) == _sqlite_rowid_watermarks(conn):
+            print(
+                f'building_contours_rtree consistency marker matches (rows={state["contour_count"]}, '
+                f'max_rowid={state["contour_max_rowid"]}); full check skipped.',
+                flush=True,
+            )
+            return
+
     contour_count = int(conn.execute('SELECT COUNT(*) FROM building_contours').fetchone()[0] or 0)
     rtree_count = int(conn.execute('SELECT COUNT(*) FROM building_contours_rtree').fetchone()[0] or 0)
     has_missing = conn.execute('''
@@ -509,14 +330,55 @@ LIMIT 1;
 
     if contour_count != rtree_count or has_missing or has_orphan:
         with conn:
-            conn.execute('DELETE FROM building_contours_rtree;')
-            conn.execute('''
+            rebuilt = fill_sqlite_rtree(conn)
+            record_sqlite_sync_state(conn, contour_count, rebuilt)
+        print(f'Rebuilt building_contours_rtree: {rebuilt} rows', flush=True)
+        return
+    with conn:
+        record_sqlite_sync_state(conn, contour_count, rtree_count)
+
+
+def fill_sqlite_rtree(conn: sqlite3.Connection) -> int:
+    # Latitude stripes, then longitude, keep consecutive inserts in the same R*Tree leaves.
+    conn.execute('DELETE FROM building_contours_rtree;')
+    conn.execute('''
 INSERT INTO building_contours_rtree (contour_rowid, min_lon, max_lon, min_lat, max_lat)
 SELECT rowid, min_lon, max_lon, min_lat, max_lat
-FROM building_contours;
+FROM building_contours
+ORDER BY CAST((min_lat + max_lat) * 50.0 AS INTEGER), min_lon + max_lon;
 ''')
-        rebuilt = int(conn.execute('SELECT COUNT(*) FROM building_contours_rtree').fetchone()[0] or 0)
-        print(f'Rebuilt building_contours_rtree: {rebuilt} rows', flush=True)
+    return int(conn.execute('SELECT COUNT(*) FROM building_contours_rtree').fetchone()[0] or 0)
+
+
+def sqlite_rtree_suspended(conn: sqlite3.Connection) -> bool:
+    names = {
+        str(row[0])
+        for row in conn.execute(
+            'SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?);',
+            ('building_contours_rtree', *SQLITE_RTREE_TRIGGERS),
+        ).fetchall()
+    }
+    return 'building_contours_rtree' in names and not set(SQLITE_RTREE_TRIGGERS) <= names
+
+
+def suspend_sqlite_rtree_triggers(conn: sqlite3.Connection) -> bool:
+    has_rtree = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'building_contours_rtree';"
+    ).fetchone() is not None
+    if not has_rtree:
+        return False
+    for trigger in SQLITE_RTREE_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger};')
+    return True
+
+
+def refill_suspended_sqlite_rtree(conn: sqlite3.Connection) -> int:
+    with conn:
+        rebuilt = fill_sqlite_rtree(conn)
+        ensure_sqlite_rtree_schema(conn)
+        record_sqlite_sync_state(conn, rebuilt, rebuilt)
+    print(f'Bulk-loaded building_contours_rtree: {rebuilt} rows', flush=True)
+    return rebuilt
 
 
 def migrate_sqlite_schema_for_duckdb(conn: sqlite3.Connection) -> None:
@@ -540,173 +402,142 @@ CREATE TABLE IF NOT EXISTS building_contours_new (
   max_lon REAL NOT NULL,
   max_lat REAL NOT NULL,
   updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  sync_generation INTEGER NOT NULL DEFAULT 0,
   PRIMARY KEY (osm_type, osm_id)
 );
 ''')
         conn.execute('''
 INSERT OR REPLACE INTO building_contours_new
-  (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at)
+  (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at, sync_generation)
 SELECT
-  osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at
+  osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at, sync_generation
 FROM building_contours;
 ''')
         conn.execute('DROP TABLE building_contours;')
         conn.execute('ALTER TABLE building_contours_new RENAME TO building_contours;')
+        conn.execute('DELETE FROM building_contours_sync_state;')
         conn.execute('''
 CREATE INDEX IF NOT EXISTS idx_building_contours_bbox
 ON building_contours (min_lon, max_lon, min_lat, max_lat);
 ''')
+        ensure_sqlite_sync_generation_schema(conn)
         ensure_sqlite_rtree_schema(conn)
 
 
 def run_quackosm_to_duckdb(pbf_path: str, work_dir: Path) -> Path:
-    duckdb_path = work_dir / 'quackosm-buildings.duckdb'
-    if duckdb_path.exists():
-        duckdb_path.unlink()
-
-    reader = PbfFileReader(
-        tags_filter={'building': True, 'building:part': True},
+    return convert_pbf_to_duckdb_cached(
+        Path(pbf_path),
+        work_dir / 'quackosm-buildings.duckdb',
         working_directory=work_dir,
-        verbosity_mode='transient'
-    )
-
-    reader.convert_pbf_to_duckdb(
-        pbf_path=pbf_path,
-        result_file_path=duckdb_path,
-        keep_all_tags=True,
-        explode_tags=False,
         ignore_cache=True,
-        duckdb_table_name='quackosm_raw'
     )
-    return duckdb_path
 
 
 def run_quackosm_extract_to_duckdb(extract_query: str, extract_source: str, work_dir: Path, index: int) -> Path:
     resolved_query = str(extract_query or '').strip()
     normalized_source = normalize_extract_source(extract_source)
-    get_extract_index(normalized_source)
-    resolved = resolve_exact_extract_alias(resolved_query, normalized_source)
-    if resolved.get('candidate'):
-        resolved_query = str(resolved['candidate'].get('extractId') or resolved_query).strip() or resolved_query
+    with import_phase('resolve', query=resolved_query) as record:
+        get_extract_index(normalized_source)
+        resolved = resolve_exact_extract_alias(resolved_query, normalized_source)
+        if resolved.get('candidate'):
+            resolved_query = str(resolved['candidate'].get('extractId') or resolved_query).strip() or resolved_query
+
+        from quackosm.osm_extracts import download_extract_by_query  # type: ignore
+
+        pbf_path = Path(download_extract_by_query(query=resolved_query, source=normalized_source))
+        record.update({'extractId': resolved_query, 'pbfBytes': pbf_path.stat().st_size})
 
     safe_slug = ''.join(ch if ch.isalnum() else '-' for ch in resolved_query.lower()).strip('-')
     if not safe_slug:
         safe_slug = 'extract'
     duckdb_path = work_dir / f'quackosm-buildings-{index:02d}-{safe_slug[:50]}.duckdb'
-    if duckdb_path.exists():
-        duckdb_path.unlink()
-
-    convert_osm_extract_to_duckdb(
-        osm_extract_query=resolved_query,
-        osm_extract_source=normalized_source,
-        tags_filter={'building': True, 'building:part': True},
-        result_file_path=duckdb_path,
-        keep_all_tags=True,
-        explode_tags=False,
-        ignore_cache=False,
-        duckdb_table_name='quackosm_raw',
-    )
-    return duckdb_path
-
-
-def _filtered_rows_cte_sql(import_limit: int) -> str:
-    limit_sql = f'LIMIT {int(import_limit)}' if import_limit > 0 else ''
-
-    return f'''
-WITH src AS (
-  SELECT
-    feature_id,
-    tags,
-    geometry,
-    ST_XMin(geometry) AS min_lon,
-    ST_YMin(geometry) AS min_lat,
-    ST_XMax(geometry) AS max_lon,
-    ST_YMax(geometry) AS max_lat
-  FROM quackosm_raw
-  WHERE geometry IS NOT NULL
-    AND split_part(feature_id, '/', 1) IN ('way', 'relation')
-    AND ST_GeometryType(geometry) IN ('POLYGON', 'MULTIPOLYGON')
-), filtered AS (
-  SELECT *
-  FROM src
-  ORDER BY feature_id
-  {limit_sql}
-)
-'''
+    return convert_pbf_to_duckdb_cached(pbf_path, duckdb_path, working_directory=work_dir)
 
 
-def _export_select_sql(import_limit: int, geometry_mode: str = 'geojson') -> str:
-    geometry_mode_normalized = str(geometry_mode or 'geojson').strip().lower() or 'geojson'
-    if geometry_mode_normalized == 'wkb_hex':
-        geometry_sql = 'ST_AsHEXWKB(geometry) AS geometry_wkb_hex'
-    elif geometry_mode_normalized in ('geojson', 'geojson_feature'):
-        geometry_sql = 'ST_AsGeoJSON(geometry) AS geometry_json'
-    else:
-        raise ValueError(f'Unsupported geometry export mode: {geometry_mode}')
-
-    return f'''
-{_filtered_rows_cte_sql(import_limit)}
-SELECT
-  split_part(feature_id, '/', 1) AS osm_type,
-  try_cast(split_part(feature_id, '/', 2) AS BIGINT) AS osm_id,
-  CAST(to_json(tags) AS VARCHAR) AS tags_json,
-  {geometry_sql},
-  min_lon,
-  min_lat,
-  max_lon,
-  max_lat
-FROM filtered
-WHERE try_cast(split_part(feature_id, '/', 2) AS BIGINT) IS NOT NULL;
-'''
-
-
-def _export_dual_select_sql(import_limit: int) -> str:
-    return f'''
-{_filtered_rows_cte_sql(import_limit)}
-SELECT
-  split_part(feature_id, '/', 1) AS osm_type,
-  try_cast(split_part(feature_id, '/', 2) AS BIGINT) AS osm_id,
-  CAST(to_json(tags) AS VARCHAR) AS tags_json,
-  ST_AsHEXWKB(geometry) AS geometry_wkb_hex,
-  ST_AsGeoJSON(geometry) AS geometry_json,
-  min_lon,
-  min_lat,
-  max_lon,
-  max_lat
-FROM filtered
-WHERE try_cast(split_part(feature_id, '/', 2) AS BIGINT) IS NOT NULL;
-'''
-
+def _import_rows_sqlite_staged(
+    duckdb_path: Path,
+    sqlite_conn: sqlite3.Connection,
+    import_limit: int,
+    run_marker: str,
+    sync_generation: int,
+    order: str = 'none',
+    rtree_bulk_load: bool = False,
+) -> int:
+    # DuckDB's sqlite extension has no ON CONFLICT, so rows are staged in a scratch SQLite file.
+    stage_path = duckdb_path.with_name(f'{duckdb_path.stem}.sqlite-stage.db')
+    if stage_path.exists():
+        stage_path.unlink()
+    try:
+        with connect_duckdb(duckdb_path, read_only=True) as con:
+            load_duckdb_extensions(con, ('spatial', 'sqlite'))
+            con.execute(f'ATTACH {sql_string_literal(str(stage_path))} AS stage (TYPE sqlite, READ_WRITE)')
+            row = con.execute(
+                f'CREATE TABLE stage.import_rows AS {export_copy_select_sql(import_limit, "sqlite", order)}'
+            ).fetchone()
+            imported = int(row[0] or 0) if row else 0
+            con.execute('DETACH stage')
+        if imported == 0:
+            return 0
 
-def _load_duckdb_extensions(con: duckdb.DuckDBPyConnection) -> None:
-    for ext in ('spatial',):
+        sqlite_conn.execute('ATTACH DATABASE ? AS stage', (str(stage_path),))
         try:
-            con.load_extension(ext)
-        except Exception:
-            con.install_extension(ext)
-            con.load_extension(ext)
-
-
-def import_rows_direct_duckdb_sqlite(
+            sqlite_conn.execute('BEGIN')
+            try:
+                watermarks_before = _sqlite_rowid_watermarks(sqlite_conn)
+                bulk_rtree = rtree_bulk_load and suspend_sqlite_rtree_triggers(sqlite_conn)
+                # "WHERE true" disambiguates the upsert clause from a join.
+                sqlite_conn.execute('''
+INSERT INTO building_contours
+  (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at, sync_generation)
+SELECT
+  osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, ?, ?
+FROM stage.import_rows
+WHERE true
+ON CONFLICT(osm_type, osm_id) DO UPDATE SET
+  tags_json = excluded.tags_json,
+  geometry_json = excluded.geometry_json,
+  min_lon = excluded.min_lon,
+  min_lat = excluded.min_lat,
+  max_lon = excluded.max_lon,
+  max_lat = excluded.max_lat,
+  updated_at = excluded.updated_at,
+  sync_generation = excluded.sync_generation;
+''', (run_marker, sync_generation))
+                inserted = int(sqlite_conn.execute(
+                    'SELECT COUNT(*) FROM building_contours WHERE rowid > ?',
+                    (watermarks_before[0],),
+                ).fetchone()[0] or 0)
+                advance_sqlite_sync_state(sqlite_conn, watermarks_before, inserted, rtree_suspended=bulk_rtree)
+                sqlite_conn.execute('COMMIT')
+            except Exception:
+                sqlite_conn.execute('ROLLBACK')
+                raise
+        finally:
+            sqlite_conn.execute('DETACH DATABASE stage')
+    finally:
+        if stage_path.exists():
+            stage_path.unlink()
+    return imported
+
+
+def _import_rows_sqlite_python(
     duckdb_path: Path,
     sqlite_conn: sqlite3.Connection,
     import_limit: int,
     run_marker: str,
-) -> Tuple[int, int]:
-    started_at = time.time()
-    select_sql = _export_select_sql(import_limit, 'geojson')
-
-    with duckdb.connect(str(duckdb_path)) as con:
-        _load_duckdb_extensions(con)
-        con.execute(f'CREATE OR REPLACE TEMP TABLE import_rows AS {select_sql}')
-        imported = int(con.execute('SELECT COUNT(*) FROM import_rows').fetchone()[0] or 0)
-        processed = imported
-        if imported == 0:
-            print('Progress: imported=0, processed=0, rate=0 rows/s', flush=True)
-            return 0, 0
+    sync_generation: int,
+    order: str = 'none',
+    rtree_bulk_load: bool = False,
+) -> int:
+    imported = 0
+    with connect_duckdb(duckdb_path, read_only=True) as con:
+        load_duckdb_extensions(con)
+        cursor = con.execute(export_copy_select_sql(import_limit, 'sqlite', order))
 
         sqlite_conn.execute('BEGIN')
         try:
+            watermarks_before = _sqlite_rowid_watermarks(sqlite_conn)
+            bulk_rtree = rtree_bulk_load and suspend_sqlite_rtree_triggers(sqlite_conn)
             sqlite_conn.execute('''
 CREATE TEMP TABLE IF NOT EXISTS _import_rows_tmp (
   osm_type TEXT NOT NULL,
@@ -726,175 +557,295 @@ INSERT INTO _import_rows_tmp
   (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat)
 VALUES (?, ?, ?, ?, ?, ?, ?, ?);
 '''
-            cursor = con.execute('''
-SELECT osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat
-FROM import_rows
-''')
+            # "WHERE true" disambiguates the upsert clause from a join.
+            upsert_sql = '''
+INSERT INTO building_contours
+  (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at, sync_generation)
+SELECT
+  osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, ?, ?
+FROM _import_rows_tmp
+WHERE true
+ON CONFLICT(osm_type, osm_id) DO UPDATE SET
+  tags_json = excluded.tags_json,
+  geometry_json = excluded.geometry_json,
+  min_lon = excluded.min_lon,
+  min_lat = excluded.min_lat,
+  max_lon = excluded.max_lon,
+  max_lat = excluded.max_lat,
+  updated_at = excluded.updated_at,
+  sync_generation = excluded.sync_generation;
+'''
             while True:
                 chunk = cursor.fetchmany(BATCH_SIZE)
                 if not chunk:
                     break
                 sqlite_conn.executemany(insert_tmp_sql, chunk)
-
-            sqlite_conn.execute('''
-DELETE FROM building_contours
-WHERE EXISTS (
-  SELECT 1
-  FROM _import_rows_tmp src
-  WHERE src.osm_type = building_contours.osm_type
-    AND src.osm_id = building_contours.osm_id
-);
-''')
-
-            sqlite_conn.execute('''
-INSERT INTO building_contours
-  (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at)
-SELECT
-  osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, ?
-FROM _import_rows_tmp;
-''', (run_marker,))
+                sqlite_conn.execute(upsert_sql, (run_marker, sync_generation))
+                sqlite_conn.execute('DELETE FROM _import_rows_tmp;')
+                imported += len(chunk)
+            if imported == 0:
+                sqlite_conn.execute('ROLLBACK')
+                return 0
+
+            inserted = int(sqlite_conn.execute(
+                'SELECT COUNT(*) FROM building_contours WHERE rowid > ?',
+                (watermarks_before[0],),
+            ).fetchone()[0] or 0)
+            advance_sqlite_sync_state(sqlite_conn, watermarks_before, inserted, rtree_suspended=bulk_rtree)
             sqlite_conn.execute('COMMIT')
         except Exception:
             sqlite_conn.execute('ROLLBACK')
             raise
+    return imported
 
-        elapsed = max(0.001, time.time() - started_at)
-        rate = imported / elapsed
-        if import_limit > 0:
-            left = max(0, import_limit - imported)
-            eta_min = left / max(rate, 0.001) / 60.0
-            print(
-                f'Progress: imported={imported}/{import_limit}, left~{left}, '
-                f'processed={processed}, rate={rate:.0f} rows/s, eta={eta_min:.1f} min',
-                flush=True,
+
+@recorded_phase('sqlite-apply', rows=lambda result: result[1], outputs=_sqlite_output_paths)
+def import_rows_direct_duckdb_sqlite(
+    duckdb_path: Path,
+    sqlite_conn: sqlite3.Connection,
+    import_limit: int,
+    run_marker: str,
+    sync_generation: int,
+    order: str = 'none',
+    engine: str = 'duckdb',
+    rtree_bulk_load: bool = False,
+) -> Tuple[int, int]:
+    started_at = time.time()
+    imported: int | None = None
+    if engine == 'duckdb':
+        try:
+            imported = _import_rows_sqlite_staged(
+                duckdb_path, sqlite_conn, import_limit, run_marker, sync_generation, order, rtree_bulk_load
             )
-        else:
-            print(f'Progress: imported={imported}, processed={processed}, rate={rate:.0f} rows/s', flush=True)
+        except duckdb.Error as exc:
+            print(f'DuckDB SQLite staging failed ({exc}); falling back to the Python SQLite engine.', flush=True)
+    if imported is None:
+        imported = _import_rows_sqlite_python(
+            duckdb_path, sqlite_conn, import_limit, run_marker, sync_generation, order, rtree_bulk_load
+        )
+    processed = imported
+    if imported == 0:
+        print('Progress: imported=0, processed=0, rate=0 rows/s', flush=True)
+        return 0, 0
 
-        return processed, imported
+    elapsed = max(0.001, time.time() - started_at)
+    rate = imported / elapsed
+    if import_limit > 0:
+        left = max(0, import_limit - imported)
+        eta_min = left / max(rate, 0.001) / 60.0
+        print(
+            f'Progress: imported={imported}/{import_limit}, left~{left}, '
+            f'processed={processed}, rate={rate:.0f} rows/s, eta={eta_min:.1f} min',
+            flush=True,
+        )
+    else:
+        print(f'Progress: imported={imported}, processed={processed}, rate={rate:.0f} rows/s', flush=True)
 
+    return processed, imported
 
-def export_rows_duckdb_ndjson(
-    duckdb_path: Path,
-    out_path: Path,
-    import_limit: int,
-    geometry_mode: str = 'geojson',
-    append: bool = False,
-) -> Tuple[int, int, dict[str, float] | None]:
-    geometry_mode_normalized = str(geometry_mode or 'geojson').strip().lower() or 'geojson'
-    select_sql = _export_select_sql(import_limit, geometry_mode_normalized)
-    mode = 'a' if append else 'w'
+
+def _shard_path(path: Path | None, index: int) -> Path | None:
+    if path is None:
+        return None
+    return path.with_name(f'{path.name}.shard-{index:02d}')
+
+
+def _run_extract_shard(task: dict[str, Any]) -> dict[str, Any]:
+    drain_import_phase_records()
+    apply_duckdb_resources(task['duckdb_resources'])
+    if task['profile_dir']:
+        start_import_profile(Path(task['profile_dir']), prefix=f'shard-{int(task["index"]):02d}')
+    try:
+        return _export_extract_shard(task)
+    finally:
+        dump_import_profile(f'python-shard-{int(task["index"]):02d}.pstats')
+
+
+def _export_extract_shard(task: dict[str, Any]) -> dict[str, Any]:
+    duckdb_path = run_quackosm_extract_to_duckdb(
+        task['query'],
+        task['extract_source'],
+        Path(task['work_dir']),
+        int(task['index']),
+    )
+    shard_paths = [Path(value) if value else None for value in task['shard_paths']]
     processed = 0
     imported = 0
     bounds: dict[str, float] | None = None
+    feature_kind_counts: dict[str, int] = {}
+    if any(path is not None for path in shard_paths):
+        processed, imported, bounds, feature_kind_counts = export_rows_to_outputs(
+            duckdb_path,
+            *shard_paths[:3],
+            db_parquet_path=shard_paths[3],
+            db_pgcopy_path=shard_paths[4],
+            import_limit=0,
+            engine=str(task['engine']),
+            order=str(task['order']),
+        )
+    return {
+        'duckdb_path': str(duckdb_path),
+        'processed': processed,
+        'imported': imported,
+        'bounds': bounds,
+        'feature_kind_counts': feature_kind_counts,
+        'phase_records': drain_import_phase_records(),
+    }
 
-    with duckdb.connect(str(duckdb_path)) as con:
-        _load_duckdb_extensions(con)
-        cursor = con.execute(select_sql)
-        with out_path.open(mode, encoding='utf-8') as out:
-            while True:
-                chunk = cursor.fetchmany(BATCH_SIZE)
-                if not chunk:
-                    break
-                for row in chunk:
-                    if geometry_mode_normalized == 'wkb_hex':
-                        payload = {
-                            'osm_type': row[0],
-                            'osm_id': int(row[1]),
-                            'tags_json': row[2],
-                            'feature_kind': derive_feature_kind_from_tags_json(row[2]),
-                            'min_lon': float(row[4]),
-                            'min_lat': float(row[5]),
-                            'max_lon': float(row[6]),
-                            'max_lat': float(row[7]),
-                        }
-                        payload['geometry_wkb_hex'] = str(row[3])
-                        out.write(json.dumps(payload, ensure_ascii=False))
-                        out.write('\n')
-                    elif geometry_mode_normalized == 'geojson_feature':
-                        out.write(build_geojson_feature_line(str(row[0]), int(row[1]), str(row[3]), str(row[2])))
-                    else:
-                        payload = {
-                            'osm_type': row[0],
-                            'osm_id': int(row[1]),
-                            'tags_json': row[2],
-                            'feature_kind': derive_feature_kind_from_tags_json(row[2]),
-                            'min_lon': float(row[4]),
-                            'min_lat': float(row[5]),
-                            'max_lon': float(row[6]),
-                            'max_lat': float(row[7]),
-                        }
-                        payload['geometry_json'] = row[3]
-                        out.write(json.dumps(payload, ensure_ascii=False))
-                        out.write('\n')
-                    processed += 1
-                    imported += 1
-                    bounds = merge_bounds(bounds, float(row[4]), float(row[5]), float(row[6]), float(row[7]))
-
-    return processed, imported, bounds
-
-
-def export_rows_duckdb_dual_ndjson(
-    duckdb_path: Path,
-    db_out_path: Path,
-    geojson_out_path: Path,
+
+def run_extract_queries_parallel(
+    extract_queries: list[str],
+    extract_source: str,
+    work_dir: Path,
+    jobs: int,
     import_limit: int,
-    append: bool = False,
-) -> Tuple[int, int, dict[str, float] | None]:
-    select_sql = _export_dual_select_sql(import_limit)
-    mode = 'a' if append else 'w'
+    ndjson_path: Path | None,
+    db_ndjson_path: Path | None,
+    geojson_ndjson_path: Path | None,
+    sqlite_conn: sqlite3.Connection | None,
+    run_marker: str,
+    sync_generation: int = 0,
+    engine: str = 'copy',
+    order: str = 'none',
+    db_parquet_path: Path | None = None,
+    db_pgcopy_path: Path | None = None,
+    sqlite_engine: str = 'duckdb',
+    rtree_bulk_load: bool = False,
+) -> Tuple[int, int, dict[str, float] | None, dict[str, int]]:
+    output_paths = [ndjson_path, db_ndjson_path, geojson_ndjson_path, db_parquet_path, db_pgcopy_path]
+    appenders = [append_file, append_file, append_file, append_parquet_file, append_pgcopy_file]
+    export_mode = any(path is not None for path in output_paths)
+    for path in output_paths[:3]:
+        if path is not None:
+            path.write_bytes(b'')
+    for path in output_paths[3:]:
+        if path is not None and path.exists():
+            path.unlink()
+
     processed = 0
     imported = 0
-    bounds: dict[str, float] | None = None
+    export_bounds: dict[str, float] | None = None
+    export_feature_kind_counts: dict[str, int] = {}
+    shard_paths_by_index: dict[int, list[Path | None]] = {}
+    futures: dict[int, Future] = {}
+    queued = iter(enumerate(extract_queries, start=1))
+
+    def submit_next() -> None:
+        item = next(queued, None)
+        if item is None:
+            return
+        idx, query = item
+        shard_paths = [_shard_path(path, idx) if import_limit <= 0 else None for path in output_paths]
+        shard_paths_by_index[idx] = shard_paths
+        print(f'[{idx}/{len(extract_queries)}] Loading extract: source={extract_source}, id={query}', flush=True)
+        futures[idx] = executor.submit(_run_extract_shard, {
+            'query': query,
+            'extract_source': extract_source,
+            'work_dir': str(work_dir),
+            'index': idx,
+            'engine': engine,
+            'order': order,
+            'shard_paths': [str(path) if path is not None else None for path in shard_paths],
+            'profile_dir': str(import_profile_dir()) if import_profile_dir() is not None else None,
+            'duckdb_resources': duckdb_resource_settings(),
+        })
 
-    with duckdb.connect(str(duckdb_path)) as con:
-        _load_duckdb_extensions(con)
-        cursor = con.execute(select_sql)
-        with db_out_path.open(mode, encoding='utf-8') as db_out, geojson_out_path.open(mode, encoding='utf-8') as geojson_out:
-            while True:
-                chunk = cursor.fetchmany(BATCH_SIZE)
-                if not chunk:
-                    break
-                for row in chunk:
-                    osm_type = str(row[0])
-                    osm_id = int(row[1])
-                    min_lon = float(row[5])
-                    min_lat = float(row[6])
-                    max_lon = float(row[7])
-                    max_lat = float(row[8])
-
-                    db_out.write(json.dumps({
-                        'osm_type': osm_type,
-                        'osm_id': osm_id,
-                        'tags_json': row[2],
-                        'feature_kind': derive_feature_kind_from_tags_json(row[2]),
-                        'geometry_wkb_hex': str(row[3]),
-                        'min_lon': min_lon,
-                        'min_lat': min_lat,
-                        'max_lon': max_lon,
-                        'max_lat': max_lat,
-                    }, ensure_ascii=False))
-                    db_out.write('\n')
-
-                    geojson_out.write(build_geojson_feature_line(osm_type, osm_id, str(row[4]), str(row[2])))
-
-                    processed += 1
-                    imported += 1
-                    bounds = merge_bounds(bounds, min_lon, min_lat, max_lon, max_lat)
-
-    return processed, imported, bounds
-
-
-def cleanup_stale(conn: sqlite3.Connection, import_limit: int, run_marker: str) -> int:
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        for _ in range(jobs if import_limit > 0 else len(extract_queries)):
+            submit_next()
+
+        for idx in range(1, len(extract_queries) + 1):
+            if import_limit > 0 and imported >= import_limit:
+                print(f'IMPORT_LIMIT reached: {import_limit}', flush=True)
+                break
+            if idx > 1:
+                submit_next()
+            result = futures[idx].result()
+            record_import_phases(result['phase_records'])
+            per_query_limit = max(0, import_limit - imported) if import_limit > 0 else 0
+            duckdb_path = Path(result['duckdb_path'])
+
+            if not export_mode:
+                p, i = import_rows_direct_duckdb_sqlite(
+                    duckdb_path=duckdb_path,
+                    sqlite_conn=sqlite_conn,
+                    import_limit=per_query_limit,
+                    run_marker=run_marker,
+                    sync_generation=sync_generation,
+                    order=order,
+                    engine=sqlite_engine,
+                    rtree_bulk_load=rtree_bulk_load,
+                )
+                processed += p
+                imported += i
+                continue
+
+            if import_limit > 0:
+                p, i, bounds, feature_kind_counts = export_rows_to_outputs(
+                    duckdb_path,
+                    *output_paths[:3],
+                    db_parquet_path=db_parquet_path,
+                    db_pgcopy_path=db_pgcopy_path,
+                    import_limit=per_query_limit,
+                    append=True,
+                    engine=engine,
+                    order=order,
+                )
+            else:
+                p = int(result['processed'])
+                i = int(result['imported'])
+                bounds = result['bounds']
+                feature_kind_counts = result['feature_kind_counts']
+                for shard_path, out_path, append_shard in zip(shard_paths_by_index[idx], output_paths, appenders):
+                    if shard_path is not None and out_path is not None:
+                        append_shard(shard_path, out_path)
+            print(f'[{idx}/{len(extract_queries)}] Merged extract shard: exported={i}', flush=True)
+
+            processed += p
+            imported += i
+            export_feature_kind_counts = merge_feature_kind_counts(export_feature_kind_counts, feature_kind_counts)
+            if bounds is not None:
+                export_bounds = merge_bounds(
+                    export_bounds,
+                    bounds['west'],
+                    bounds['south'],
+                    bounds['east'],
+                    bounds['north'],
+                )
+    finally:
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        for shard_paths in shard_paths_by_index.values():
+            for shard_path in shard_paths:
+                if shard_path is not None and shard_path.exists():
+                    shard_path.unlink()
+
+    return processed, imported, export_bounds, export_feature_kind_counts
+
+
+@recorded_phase('cleanup', rows=lambda result: result, outputs=_sqlite_output_paths)
+def cleanup_stale(conn: sqlite3.Connection, import_limit: int, sync_generation: int, rtree_bulk_load: bool = False) -> int:
     if import_limit > 0:
         print('IMPORT_LIMIT active, deletion of stale buildings skipped.', flush=True)
         return 0
 
-    cur = conn.execute('''
+    conn.execute('BEGIN')
+    try:
+        watermarks_before = _sqlite_rowid_watermarks(conn)
+        bulk_rtree = rtree_bulk_load and suspend_sqlite_rtree_triggers(conn)
+        cur = conn.execute('''
 DELETE FROM building_contours
-WHERE updated_at <> ?;
-''', (run_marker,))
-    return cur.rowcount if cur.rowcount is not None else 0
+WHERE sync_generation < ?;
+''', (sync_generation,))
+        deleted = cur.rowcount if cur.rowcount is not None else 0
+        advance_sqlite_sync_state(conn, watermarks_before, -deleted, rtree_suspended=bulk_rtree)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return deleted
 
 
 def print_json(payload: dict[str, Any]) -> None:
@@ -902,6 +853,105 @@ def print_json(payload: dict[str, Any]) -> None:
     sys.stdout.write('\n')
 
 
+def read_resolve_batch(path_value: str, default_source: str) -> list[Tuple[str, str]]:
+    if path_value == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        batch_path = Path(path_value).expanduser().resolve()
+        if not batch_path.exists():
+            raise FileNotFoundError(str(batch_path))
+        lines = batch_path.read_text(encoding='utf-8').splitlines()
+
+    requests: list[Tuple[str, str]] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if line.lstrip().startswith('{'):
+            try:
+                item = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f'Invalid JSON in resolve batch line {line_number}: {exc}') from exc
+            requests.append((str(item.get('query') or ''), str(item.get('source') or default_source)))
+            continue
+        query, _, source = line.partition('\t')
+        requests.append((query, source.strip() or default_source))
+    return requests
+
+
+def resolve_exact_extract_batch(requests: list[Tuple[str, str]]) -> None:
+    started_at = time.perf_counter()
+    for query, source in requests:
+        try:
+            result = resolve_exact_extract(query=query, source=source)
+        except ValueError as exc:
+            result = {
+                'candidate': None,
+                'errorCode': 'invalid_request',
+                'message': str(exc),
+                'matchingExtractIds': [],
+            }
+        print_json({'query': query, 'source': source, **result})
+        sys.stdout.flush()
+    print(
+        f'Resolved {len(requests)} extract queries in {time.perf_counter() - started_at:.2f}s',
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+SERVE_METHODS = {
+    'ping': lambda params: {'ok': True},
+    'searchExtractCandidates': lambda params: search_extract_candidates(
+        query=str(params.get('query') or ''),
+        source=str(params.get('source') or 'any'),
+        limit=int(params.get('limit') or 12),
+    ),
+    'resolveExactExtract': lambda params: resolve_exact_extract(
+        query=str(params.get('query') or ''),
+        source=str(params.get('source') or 'any'),
+    ),
+    'refreshExtractIndex': lambda params: refresh_extract_index(str(params.get('source') or 'any')),
+}
+
+
+def serve_json_lines(input_stream: Any, output_stream: Any, workers: int) -> None:
+    write_lock = threading.Lock()
+
+    def respond(payload: dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False)
+        with write_lock:
+            output_stream.write(line)
+            output_stream.write('\n')
+            output_stream.flush()
+
+    def handle(request_id: Any, method: str, params: dict[str, Any]) -> None:
+        handler = SERVE_METHODS.get(method)
+        if handler is None:
+            respond({'id': request_id, 'error': {'message': f'Unknown method: {method}'}})
+            return
+        try:
+            respond({'id': request_id, 'result': handler(params)})
+        except Exception as exc:
+            respond({'id': request_id, 'error': {'message': str(exc) or type(exc).__name__, 'type': type(exc).__name__}})
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for raw_line in input_stream:
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('request must be a JSON object')
+                params = request.get('params') or {}
+                if not isinstance(params, dict):
+                    raise ValueError('params must be a JSON object')
+            except ValueError as exc:
+                respond({'id': None, 'error': {'message': f'Invalid request: {exc}'}})
+                continue
+            executor.submit(handle, request.get('id'), str(request.get('method') or ''), params)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument('--pbf', required=False)
@@ -909,14 +959,61 @@ def main() -> None:
     parser.add_argument('--extract-source', default='any')
     parser.add_argument('--resolve-extract-query', required=False)
     parser.add_argument('--resolve-exact-extract', required=False)
+    parser.add_argument('--resolve-batch', required=False)
+    parser.add_argument('--refresh-extract-index', action='store_true')
+    parser.add_argument('--serve', action='store_true')
+    parser.add_argument('--serve-workers', type=int, default=4)
     parser.add_argument('--no-count-pass', action='store_true')
     parser.add_argument('--out-ndjson', required=False)
     parser.add_argument('--out-db-ndjson', required=False)
     parser.add_argument('--out-geojson-ndjson', required=False)
     parser.add_argument('--out-summary-json', required=False)
+    parser.add_argument('--out-db-parquet', required=False)
+    parser.add_argument('--out-db-pgcopy', required=False)
     parser.add_argument('--limit', type=int, default=12)
+    parser.add_argument('--jobs', type=int, default=int(os.getenv('PBF_EXTRACT_JOBS', '1') or '1'))
+    parser.add_argument(
+        '--export-engine',
+        choices=('copy', 'python'),
+        default=str(os.getenv('PBF_EXPORT_ENGINE', 'copy') or 'copy').strip().lower(),
+    )
+    parser.add_argument(
+        '--order',
+        choices=EXPORT_ORDERS,
+        default=str(os.getenv('PBF_EXPORT_ORDER', 'none') or 'none').strip().lower(),
+    )
+    parser.add_argument('--out-snapshot', required=False)
+    parser.add_argument('--delta-against', required=False)
+    parser.add_argument('--out-delta-dir', required=False)
+    parser.add_argument('--rtree-bulk-load', action='store_true')
+    parser.add_argument('--verify-rtree', action='store_true')
+    parser.add_argument(
+        '--sqlite-engine',
+        choices=SQLITE_ENGINES,
+        default=str(os.getenv('PBF_SQLITE_ENGINE', 'duckdb') or 'duckdb').strip().lower(),
+    )
+    parser.add_argument('--delta-geometry', choices=('wkb_hex', 'geojson'), default='wkb_hex')
+    parser.add_argument('--apply-osc', required=False)
+    parser.add_argument('--region-duckdb', required=False)
+    parser.add_argument('--events-jsonl', default=str(os.getenv('IMPORTER_EVENTS_JSONL', '') or '').strip() or None)
+    parser.add_argument('--metrics-prom', default=str(os.getenv('IMPORTER_METRICS_PROM', '') or '').strip() or None)
+    parser.add_argument('--profile', required=False)
     args = parser.parse_args()
 
+    if args.serve:
+        if int(args.serve_workers or 0) < 1:
+            raise ValueError('--serve-workers must be a positive integer')
+        response_stream = sys.stdout
+        sys.stdout = sys.stderr
+        serve_json_lines(sys.stdin, response_stream, int(args.serve_workers))
+        return
+
+    if args.refresh_extract_index:
+        if args.resolve_extract_query is None and args.resolve_exact_extract is None and args.resolve_batch is None:
+            print_json(refresh_extract_index(args.extract_source))
+            return
+        invalidate_extract_index_cache(normalize_extract_source(args.extract_source))
+
     if args.resolve_extract_query is not None:
         print_json(search_extract_candidates(
             query=args.resolve_extract_query,
@@ -932,6 +1029,46 @@ def main() -> None:
         ))
         return
 
+    if args.resolve_batch is not None:
+        resolve_exact_extract_batch(read_resolve_batch(args.resolve_batch, args.extract_source))
+        return
+
+    start_import_run('apply-osc' if args.apply_osc is not None else 'import', args.events_jsonl, args.metrics_prom)
+    if args.profile:
+        start_import_profile(Path(args.profile).expanduser().resolve())
+
+    if args.apply_osc is not None:
+        osc_path = Path(args.apply_osc).expanduser().resolve()
+        if not osc_path.exists():
+            raise FileNotFoundError(str(osc_path))
+        region_duckdb = str(args.region_duckdb or '').strip()
+        if not region_duckdb:
+            raise ValueError('--apply-osc requires --region-duckdb')
+        osc_pbf = str(args.pbf or '').strip()
+        if osc_pbf and not os.path.exists(osc_pbf):
+            raise FileNotFoundError(osc_pbf)
+        osc_summary_json = str(args.out_summary_json or '').strip()
+        configure_duckdb_resources(announce=True)
+        affected, rebuilt, bounds, feature_kind_counts, delta_counts = apply_osc_to_region_duckdb(
+            duckdb_path=Path(region_duckdb).expanduser().resolve(),
+            osc_path=osc_path,
+            pbf_path=Path(osc_pbf).expanduser().resolve() if osc_pbf else None,
+            delta_dir=Path(args.out_delta_dir).expanduser().resolve() if args.out_delta_dir else None,
+            geometry_mode=str(args.delta_geometry or 'wkb_hex'),
+            order=str(args.order or 'none'),
+        )
+        if osc_summary_json:
+            write_export_summary(
+                Path(osc_summary_json).expanduser().resolve(),
+                affected,
+                rebuilt,
+                bounds,
+                feature_kind_counts,
+                delta_counts,
+            )
+        finish_import('ok', processed=affected, imported=rebuilt)
+        return
+
     extract_queries = list(args.extract_query or [])
     dedup = []
     seen = set()
@@ -955,13 +1092,40 @@ def main() -> None:
     with_count_pass = str(os.getenv('PBF_PROGRESS_COUNT_PASS', 'true')).strip().lower() == 'true'
     if args.no_count_pass:
         with_count_pass = False
+    jobs = int(args.jobs or 1)
+    if jobs < 1:
+        raise ValueError('--jobs must be a positive integer')
+    export_engine = str(args.export_engine or 'copy')
+    export_order = str(args.order or 'none')
+    if export_order not in EXPORT_ORDERS:
+        raise ValueError(f'--order must be one of: {", ".join(EXPORT_ORDERS)}')
+    sqlite_engine = str(args.sqlite_engine or 'duckdb')
+    if sqlite_engine not in SQLITE_ENGINES:
+        raise ValueError(f'--sqlite-engine must be one of: {", ".join(SQLITE_ENGINES)}')
+    rtree_bulk_load = bool(args.rtree_bulk_load) or str(os.getenv('PBF_RTREE_BULK_LOAD', 'false')).strip().lower() == 'true'
 
     out_ndjson = str(args.out_ndjson or '').strip()
     out_db_ndjson = str(args.out_db_ndjson or '').strip()
     out_geojson_ndjson = str(args.out_geojson_ndjson or '').strip()
     out_summary_json = str(args.out_summary_json or '').strip()
+    out_db_parquet = str(args.out_db_parquet or '').strip()
+    out_db_pgcopy = str(args.out_db_pgcopy or '').strip()
+    out_snapshot = str(args.out_snapshot or '').strip()
+    delta_against = str(args.delta_against or '').strip()
+    out_delta_dir = str(args.out_delta_dir or '').strip()
+    if bool(delta_against) != bool(out_delta_dir):
+        raise ValueError('--delta-against and --out-delta-dir must be used together')
+    if out_snapshot or delta_against:
+        if import_limit > 0:
+            raise ValueError('--out-snapshot/--delta-against cannot be combined with IMPORT_LIMIT')
+        if len(extract_queries) > 1:
+            raise ValueError('--out-snapshot/--delta-against support a single --pbf or --extract-query input')
+    if delta_against and not os.path.exists(delta_against):
+        raise FileNotFoundError(delta_against)
     if out_ndjson and (out_db_ndjson or out_geojson_ndjson):
         raise ValueError('Use either --out-ndjson or --out-db-ndjson/--out-geojson-ndjson')
+    if out_db_parquet and out_db_pgcopy:
+        raise ValueError('Use either --out-db-parquet or --out-db-pgcopy')
     if out_db_ndjson and out_geojson_ndjson:
         db_candidate = Path(out_db_ndjson).expanduser().resolve()
         geojson_candidate = Path(out_geojson_ndjson).expanduser().resolve()
@@ -970,11 +1134,15 @@ def main() -> None:
 
     conn = None
     run_marker = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
-    if not out_ndjson and not out_db_ndjson and not out_geojson_ndjson:
+    sync_generation = 0
+    row_export_mode = bool(out_ndjson or out_db_ndjson or out_geojson_ndjson or out_db_parquet or out_db_pgcopy)
+    export_mode = row_export_mode or bool(out_snapshot or out_delta_dir)
+    if not export_mode:
         db_path = str((Path(os.getenv('OSM_DB_PATH', '')).expanduser().resolve()) if os.getenv('OSM_DB_PATH') else (Path(os.path.dirname(__file__)) / '..' / 'data' / 'osm.db').resolve())
         conn = sqlite3.connect(db_path)
         ensure_sqlite_schema(conn)
         migrate_sqlite_schema_for_duckdb(conn)
+        sync_generation = next_sqlite_sync_generation(conn)
 
     print(
         f'Progress settings: every={progress_every}, count_pass={with_count_pass} (count_pass ignored for QuackOSM)',
@@ -982,17 +1150,25 @@ def main() -> None:
     )
     print('City filter: disabled (removed from importer)', flush=True)
 
-    work_dir = Path(os.path.dirname(__file__)).resolve().parent / 'data' / 'quackosm'
+    work_dir = QUACKOSM_DATA_DIR
     work_dir.mkdir(parents=True, exist_ok=True)
+    parallel_jobs = min(jobs, len(extract_queries)) if len(extract_queries) > 1 else 1
+    configure_duckdb_resources(jobs=parallel_jobs, work_dir=work_dir, announce=True)
 
     processed = 0
     imported = 0
     export_bounds: dict[str, float] | None = None
+    export_feature_kind_counts: dict[str, int] = {}
     ndjson_path = Path(out_ndjson).expanduser().resolve() if out_ndjson else None
     db_ndjson_path = Path(out_db_ndjson).expanduser().resolve() if out_db_ndjson else None
     geojson_ndjson_path = Path(out_geojson_ndjson).expanduser().resolve() if out_geojson_ndjson else None
     summary_json_path = Path(out_summary_json).expanduser().resolve() if out_summary_json else None
-    for candidate_path in (ndjson_path, db_ndjson_path, geojson_ndjson_path, summary_json_path):
+    db_parquet_path = Path(out_db_parquet).expanduser().resolve() if out_db_parquet else None
+    db_pgcopy_path = Path(out_db_pgcopy).expanduser().resolve() if out_db_pgcopy else None
+    snapshot_path = Path(out_snapshot).expanduser().resolve() if out_snapshot else None
+    delta_dir_path = Path(out_delta_dir).expanduser().resolve() if out_delta_dir else None
+    delta_counts: dict[str, int] | None = None
+    for candidate_path in (ndjson_path, db_ndjson_path, geojson_ndjson_path, db_parquet_path, db_pgcopy_path, summary_json_path):
         if candidate_path is not None:
             candidate_path.parent.mkdir(parents=True, exist_ok=True)
             if candidate_path.exists():
@@ -1000,121 +1176,141 @@ def main() -> None:
 
     if extract_queries:
         print(f'Extract import started (QuackOSM + DuckDB): source={extract_source}, queries={extract_queries}', flush=True)
-        for idx, query in enumerate(extract_queries, start=1):
-            if import_limit > 0 and imported >= import_limit:
-                print(f'IMPORT_LIMIT reached: {import_limit}', flush=True)
-                break
-            print(f'[{idx}/{len(extract_queries)}] Loading extract: source={extract_source}, id={query}', flush=True)
-            duckdb_path = run_quackosm_extract_to_duckdb(query, extract_source, work_dir, idx)
-            per_query_limit = max(0, import_limit - imported) if import_limit > 0 else 0
-            if ndjson_path is not None:
-                p, i, bounds = export_rows_duckdb_ndjson(
-                    duckdb_path=duckdb_path,
-                    out_path=ndjson_path,
-                    import_limit=per_query_limit,
-                    geometry_mode='geojson',
-                    append=(idx > 1),
-                )
-            elif db_ndjson_path is not None or geojson_ndjson_path is not None:
-                if db_ndjson_path is not None and geojson_ndjson_path is not None:
-                    p, i, bounds = export_rows_duckdb_dual_ndjson(
-                        duckdb_path=duckdb_path,
-                        db_out_path=db_ndjson_path,
-                        geojson_out_path=geojson_ndjson_path,
-                        import_limit=per_query_limit,
-                        append=(idx > 1),
-                    )
-                elif db_ndjson_path is not None:
-                    p, i, bounds = export_rows_duckdb_ndjson(
+        if jobs > 1 and len(extract_queries) > 1:
+            print(f'Extract worker pool: jobs={min(jobs, len(extract_queries))}', flush=True)
+            processed, imported, export_bounds, export_feature_kind_counts = run_extract_queries_parallel(
+                extract_queries=extract_queries,
+                extract_source=extract_source,
+                work_dir=work_dir,
+                jobs=min(jobs, len(extract_queries)),
+                import_limit=import_limit,
+                ndjson_path=ndjson_path,
+                db_ndjson_path=db_ndjson_path,
+                geojson_ndjson_path=geojson_ndjson_path,
+                sqlite_conn=conn,
+                run_marker=run_marker,
+                sync_generation=sync_generation,
+                engine=export_engine,
+                order=export_order,
+                db_parquet_path=db_parquet_path,
+                db_pgcopy_path=db_pgcopy_path,
+                sqlite_engine=sqlite_engine,
+                rtree_bulk_load=rtree_bulk_load,
+            )
+        else:
+            for idx, query in enumerate(extract_queries, start=1):
+                if import_limit > 0 and imported >= import_limit:
+                    print(f'IMPORT_LIMIT reached: {import_limit}', flush=True)
+                    break
+                print(f'[{idx}/{len(extract_queries)}] Loading extract: source={extract_source}, id={query}', flush=True)
+                duckdb_path = run_quackosm_extract_to_duckdb(query, extract_source, work_dir, idx)
+                per_query_limit = max(0, import_limit - imported) if import_limit > 0 else 0
+                if row_export_mode:
+                    p, i, bounds, feature_kind_counts = export_rows_to_outputs(
                         duckdb_path=duckdb_path,
-                        out_path=db_ndjson_path,
+                        ndjson_path=ndjson_path,
+                        db_ndjson_path=db_ndjson_path,
+                        geojson_ndjson_path=geojson_ndjson_path,
                         import_limit=per_query_limit,
-                        geometry_mode='wkb_hex',
                         append=(idx > 1),
+                        engine=export_engine,
+                        order=export_order,
+                        db_parquet_path=db_parquet_path,
+                        db_pgcopy_path=db_pgcopy_path,
                     )
+                elif export_mode:
+                    p, i, bounds, feature_kind_counts = 0, 0, None, {}
                 else:
-                    p, i, bounds = export_rows_duckdb_ndjson(
+                    p, i = import_rows_direct_duckdb_sqlite(
                         duckdb_path=duckdb_path,
-                        out_path=geojson_ndjson_path,
+                        sqlite_conn=conn,
                         import_limit=per_query_limit,
-                        geometry_mode='geojson_feature',
-                        append=(idx > 1),
+                        run_marker=run_marker,
+                        sync_generation=sync_generation,
+                        order=export_order,
+                        engine=sqlite_engine,
+                        rtree_bulk_load=rtree_bulk_load,
+                    )
+                    bounds = None
+                    feature_kind_counts = {}
+                processed += p
+                imported += i
+                export_feature_kind_counts = merge_feature_kind_counts(export_feature_kind_counts, feature_kind_counts)
+                if bounds is not None:
+                    export_bounds = merge_bounds(
+                        export_bounds,
+                        bounds['west'],
+                        bounds['south'],
+                        bounds['east'],
+                        bounds['north'],
                     )
-            else:
-                p, i = import_rows_direct_duckdb_sqlite(
-                    duckdb_path=duckdb_path,
-                    sqlite_conn=conn,
-                    import_limit=per_query_limit,
-                    run_marker=run_marker,
-                )
-                bounds = None
-            processed += p
-            imported += i
-            if bounds is not None:
-                export_bounds = merge_bounds(
-                    export_bounds,
-                    bounds['west'],
-                    bounds['south'],
-                    bounds['east'],
-                    bounds['north'],
-                )
     else:
         print(f'PBF import started (QuackOSM + DuckDB): {pbf_path}', flush=True)
         duckdb_path = run_quackosm_to_duckdb(pbf_path, work_dir)
-        if ndjson_path is not None:
-            processed, imported, export_bounds = export_rows_duckdb_ndjson(
+        if row_export_mode:
+            processed, imported, export_bounds, export_feature_kind_counts = export_rows_to_outputs(
                 duckdb_path=duckdb_path,
-                out_path=ndjson_path,
+                ndjson_path=ndjson_path,
+                db_ndjson_path=db_ndjson_path,
+                geojson_ndjson_path=geojson_ndjson_path,
                 import_limit=import_limit,
-                geometry_mode='geojson',
                 append=False,
+                engine=export_engine,
+                order=export_order,
+                db_parquet_path=db_parquet_path,
+                db_pgcopy_path=db_pgcopy_path,
             )
-        elif db_ndjson_path is not None or geojson_ndjson_path is not None:
-            if db_ndjson_path is not None and geojson_ndjson_path is not None:
-                processed, imported, export_bounds = export_rows_duckdb_dual_ndjson(
-                    duckdb_path=duckdb_path,
-                    db_out_path=db_ndjson_path,
-                    geojson_out_path=geojson_ndjson_path,
-                    import_limit=import_limit,
-                    append=False,
-                )
-            elif db_ndjson_path is not None:
-                processed, imported, export_bounds = export_rows_duckdb_ndjson(
-                    duckdb_path=duckdb_path,
-                    out_path=db_ndjson_path,
-                    import_limit=import_limit,
-                    geometry_mode='wkb_hex',
-                    append=False,
-                )
-            else:
-                processed, imported, export_bounds = export_rows_duckdb_ndjson(
-                    duckdb_path=duckdb_path,
-                    out_path=geojson_ndjson_path,
-                    import_limit=import_limit,
-                    geometry_mode='geojson_feature',
-                    append=False,
-                )
-        else:
+        elif not export_mode:
             processed, imported = import_rows_direct_duckdb_sqlite(
                 duckdb_path=duckdb_path,
                 sqlite_conn=conn,
                 import_limit=import_limit,
                 run_marker=run_marker,
+                sync_generation=sync_generation,
+                order=export_order,
+                engine=sqlite_engine,
+                rtree_bulk_load=rtree_bulk_load,
             )
 
-    if ndjson_path is not None or db_ndjson_path is not None or geojson_ndjson_path is not None:
+    if delta_dir_path is not None:
+        p, i, bounds, feature_kind_counts, delta_counts = export_rows_delta(
+            duckdb_path=duckdb_path,
+            previous_snapshot_path=Path(delta_against).expanduser().resolve(),
+            delta_dir=delta_dir_path,
+            geometry_mode=str(args.delta_geometry or 'wkb_hex'),
+            order=export_order,
+            snapshot_path=snapshot_path,
+        )
+        if not row_export_mode:
+            processed, imported, export_bounds, export_feature_kind_counts = p, i, bounds, feature_kind_counts
+    elif snapshot_path is not None:
+        p, i, bounds, feature_kind_counts = write_export_snapshot(duckdb_path, snapshot_path)
+        if not row_export_mode:
+            processed, imported, export_bounds, export_feature_kind_counts = p, i, bounds, feature_kind_counts
+    release_converted_extracts(work_dir)
+
+    if export_mode:
         if summary_json_path is not None:
-            write_export_summary(summary_json_path, processed, imported, export_bounds)
+            write_export_summary(
+                summary_json_path,
+                processed,
+                imported,
+                export_bounds,
+                export_feature_kind_counts,
+                delta_counts,
+            )
         print(
             'Export done. '
             f'processed={processed}, exported={imported}, '
-            f'db_ndjson={db_ndjson_path}, geojson_ndjson={geojson_ndjson_path}, ndjson={ndjson_path}',
+            f'db_ndjson={db_ndjson_path}, geojson_ndjson={geojson_ndjson_path}, ndjson={ndjson_path}, '
+            f'db_parquet={db_parquet_path}, db_pgcopy={db_pgcopy_path}',
             flush=True,
         )
+        finish_import('ok', processed=processed, imported=imported)
         return
 
-    deleted = cleanup_stale(conn, import_limit, run_marker)
-    rebuild_sqlite_rtree_if_needed(conn)
+    deleted = cleanup_stale(conn, import_limit, sync_generation, rtree_bulk_load)
+    rebuild_sqlite_rtree_if_needed(conn, verify=bool(args.verify_rtree))
     conn.commit()
 
     row = conn.execute('SELECT COUNT(*) AS total, MAX(updated_at) AS last_updated FROM building_contours').fetchone()
@@ -1126,11 +1322,16 @@ def main() -> None:
         f'deleted={deleted}, total_in_db={total}, last_updated={last_updated}',
         flush=True,
     )
+    finish_import('ok', processed=processed, imported=imported, deleted=deleted)
 
 
 if __name__ == '__main__':
     try:
         main()
     except KeyboardInterrupt:
+        finish_import('interrupted')
         print('Interrupted', flush=True)
         sys.exit(130)
+    except Exception:
+        finish_import('error')
+        raise
@@ -80,6 +80,10 @@ function shouldRunRuntimeFollowup(options: LooseRecord = {}) {
   return String(options.env?.REGION_SYNC_SKIP_RUNTIME_FOLLOWUP || '').trim().toLowerCase() !== 'true';
 }
 
+function resolvePgImportFormat(env: LooseRecord = process.env) {
+  return String(env?.REGION_SYNC_PG_IMPORT_FORMAT || '').trim().toLowerCase() === 'pgcopy' ? 'pgcopy' : 'ndjson';
+}
+
 function buildRuntimeFollowupEnv(runtimeOptions: LooseRecord = {}, env: LooseRecord = process.env) {
   return {
     ...env,
@@ -164,6 +168,13 @@ function readExportSummary(summaryPath) {
         north: Number(payload.bounds.north)
       }
       : null;
+    const featureKindCounts = payload?.featureKindCounts && typeof payload.featureKindCounts === 'object'
+      ? Object.fromEntries(
+        Object.entries(payload.featureKindCounts)
+          .map(([kind, count]) => [kind, Number(count)])
+          .filter(([, count]) => Number.isInteger(count) && count >= 0)
+      )
+      : null;
 
     if (!Number.isInteger(importedFeatureCount) || importedFeatureCount < 0) {
       return null;
@@ -177,7 +188,8 @@ function readExportSummary(summaryPath) {
 
     return {
       importedFeatureCount,
-      bounds
+      bounds,
+      ...(featureKindCounts ? { featureKindCounts } : {})
     };
   } catch {
     return null;
@@ -222,14 +234,29 @@ async function buildRegionPmtilesOnly(region, runtimeOptions) {
 async function runRegionSync(region, runtimeOptions) {
   const workspace = createWorkspace(region.id);
   const importPath = path.join(workspace, 'region-import.ndjson');
+  const pgcopyPath = path.join(workspace, 'region-import.pgcopy');
   const geojsonPath = path.join(workspace, 'region-build.ndjson');
   const summaryPath = path.join(workspace, 'region-export-summary.json');
   const builtPmtilesPath = path.join(workspace, 'region.pmtiles');
   const importerPath = path.join(__dirname, 'sync-osm-buildings.py');
+  const usePgcopy = runtimeOptions.dbProvider === 'postgres' && resolvePgImportFormat(process.env) === 'pgcopy';
 
   try {
     let exported = null;
-    if (runtimeOptions.dbProvider === 'postgres') {
+    if (usePgcopy) {
+      exportRegionExtractToNdjson({
+        importerPath,
+        region,
+        dbPgcopyOutputPath: pgcopyPath,
+        geojsonOutputPath: geojsonPath,
+        summaryOutputPath: summaryPath,
+        env: process.env
+      });
+      exported = readExportSummary(summaryPath);
+      if (!exported) {
+        throw new Error('Python importer did not write a valid export summary for the PGCOPY import');
+      }
+    } else if (runtimeOptions.dbProvider === 'postgres') {
       exportRegionExtractToNdjson({
         importerPath,
         region,
@@ -258,6 +285,7 @@ async function runRegionSync(region, runtimeOptions) {
       ...runtimeOptions,
       region,
       ndjsonPath: importPath,
+      ...(usePgcopy ? { pgcopyPath } : {}),
       builtPmtilesPath
     });
     if (shouldRunRuntimeFollowup({ pmtilesOnly: false, env: process.env })) {
@@ -316,6 +344,7 @@ module.exports = {
   main,
   parseArgs,
   readExportSummary,
+  resolvePgImportFormat,
   runRuntimeFollowups,
   runRegionSync,
   shouldRunRuntimeFollowup
@@ -83,6 +83,7 @@ function createServerRuntimeConfig(options: LooseRecord = {}) {
       userAuthDbPath: String(rawEnv.USER_AUTH_DB_PATH || path.join(dataDir, 'users.db')).trim() || path.join(dataDir, 'users.db'),
       frontendIndexPath,
       cspScriptHashes: collectInlineScriptHashesFromFile(frontendIndexPath),
+      importerMetricsPath: String(rawEnv.IMPORTER_METRICS_PROM || '').trim(),
       syncRegionScriptPath: path.join(rootDir, 'scripts', 'sync-osm-region.ts'),
       searchRebuildScriptPath: path.join(rootDir, 'workers', 'rebuild-search-index.worker.ts'),
       searchRefreshWorkerScriptPath: path.join(rootDir, 'workers', 'refresh-search-index.worker.ts'),
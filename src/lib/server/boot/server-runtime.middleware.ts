@@ -15,6 +15,7 @@ function applyServerRuntimeMiddleware(runtime) {
     logger: runtime.logger,
     requestIdFactory: () => runtime.logger.requestId(),
     metricsEnabled: runtime.config.metricsEnabled,
+    importerMetricsPath: runtime.config.paths.importerMetricsPath,
     getVersionInfo: runtime.getAppVersion,
     getReadinessChecks: () => ({
       sessionStoreReady: Boolean(runtime.sessionMiddleware),
@@ -1,11 +1,35 @@
+const fs = require('fs');
 const { sanitizeUrl } = require('../../shared/log-sanitizer');
 
+function createImporterMetricsReader(filePath) {
+  let cached = null;
+  return async function readImporterMetrics() {
+    if (!filePath) return '';
+    try {
+      const stat = await fs.promises.stat(filePath);
+      if (cached && cached.mtimeMs === stat.mtimeMs && cached.ino === stat.ino && cached.size === stat.size) {
+        return cached.text;
+      }
+      const text = String(await fs.promises.readFile(filePath, 'utf8')).trim();
+      cached = { mtimeMs: stat.mtimeMs, ino: stat.ino, size: stat.size, text };
+      return text;
+    } catch (error) {
+      if (error?.code === 'ENOENT') {
+        cached = null;
+        return '';
+      }
+      throw error;
+    }
+  };
+}
+
 function initObservabilityInfra(app, options: LooseRecord = {}) {
   const logger = options.logger || console;
   const requestIdFactory = typeof options.requestIdFactory === 'function'
     ? options.requestIdFactory
     : (() => `${Date.now()}-${Math.random().toString(16).slice(2)}`);
   const metricsEnabled = String(options.metricsEnabled ?? 'true').toLowerCase() !== 'false';
+  const readImporterMetrics = createImporterMetricsReader(String(options.importerMetricsPath || '').trim());
   const getVersionInfo = typeof options.getVersionInfo === 'function'
     ? options.getVersionInfo
     : (() => ({
@@ -105,11 +129,15 @@ function initObservabilityInfra(app, options: LooseRecord = {}) {
       '# TYPE archimap_process_heap_used_bytes gauge',
       `archimap_process_heap_used_bytes ${heapUsed}`
     ];
+    // Last importer run, written by scripts/sync-osm-buildings.py --metrics-prom.
+    const importerMetrics = await readImporterMetrics();
+    if (importerMetrics) lines.push(importerMetrics);
     res.type('text/plain; version=0.0.4; charset=utf-8');
     return res.send(`${lines.join('\n')}\n`);
   });
 }
 
 module.exports = {
+  createImporterMetricsReader,
   initObservabilityInfra
 };
@@ -0,0 +1,147 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const PGCOPY_HEADER = Buffer.concat([Buffer.from('PGCOPY\n\xff\r\n\0', 'latin1'), Buffer.alloc(8)]);
+const PGCOPY_TRAILER = Buffer.from([0xff, 0xff]);
+
+function int16(value) {
+  const buffer = Buffer.alloc(2);
+  buffer.writeInt16BE(value);
+  return buffer;
+}
+
+function field(value) {
+  if (value == null) {
+    const buffer = Buffer.alloc(4);
+    buffer.writeInt32BE(-1);
+    return buffer;
+  }
+  const length = Buffer.alloc(4);
+  length.writeInt32BE(value.length);
+  return Buffer.concat([length, value]);
+}
+
+function int8(value) {
+  const buffer = Buffer.alloc(8);
+  buffer.writeBigInt64BE(BigInt(value));
+  return buffer;
+}
+
+function float8(value) {
+  const buffer = Buffer.alloc(8);
+  buffer.writeDoubleBE(value);
+  return buffer;
+}
+
+// Same tuple layout as _pgcopy_tuple in scripts/osm_importer/exporters.py.
+function pgcopyTuple(row) {
+  return Buffer.concat([
+    int16(9),
+    field(Buffer.from(row.osmType, 'utf8')),
+    field(int8(row.osmId)),
+    field(row.tagsJson == null ? null : Buffer.from(row.tagsJson, 'utf8')),
+    field(row.geometryWkb),
+    field(float8(row.minLon)),
+    field(float8(row.minLat)),
+    field(float8(row.maxLon)),
+    field(float8(row.maxLat)),
+    field(row.spatialKey == null ? null : int8(row.spatialKey))
+  ]);
+}
+
+function buildRows(count) {
+  return Array.from({ length: count }, (_, index) => ({
+    osmType: index % 5 === 0 ? 'relation' : 'way',
+    osmId: 1000 + index,
+    tagsJson: index % 7 === 0 ? null : JSON.stringify({ building: 'yes', name: `Дом ${index}` }),
+    geometryWkb: Buffer.alloc(64 + (index % 3) * 512, index % 251),
+    minLon: 30 + index / 1e5,
+    minLat: 59 + index / 1e5,
+    maxLon: 30.001 + index / 1e5,
+    maxLat: 59.001 + index / 1e5,
+    spatialKey: index % 11 === 0 ? null : index * 17
+  }));
+}
+
+async function withImportTable(client, callback) {
+  await client.query('BEGIN');
+  try {
+    await client.query(`
+      CREATE TEMP TABLE region_import_tmp (
+        osm_type text NOT NULL,
+        osm_id bigint NOT NULL,
+        tags_json text,
+        geometry_wkb bytea NOT NULL,
+        min_lon double precision NOT NULL,
+        min_lat double precision NOT NULL,
+        max_lon double precision NOT NULL,
+        max_lat double precision NOT NULL,
+        spatial_key bigint
+      ) ON COMMIT DROP
+    `);
+    return await callback();
+  } finally {
+    await client.query('ROLLBACK');
+  }
+}
+
+test('region import COPY streams a binary file into region_import_tmp', async (t) => {
+  const databaseUrl = String(process.env.DATABASE_URL || '').trim();
+  if (!databaseUrl) {
+    console.warn('[postgres.region-import.integration] skipped: DATABASE_URL is not set');
+    return;
+  }
+  const { Client } = require('pg');
+  const { copyImportRowsIntoPostgres } = require('../../scripts/region-sync/import-applier');
+
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-region-import-'));
+  const client = new Client({ connectionString: databaseUrl });
+  await client.connect();
+  t.after(async () => {
+    await client.end();
+    fs.rmSync(workspace, { recursive: true, force: true });
+  });
+
+  // Large enough to span many 1 MiB read chunks, so the copy stream has to apply backpressure.
+  const rows = buildRows(20000);
+  const pgcopyPath = path.join(workspace, 'region-import.pgcopy');
+  fs.writeFileSync(pgcopyPath, Buffer.concat([PGCOPY_HEADER, ...rows.map(pgcopyTuple), PGCOPY_TRAILER]));
+
+  await withImportTable(client, async () => {
+    const rowCount = await copyImportRowsIntoPostgres(client, pgcopyPath);
+    assert.equal(rowCount, rows.length);
+    const result = await client.query(`
+      SELECT osm_type, osm_id::text AS osm_id, tags_json, geometry_wkb, min_lon, min_lat, max_lon, max_lat, spatial_key::text AS spatial_key
+      FROM region_import_tmp
+      ORDER BY osm_id
+    `);
+    assert.equal(result.rows.length, rows.length);
+    for (const [index, row] of rows.entries()) {
+      const stored = result.rows[index];
+      assert.equal(stored.osm_type, row.osmType);
+      assert.equal(stored.osm_id, String(row.osmId));
+      assert.equal(stored.tags_json, row.tagsJson);
+      assert.ok(stored.geometry_wkb.equals(row.geometryWkb));
+      assert.deepEqual([stored.min_lon, stored.min_lat, stored.max_lon, stored.max_lat], [row.minLon, row.minLat, row.maxLon, row.maxLat]);
+      assert.equal(stored.spatial_key, row.spatialKey == null ? null : String(row.spatialKey));
+    }
+  });
+
+  const truncatedPath = path.join(workspace, 'truncated.pgcopy');
+  const complete = fs.readFileSync(pgcopyPath);
+  fs.writeFileSync(truncatedPath, complete.subarray(0, Math.floor(complete.length / 2)));
+  await withImportTable(client, async () => {
+    await assert.rejects(copyImportRowsIntoPostgres(client, truncatedPath));
+  });
+
+  const missingPath = path.join(workspace, 'missing.pgcopy');
+  await withImportTable(client, async () => {
+    await assert.rejects(copyImportRowsIntoPostgres(client, missingPath), /ENOENT/);
+  });
+
+  const { rows: [alive] } = await client.query('SELECT 1 AS ok');
+  assert.equal(alive.ok, 1);
+});
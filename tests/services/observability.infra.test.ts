@@ -0,0 +1,31 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { createImporterMetricsReader } = require('../../src/lib/server/infra/observability.infra');
+
+test('importer metrics are re-read only when the file changes', async (t) => {
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-observability-'));
+  t.after(() => fs.rmSync(workspace, { recursive: true, force: true }));
+  const metricsPath = path.join(workspace, 'importer.prom');
+  const readFile = t.mock.method(fs.promises, 'readFile');
+  const readImporterMetrics = createImporterMetricsReader(metricsPath);
+
+  assert.equal(await readImporterMetrics(), '');
+
+  fs.writeFileSync(metricsPath, 'archimap_import_rows_imported{mode="import"} 10\n');
+  assert.equal(await readImporterMetrics(), 'archimap_import_rows_imported{mode="import"} 10');
+  assert.equal(await readImporterMetrics(), 'archimap_import_rows_imported{mode="import"} 10');
+  assert.equal(readFile.mock.callCount(), 1);
+
+  const tmpPath = `${metricsPath}.tmp`;
+  fs.writeFileSync(tmpPath, 'archimap_import_rows_imported{mode="import"} 20\n');
+  fs.renameSync(tmpPath, metricsPath);
+  assert.equal(await readImporterMetrics(), 'archimap_import_rows_imported{mode="import"} 20');
+  assert.equal(readFile.mock.callCount(), 2);
+
+  fs.rmSync(metricsPath);
+  assert.equal(await readImporterMetrics(), '');
+  assert.equal(await createImporterMetricsReader('')(), '');
+});
@@ -1,15 +1,15 @@
 const test = require('node:test');
 const assert = require('node:assert/strict');
 const path = require('path');
+const { spawnSync } = require('child_process');
 
 const {
   createPythonExtractResolver,
   ensurePythonImporterDeps
 } = require('../../scripts/region-sync/python-extractor');
 
-const resolver = createPythonExtractResolver({
-  importerPath: path.resolve(__dirname, '..', '..', 'scripts', 'sync-osm-buildings.py')
-});
+const importerPath = path.resolve(__dirname, '..', '..', 'scripts', 'sync-osm-buildings.py');
+const resolver = createPythonExtractResolver({ importerPath });
 
 let pythonDepsSkipReason = null;
 try {
@@ -22,6 +22,10 @@ const pythonExtractorTestOptions = pythonDepsSkipReason
   ? { skip: `python extractor deps unavailable: ${pythonDepsSkipReason}` }
   : {};
 
+test.after(() => {
+  resolver.close();
+});
+
 test('searchExtractCandidates returns canonical candidates for free-form query', pythonExtractorTestOptions, async () => {
   const result = await resolver.searchExtractCandidates('Antarctica', {
     source: 'any',
@@ -72,3 +76,149 @@ test('resolveExactExtract reports ambiguous exact-name matches instead of auto-s
   assert.equal(result.errorCode, 'multiple');
   assert.match(String(result.message || ''), /Multiple extracts matched/i);
 });
+
+test('resolver service answers concurrent requests by id', pythonExtractorTestOptions, async () => {
+  const [search, exact, invalid] = await Promise.all([
+    resolver.searchExtractCandidates('Antarctica', { source: 'geofabrik', limit: 5 }),
+    resolver.resolveExactExtract('us/california', { source: 'geofabrik' }),
+    resolver.resolveExactExtract('antarctica', { source: 'unknown-source' }).then(
+      () => null,
+      (error) => error
+    )
+  ]);
+
+  assert.equal(search.query, 'Antarctica');
+  assert.equal(exact.candidate.extractId, 'geofabrik_north-america_us_us_california');
+  assert.ok(invalid instanceof Error);
+  assert.match(invalid.message, /unknown-source/i);
+});
+
+test('--resolve-batch answers one JSON line per input line in order', pythonExtractorTestOptions, () => {
+  const candidate = ensurePythonImporterDeps();
+  const input = [
+    JSON.stringify({ query: 'geofabrik_antarctica', source: 'geofabrik' }),
+    'us/california\tgeofabrik',
+    '',
+    'antarctica\tunknown-source'
+  ].join('\n');
+  const result = spawnSync(candidate.exe, [...candidate.prefixArgs, importerPath, '--resolve-batch', '-'], {
+    input,
+    encoding: 'utf8'
+  });
+
+  assert.equal(result.status, 0, result.stderr);
+  const lines = String(result.stdout || '').trim().split('\n').map((line) => JSON.parse(line));
+  assert.equal(lines.length, 3);
+  assert.equal(lines[0].candidate.extractId, 'geofabrik_antarctica');
+  assert.equal(lines[1].query, 'us/california');
+  assert.equal(lines[1].candidate.extractId, 'geofabrik_north-america_us_us_california');
+  assert.equal(lines[2].errorCode, 'invalid_request');
+});
+
+test('indexed extract search ranks like the full index scan', pythonExtractorTestOptions, () => {
+  // The reference scores every index row the way the search did before it was indexed.
+  const script = [
+    'import difflib, importlib.util, json, multiprocessing, os, sys',
+    'spec = importlib.util.spec_from_file_location("sync_osm_buildings", sys.argv[1])',
+    'module = importlib.util.module_from_spec(spec)',
+    'spec.loader.exec_module(module)',
+    'from osm_importer import extract_index',
+    'index = extract_index.get_extract_index("any")',
+    'def scan(query):',
+    '    normalized_query = extract_index.normalize_search_text(query)',
+    '    query_tokens = set(extract_index.tokenize_search_text(query))',
+    '    ranked, seen_ids = [], set()',
+    '    for row in index.itertuples(index=False):',
+    '        name = str(getattr(row, "normalized_name", "") or "")',
+    '        file_name = str(getattr(row, "normalized_file_name", "") or "")',
+    '        name_tokens = set(extract_index.tokenize_search_text(name))',
+    '        file_tokens = set(extract_index.tokenize_search_text(file_name))',
+    '        overlap = len(query_tokens & name_tokens) + len(query_tokens & file_tokens)',
+    '        ratio = max(difflib.SequenceMatcher(None, normalized_query, text).ratio() if text else 0.0 for text in (name, file_name))',
+    '        if normalized_query == file_name:',
+    '            scored = (1000, "exact_file_name", True)',
+    '        elif normalized_query == name:',
+    '            scored = (950, "exact_name", True)',
+    '        elif normalized_query in file_name:',
+    '            scored = (820, "file_name_contains", False)',
+    '        elif normalized_query in name:',
+    '            scored = (780, "name_contains", False)',
+    '        elif query_tokens and (query_tokens <= name_tokens or query_tokens <= file_tokens):',
+    '            scored = (720 + overlap, "token_subset", False)',
+    '        elif overlap > 0:',
+    '            scored = (520 + overlap * 20 + int(ratio * 100), "token_overlap", False)',
+    '        elif ratio >= extract_index.EXTRACT_FUZZY_MIN_RATIO:',
+    '            scored = (320 + int(ratio * 100), "fuzzy", False)',
+    '        else:',
+    '            continue',
+    '        extract_id = str(getattr(row, "file_name", "") or "").strip()',
+    '        if extract_id and extract_id not in seen_ids:',
+    '            seen_ids.add(extract_id)',
+    '            ranked.append(extract_index._extract_candidate_item(row, extract_id, *scored))',
+    '    return extract_index._format_extract_candidates(query, ranked, 50)["items"]',
+    'def compare(query):',
+    '    expected = scan(query)',
+    '    return [',
+    '        {"query": query, "limit": limit}',
+    '        for limit in (3, 50)',
+    '        if extract_index.search_extract_candidates(query, "any", limit)["items"] != expected[:limit]',
+    '    ]',
+    'queries = {"a", "us", "oblast", "north america", "kostroma", "nrth amerca", "sankt peterburg"}',
+    'for row in index.itertuples(index=False):',
+    '    queries.update([str(row.name or ""), str(row.file_name or "")])',
+    'queries = sorted(query for query in queries if query)',
+    'if "fork" in multiprocessing.get_all_start_methods():',
+    '    with multiprocessing.get_context("fork").Pool(os.cpu_count() or 1) as pool:',
+    '        results = pool.map(compare, queries, chunksize=16)',
+    'else:',
+    '    results = [compare(query) for query in queries]',
+    'mismatches = [mismatch for result in results for mismatch in result]',
+    'print(json.dumps({"rows": len(index), "queries": len(queries), "mismatches": mismatches}))'
+  ].join('\n');
+  const candidate = ensurePythonImporterDeps();
+  const result = spawnSync(candidate.exe, [...candidate.prefixArgs, '-c', script, importerPath], {
+    encoding: 'utf8',
+    maxBuffer: 16 * 1024 * 1024
+  });
+
+  assert.equal(result.status, 0, result.stderr);
+  const payload = JSON.parse(String(result.stdout || '').trim().split('\n').pop());
+  assert.ok(payload.queries > payload.rows);
+  assert.deepEqual(payload.mismatches, []);
+});
+
+test('indexed extract search runs the fuzzy pass when only fuzzy candidates fill the limit', pythonExtractorTestOptions, () => {
+  // "abcda dab" holds every trigram of the query but only scores fuzzy; "abcdaeb" misses one
+  // trigram and is the better fuzzy match.
+  const script = [
+    'import importlib.util, json, sys',
+    'import pandas as pd',
+    'spec = importlib.util.spec_from_file_location("sync_osm_buildings", sys.argv[1])',
+    'module = importlib.util.module_from_spec(spec)',
+    'spec.loader.exec_module(module)',
+    'from osm_importer import extract_index',
+    'rows = [("abcda dab", "test_1"), ("abcdaeb", "test_2"), ("unrelated", "test_3")]',
+    'index = pd.DataFrame([',
+    '    {"name": name, "file_name": file_name, "url": None, "area": 1.0,',
+    '     "normalized_name": extract_index.normalize_search_text(name),',
+    '     "normalized_file_name": extract_index.normalize_search_text(file_name)}',
+    '    for name, file_name in rows',
+    '])',
+    'search_index = extract_index.build_extract_search_index(index)',
+    'extract_index.get_extract_search_index = lambda source: search_index',
+    'print(json.dumps([',
+    '    [item["extractId"] for item in extract_index.search_extract_candidates("abcdab", "any", limit)["items"]]',
+    '    for limit in (1, 3)',
+    ']))'
+  ].join('\n');
+  const candidate = ensurePythonImporterDeps();
+  const result = spawnSync(candidate.exe, [...candidate.prefixArgs, '-c', script, importerPath], {
+    encoding: 'utf8'
+  });
+
+  assert.equal(result.status, 0, result.stderr);
+  assert.deepEqual(JSON.parse(String(result.stdout || '').trim().split('\n').pop()), [
+    ['test_2'],
+    ['test_2', 'test_1']
+  ]);
+});
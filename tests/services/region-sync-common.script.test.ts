@@ -30,6 +30,21 @@ test('parseRowPayload accepts WKB-only importer rows for PostgreSQL sync', () =>
   assert.equal(row.feature_kind, 'building');
 });
 
+test('parseRowPayload keeps the importer spatial sort key when present', () => {
+  const payload = {
+    osm_type: 'way',
+    osm_id: 123,
+    geometry_wkb_hex: '0A0B',
+    min_lon: 37.5,
+    min_lat: 55.5,
+    max_lon: 37.6,
+    max_lat: 55.6
+  };
+
+  assert.equal(parseRowPayload(JSON.stringify({ ...payload, spatial_key: 2444348014 })).spatial_key, 2444348014);
+  assert.equal(parseRowPayload(JSON.stringify(payload)).spatial_key, null);
+});
+
 test('parseRowPayload rejects missing GeoJSON when GeoJSON is required', () => {
   assert.throws(() => parseRowPayload(JSON.stringify({
     osm_type: 'way',
@@ -0,0 +1,121 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+// QuackOSM is replaced by a reader that copies a synthetic fixture, so conversions can be counted.
+const fakeConversionLines = [
+  'from osm_importer import conversion_cache',
+  'fixture = make_fixture("raw.duckdb", 30)',
+  'cache_dir = workspace / "conversion-cache"',
+  'work_dir = workspace / "work"',
+  'work_dir.mkdir()',
+  'conversion_cache._conversion_cache_dir = lambda: cache_dir',
+  'conversions = []',
+  'class FakePbfFileReader:',
+  '    def __init__(self, **kwargs):',
+  '        pass',
+  '    def convert_pbf_to_duckdb(self, pbf_path, result_file_path, **kwargs):',
+  '        conversions.append(Path(pbf_path).name)',
+  '        shutil.copyfile(fixture, result_file_path)',
+  'conversion_cache.quackosm = types.SimpleNamespace(PbfFileReader=FakePbfFileReader)',
+  'def write_pbf(name, content):',
+  '    pbf_path = workspace / name',
+  '    pbf_path.write_bytes(content)',
+  '    return pbf_path',
+  'def convert(pbf_path, index):',
+  '    duckdb_path = work_dir / f"quackosm-buildings-{index:02d}.duckdb"',
+  '    return conversion_cache.convert_pbf_to_duckdb_cached(pbf_path, duckdb_path, working_directory=work_dir)',
+  'def cache_entries():',
+  '    return sorted(entry.name for entry in cache_dir.glob("*.duckdb"))'
+];
+
+test('conversion cache reuses, invalidates and leaves entries unchanged on a hit', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    ...fakeConversionLines,
+    'pbf_path = write_pbf("region.osm.pbf", b"first" * 64)',
+    'miss_path = convert(pbf_path, 1)',
+    'entry = cache_dir / cache_entries()[0]',
+    'entry_sha256 = file_sha256(entry)',
+    'entry_mtime_ns = entry.stat().st_mtime_ns',
+    'meta_path = entry.with_suffix(".json")',
+    'os.utime(meta_path, (1000, 1000))',
+    'hit_path = convert(pbf_path, 2)',
+    'after_hit = {"conversions": list(conversions), "nlink": entry.stat().st_nlink, "metaMtime": meta_path.stat().st_mtime}',
+    'exported = {}',
+    'for engine in ("copy", "python"):',
+    '    out_dir = workspace / engine',
+    '    out_dir.mkdir()',
+    '    exported[engine] = importer.export_rows_to_outputs(',
+    '        hit_path, None, out_dir / "db.ndjson", out_dir / "geojson.ndjson",',
+    '        import_limit=0, engine=engine, db_parquet_path=out_dir / "db.parquet",',
+    '    )[1]',
+    'for engine in ("duckdb", "python"):',
+    '    conn = open_sqlite(f"{engine}.db")',
+    '    exported[f"sqlite-{engine}"] = importer.import_rows_direct_duckdb_sqlite(hit_path, conn, 0, "run", 1, engine=engine)[1]',
+    '    conn.close()',
+    'unchanged = file_sha256(entry) == entry_sha256 and entry.stat().st_mtime_ns == entry_mtime_ns',
+    'write_pbf("region.osm.pbf", b"second" * 64)',
+    'convert(pbf_path, 3)',
+    'after_content_change = list(conversions)',
+    'conversion_cache.quackosm_version = lambda: "0.0.0-test"',
+    'convert(pbf_path, 4)',
+    'print(json.dumps({',
+    '    "missLinks": os.stat(miss_path).st_nlink,',
+    '    "afterHit": after_hit,',
+    '    "exported": exported,',
+    '    "entryUnchanged": unchanged,',
+    '    "afterContentChange": after_content_change,',
+    '    "afterVersionChange": list(conversions),',
+    '    "entries": len(cache_entries()),',
+    '}))'
+  ], { env: { CONVERSION_CACHE_MAX_GB: '1' } });
+
+  assert.equal(payload.missLinks, 3);
+  assert.deepEqual(payload.afterHit.conversions, ['region.osm.pbf']);
+  assert.equal(payload.afterHit.nlink, 3);
+  assert.ok(payload.afterHit.metaMtime > 1000);
+  assert.deepEqual(payload.exported, { copy: 30, python: 30, 'sqlite-duckdb': 30, 'sqlite-python': 30 });
+  assert.equal(payload.entryUnchanged, true);
+  assert.deepEqual(payload.afterContentChange, ['region.osm.pbf', 'region.osm.pbf']);
+  assert.deepEqual(payload.afterVersionChange, ['region.osm.pbf', 'region.osm.pbf', 'region.osm.pbf']);
+  assert.equal(payload.entries, 3);
+});
+
+test('conversion cache evicts least recently used entries that are no longer linked', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    ...fakeConversionLines,
+    'pbf_paths = [write_pbf(f"region-{index}.osm.pbf", bytes([index]) * 64) for index in range(4)]',
+    'for index, pbf_path in enumerate(pbf_paths[:3]):',
+    '    convert(pbf_path, index)',
+    'entry_by_pbf = {',
+    '    pbf_path.name: conversion_cache._conversion_cache_key(conversion_cache._file_sha256(pbf_path), conversion_cache.BUILDING_TAGS_FILTER)',
+    '    for pbf_path in pbf_paths',
+    '}',
+    'for index, pbf_path in enumerate(pbf_paths[:3]):',
+    '    meta_path = cache_dir / f"{entry_by_pbf[pbf_path.name]}.json"',
+    '    os.utime(meta_path, (1000 + index, 1000 + index))',
+    'os.utime(cache_dir / f"{entry_by_pbf[pbf_paths[0].name]}.json", (2000, 2000))',
+    'entry_size = (cache_dir / f"{entry_by_pbf[pbf_paths[0].name]}.duckdb").stat().st_size',
+    'budget_bytes = int(entry_size * 2.5)',
+    'linked_evicted = conversion_cache.evict_conversion_cache(budget_bytes)',
+    'released = conversion_cache.release_converted_extracts(work_dir)',
+    'os.environ["CONVERSION_CACHE_MAX_GB"] = repr(budget_bytes / 1024 ** 3)',
+    'convert(pbf_paths[3], 3)',
+    'remaining = {name for name, key in entry_by_pbf.items() if (cache_dir / f"{key}.duckdb").exists()}',
+    'metadata = {name for name, key in entry_by_pbf.items() if (cache_dir / f"{key}.json").exists()}',
+    'print(json.dumps({',
+    '    "linkedEvicted": linked_evicted,',
+    '    "released": released,',
+    '    "workFiles": sorted(path.name for path in work_dir.glob("*.duckdb")),',
+    '    "remaining": sorted(remaining),',
+    '    "metadata": sorted(metadata),',
+    '}))'
+  ], { env: { CONVERSION_CACHE_MAX_GB: '1' } });
+
+  assert.equal(payload.linkedEvicted, 0);
+  assert.equal(payload.released, 3);
+  assert.deepEqual(payload.workFiles, ['quackosm-buildings-03.duckdb']);
+  assert.deepEqual(payload.remaining, ['region-0.osm.pbf', 'region-3.osm.pbf']);
+  assert.deepEqual(payload.metadata, payload.remaining);
+});
@@ -0,0 +1,65 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+test('--delta-against writes added/changed/deleted streams against the previous snapshot', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 40)',
+    'mutated = derive_fixture(',
+    '    fixture, "mutated.duckdb",',
+    '    "DELETE FROM quackosm_raw WHERE " + feature_id_sql(5),',
+    '    "UPDATE quackosm_raw SET tags = map_concat(tags, MAP {\'name\': \'Renamed\'}) WHERE " + feature_id_sql(3),',
+    '    "INSERT INTO quackosm_raw SELECT * REPLACE (\'way/41\' AS feature_id) FROM quackosm_raw WHERE feature_id LIKE \'%/1\'",',
+    ')',
+    'pbf_path = workspace / "region.osm.pbf"',
+    'pbf_path.write_bytes(b"pbf")',
+    'fake_quackosm(fixture)',
+    'run_main("--pbf", pbf_path, "--out-snapshot", workspace / "base.parquet")',
+    'fake_quackosm(mutated)',
+    'def run_delta(previous, name):',
+    '    run_main(',
+    '        "--pbf", pbf_path, "--delta-against", previous, "--out-delta-dir", workspace / name,',
+    '        "--out-snapshot", workspace / f"{name}.parquet", "--out-summary-json", workspace / f"{name}.json",',
+    '    )',
+    '    streams = {',
+    '        stream: [json.loads(line) for line in (workspace / name / f"{stream}.ndjson").read_text(encoding="utf-8").splitlines()]',
+    '        for stream in ("added", "changed", "deleted")',
+    '    }',
+    '    summary = json.loads((workspace / f"{name}.json").read_text(encoding="utf-8"))',
+    '    return {"streams": streams, "summary": summary}',
+    'first = run_delta(workspace / "base.parquet", "delta")',
+    'second = run_delta(workspace / "delta.parquet", "rerun")',
+    'errors = []',
+    'def expect_error(*args):',
+    '    try:',
+    '        run_main(*args)',
+    '    except ValueError as error:',
+    '        errors.append(str(error))',
+    'expect_error("--pbf", pbf_path, "--delta-against", workspace / "base.parquet")',
+    'os.environ["IMPORT_LIMIT"] = "5"',
+    'expect_error("--pbf", pbf_path, "--out-snapshot", workspace / "limited.parquet")',
+    'del os.environ["IMPORT_LIMIT"]',
+    'expect_error("--extract-query", "a", "--extract-query", "b", "--out-snapshot", workspace / "multi.parquet")',
+    'print(json.dumps({"first": first, "second": second, "errors": errors}))'
+  ]);
+
+  const { streams, summary } = payload.first;
+  const ids = (rows) => rows.map((row) => Number(row.osm_id)).sort((a, b) => a - b);
+  assert.deepEqual(ids(streams.added), [41]);
+  assert.deepEqual(ids(streams.changed), [3, 6, 9, 12, 18, 21, 24, 27, 33, 36, 39]);
+  assert.ok(streams.changed.every((row) => JSON.parse(row.tags_json).name === 'Renamed'));
+  assert.deepEqual(ids(streams.deleted), [5, 10, 15, 20, 25, 30, 35, 40]);
+  assert.deepEqual(Object.keys(streams.deleted[0]).sort(), ['osm_id', 'osm_type']);
+  assert.deepEqual(summary.deltaCounts, { added: 1, changed: 11, deleted: 8, unchanged: 21 });
+
+  const rerun = payload.second;
+  assert.deepEqual(rerun.streams, { added: [], changed: [], deleted: [] });
+  assert.deepEqual(rerun.summary.deltaCounts, { added: 0, changed: 0, deleted: 0, unchanged: 33 });
+
+  assert.deepEqual(payload.errors, [
+    '--delta-against and --out-delta-dir must be used together',
+    '--out-snapshot/--delta-against cannot be combined with IMPORT_LIMIT',
+    '--out-snapshot/--delta-against support a single --pbf or --extract-query input'
+  ]);
+});
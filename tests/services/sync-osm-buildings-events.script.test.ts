@@ -0,0 +1,77 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+function assertPhaseMeasured(phase) {
+  assert.equal(phase.status, 'ok', phase.phase);
+  assert.ok(phase.durationSec >= 0, phase.phase);
+  assert.ok(phase.cpuSec >= 0, phase.phase);
+  assert.ok(phase.peakRssBytes > 0, phase.phase);
+}
+
+test('--events-jsonl and --metrics-prom record export and direct SQLite phases', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fake_quackosm(make_fixture("raw.duckdb", 50))',
+    'db_ndjson_path = workspace / "out" / "db.ndjson"',
+    'run_main(',
+    '    "--extract-query", "test", "--out-db-ndjson", db_ndjson_path,',
+    '    "--events-jsonl", workspace / "export.jsonl", "--metrics-prom", workspace / "export.prom",',
+    ')',
+    'os.environ["OSM_DB_PATH"] = str(workspace / "osm.db")',
+    'run_main(',
+    '    "--pbf", workspace / "geofabrik_europe_test.osm.pbf",',
+    '    "--events-jsonl", workspace / "sqlite.jsonl", "--metrics-prom", workspace / "sqlite.prom",',
+    ')',
+    'def read_events(name):',
+    '    return [json.loads(line) for line in (workspace / name).read_text(encoding="utf-8").splitlines()]',
+    'print(json.dumps({',
+    '    "export": read_events("export.jsonl"),',
+    '    "sqlite": read_events("sqlite.jsonl"),',
+    '    "exportBytes": db_ndjson_path.stat().st_size,',
+    '    "exportMetrics": (workspace / "export.prom").read_text(encoding="utf-8"),',
+    '    "sqliteMetrics": (workspace / "sqlite.prom").read_text(encoding="utf-8"),',
+    '}))'
+  ]);
+
+  const exportEvents = payload.export;
+  assert.deepEqual(exportEvents.map((event) => event.event), ['run_start', 'resources', 'phase', 'phase', 'phase', 'run_end']);
+  const [resolve, convert, exported] = exportEvents.filter((event) => event.event === 'phase');
+  assert.deepEqual([resolve.phase, convert.phase, exported.phase], ['resolve', 'convert', 'export']);
+  [resolve, convert, exported].forEach(assertPhaseMeasured);
+  assert.equal(resolve.extractId, 'geofabrik_europe_test');
+  assert.equal(convert.cacheHit, false);
+  assert.ok(convert.bytes > 0);
+  assert.equal(exported.rows, 50);
+  assert.equal(exported.bytes, payload.exportBytes);
+  assert.ok(exported.durationSec > 0);
+  assert.ok(Math.abs(exported.rowsPerSec - 50 / exported.durationSec) <= 0.05 * exported.rowsPerSec);
+  assert.equal(exportEvents.at(-1).status, 'ok');
+  assert.equal(exportEvents.at(-1).imported, 50);
+  assert.ok(exportEvents.at(-1).peakRssBytes >= exported.peakRssBytes);
+
+  const sqliteEvents = payload.sqlite;
+  const sqlitePhases = sqliteEvents.filter((event) => event.event === 'phase');
+  assert.deepEqual(sqlitePhases.map((phase) => phase.phase), ['convert', 'sqlite-apply', 'cleanup', 'rtree']);
+  sqlitePhases.forEach(assertPhaseMeasured);
+  const applied = sqlitePhases[1];
+  assert.equal(applied.rows, 50);
+  assert.ok(applied.bytes > 0);
+  assert.ok(applied.rowsPerSec === null || applied.rowsPerSec > 0);
+  assert.equal(sqlitePhases[2].rows, 0);
+  assert.deepEqual(
+    { status: sqliteEvents.at(-1).status, imported: sqliteEvents.at(-1).imported, deleted: sqliteEvents.at(-1).deleted },
+    { status: 'ok', imported: 50, deleted: 0 }
+  );
+
+  assert.match(payload.exportMetrics, /^archimap_import_phase_rows\{mode="import",phase="export"\} 50$/m);
+  assert.equal(
+    Number(payload.exportMetrics.match(/^archimap_import_phase_bytes_written\{mode="import",phase="export"\} (\d+)$/m)[1]),
+    payload.exportBytes
+  );
+  assert.match(payload.sqliteMetrics, /^archimap_import_last_run_success\{mode="import"\} 1$/m);
+  assert.match(payload.sqliteMetrics, /^archimap_import_phase_rows\{mode="import",phase="sqlite-apply"\} 50$/m);
+  assert.match(payload.sqliteMetrics, /^archimap_import_phase_executions\{mode="import",phase="convert"\} 1$/m);
+  assert.match(payload.sqliteMetrics, /^archimap_import_peak_rss_bytes\{mode="import"\} \d+$/m);
+  assert.doesNotMatch(payload.sqliteMetrics, /phase="(resolve|export)"/);
+});
@@ -0,0 +1,57 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+test('COPY and Python export engines write identical NDJSON bytes', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = derive_fixture(',
+    '    make_fixture("raw.duckdb", 200), "edge.duckdb",',
+    '    "UPDATE quackosm_raw SET tags = map_concat(tags, MAP {\'name\': \'Zürich \' || chr(31) || \' \\"q\\" \\\\ 😀\' || chr(8232)}) WHERE " + feature_id_sql(3),',
+    '    "UPDATE quackosm_raw SET geometry = ST_GeomFromText(\'POLYGON((0.00001 0.0000001, 0.00002 0.0000001, 0.00002 0.00002, 0.00001 0.0000001))\') WHERE " + feature_id_sql(7),',
+    ')',
+    'modes = {',
+    '    "geojson": ("ndjson_path",),',
+    '    "wkb_hex": ("db_ndjson_path",),',
+    '    "geojson_feature": ("geojson_ndjson_path",),',
+    '    "dual": ("db_ndjson_path", "geojson_ndjson_path"),',
+    '}',
+    'def read_rows(out_path):',
+    '    return [json.loads(line) for line in out_path.read_text(encoding="utf-8").split("\\n") if line]',
+    'digests = {}',
+    'counts = {}',
+    'for order in ("none", "feature_id", "spatial"):',
+    '    for mode, arguments in modes.items():',
+    '        for engine in ("copy", "python"):',
+    '            out_dir = workspace / order / mode / engine',
+    '            out_dir.mkdir(parents=True)',
+    '            paths = {name: out_dir / f"{name}.ndjson" for name in arguments}',
+    '            result = importer.export_rows_to_outputs(',
+    '                fixture, paths.get("ndjson_path"), paths.get("db_ndjson_path"), paths.get("geojson_ndjson_path"),',
+    '                import_limit=0, engine=engine, order=order,',
+    '            )',
+    '            counts[f"{order}/{mode}/{engine}"] = result[1]',
+    '            for name, out_path in paths.items():',
+    '                digests.setdefault(f"{order}/{mode}/{name}", {})[engine] = file_sha256(out_path)',
+    'dual_dir = workspace / "none" / "dual" / "copy"',
+    'db_ids = [row["osm_id"] for row in read_rows(dual_dir / "db_ndjson_path.ndjson")]',
+    'geojson_ids = [row["properties"]["osm_id"] for row in read_rows(dual_dir / "geojson_ndjson_path.ndjson")]',
+    'sample = next(row for row in read_rows(workspace / "feature_id" / "wkb_hex" / "copy" / "db_ndjson_path.ndjson") if "Zürich" in row["tags_json"])',
+    'print(json.dumps({',
+    '    "mismatched": sorted(name for name, engines in digests.items() if engines["copy"] != engines["python"]),',
+    '    "outputs": len(digests),',
+    '    "counts": sorted(set(counts.values())),',
+    '    "dualOrderMatches": db_ids == geojson_ids,',
+    '    "tinyCoordinate": min(row["min_lat"] for row in read_rows(workspace / "none" / "geojson" / "python" / "ndjson_path.ndjson")),',
+    '    "name": json.loads(sample["tags_json"])["name"],',
+    '}, ensure_ascii=False))'
+  ]);
+
+  assert.deepEqual(payload.mismatched, []);
+  assert.equal(payload.outputs, 15);
+  assert.equal(payload.counts.length, 1);
+  assert.ok(payload.counts[0] > 0);
+  assert.equal(payload.dualOrderMatches, true);
+  assert.equal(payload.tinyCoordinate, 0.0000001);
+  assert.equal(payload.name, 'Zürich \u001f "q" \\ 😀\u2028');
+});
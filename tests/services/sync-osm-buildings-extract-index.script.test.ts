@@ -0,0 +1,53 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+test('extract index cache is reused until it expires, is refreshed or has another format', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'import time',
+    'calls = fake_quackosm(workspace / "raw.duckdb")',
+    'parquet_path, meta_path = extract_index._extract_index_cache_paths("any")',
+    'def read_index():',
+    '    extract_index._get_extract_index_bundle.cache_clear()',
+    '    extract_index.get_extract_index("any")',
+    '    return len(calls["indexLoads"])',
+    'def rewrite_meta(**changes):',
+    '    meta = json.loads(meta_path.read_text(encoding="utf-8"))',
+    '    meta.update(changes)',
+    '    meta_path.write_text(json.dumps(meta), encoding="utf-8")',
+    'loads = {"cold": read_index(), "warm": read_index()}',
+    'cached_meta = json.loads(meta_path.read_text(encoding="utf-8"))',
+    'rewrite_meta(createdAt=time.time() - 25 * 3600)',
+    'loads["expired"] = read_index()',
+    'loads["afterExpiry"] = read_index()',
+    'run_main("--refresh-extract-index")',
+    'loads["refreshed"] = len(calls["indexLoads"])',
+    'loads["afterRefresh"] = read_index()',
+    'rewrite_meta(format=extract_index.EXTRACT_INDEX_CACHE_FORMAT + 1)',
+    'loads["otherFormat"] = read_index()',
+    'print(json.dumps({',
+    '    "loads": loads,',
+    '    "meta": cached_meta,',
+    '    "format": extract_index.EXTRACT_INDEX_CACHE_FORMAT,',
+    '    "finalFormat": json.loads(meta_path.read_text(encoding="utf-8"))["format"],',
+    '    "parquet": parquet_path.exists(),',
+    '}))'
+  ]);
+
+  assert.deepEqual(payload.loads, {
+    cold: 1,
+    warm: 1,
+    expired: 2,
+    afterExpiry: 2,
+    refreshed: 3,
+    afterRefresh: 3,
+    otherFormat: 4
+  });
+  assert.equal(payload.meta.format, payload.format);
+  assert.equal(payload.meta.source, 'any');
+  assert.equal(payload.meta.rows, 1);
+  assert.deepEqual(payload.meta.aliases['europe/test'], ['geofabrik_europe_test']);
+  assert.equal(payload.finalFormat, payload.format);
+  assert.equal(payload.parquet, true);
+});
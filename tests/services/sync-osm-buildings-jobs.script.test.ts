@@ -0,0 +1,110 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+// Extract downloads are replaced by copies of per-query fixtures. The patch is module level, so
+// the spawned --jobs workers apply it too; the test body only runs in the main process.
+const fakeExtractLines = [
+  'queries = ["east", "west", "north", "south"]',
+  'conversions_dir = workspace / "conversions"',
+  'def fake_extract(query, extract_source, work_dir, index):',
+  '    (conversions_dir / query).touch()',
+  '    duckdb_path = Path(work_dir) / f"quackosm-buildings-{index:02d}.duckdb"',
+  '    shutil.copyfile(workspace / f"{query}.duckdb", duckdb_path)',
+  '    return duckdb_path',
+  'importer.run_quackosm_extract_to_duckdb = fake_extract',
+  'def output_paths(name):',
+  '    out_dir = workspace / name',
+  '    out_dir.mkdir()',
+  '    return out_dir / "db.ndjson", out_dir / "geojson.ndjson", out_dir / "db.pgcopy"',
+  'def run_parallel(name, import_limit):',
+  '    shutil.rmtree(conversions_dir, ignore_errors=True)',
+  '    conversions_dir.mkdir()',
+  '    work_dir = workspace / f"{name}-work"',
+  '    work_dir.mkdir()',
+  '    db_path, geojson_path, pgcopy_path = output_paths(name)',
+  '    importer.drain_import_phase_records()',
+  '    result = importer.run_extract_queries_parallel(',
+  '        queries, "any", work_dir, 2, import_limit, None, db_path, geojson_path, None, "run",',
+  '        order="feature_id", db_pgcopy_path=pgcopy_path,',
+  '    )',
+  '    exports = [record["rows"] for record in importer.drain_import_phase_records() if record["phase"] == "export"]',
+  '    return {',
+  '        "imported": result[1],',
+  '        "featureKindCounts": result[3],',
+  '        "exports": exports,',
+  '        "converted": sorted(path.name for path in conversions_dir.iterdir()),',
+  '        "digests": [file_sha256(path) for path in (db_path, geojson_path, pgcopy_path)],',
+  '    }',
+  'def run_sequential(name, import_limit):',
+  '    db_path, geojson_path, pgcopy_path = output_paths(name)',
+  '    imported = 0',
+  '    for query in queries:',
+  '        budget = import_limit - imported if import_limit > 0 else 0',
+  '        if import_limit > 0 and budget <= 0:',
+  '            break',
+  '        imported += importer.export_rows_to_outputs(',
+  '            workspace / f"{query}.duckdb", None, db_path, geojson_path, budget,',
+  '            append=True, order="feature_id", db_pgcopy_path=pgcopy_path,',
+  '        )[1]',
+  '    return [file_sha256(path) for path in (db_path, geojson_path, pgcopy_path)]'
+];
+
+test('--jobs merges shards in query order and exports a limited run once per extract', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    ...fakeExtractLines,
+    'if __name__ == "__main__":',
+    '    fixture = make_fixture("raw.duckdb", 40)',
+    '    for position, query in enumerate(queries):',
+    '        derive_fixture(',
+    '            fixture, f"{query}.duckdb",',
+    '            "DELETE FROM quackosm_raw WHERE " + feature_id_sql(position + 2),',
+    '            "UPDATE quackosm_raw SET feature_id = split_part(feature_id, \'/\', 1) || \'/\' || "',
+    '            f"(CAST(split_part(feature_id, \'/\', 2) AS BIGINT) + {(position + 1) * 1000})",',
+    '        )',
+    '    sizes = [',
+    '        importer.export_rows_to_outputs(workspace / f"{query}.duckdb", None, None, workspace / f"{query}.ndjson", 0)[1]',
+    '        for query in queries',
+    '    ]',
+    '    limit = sizes[0] + 5',
+    '    print(json.dumps({',
+    '        "sizes": sizes,',
+    '        "limit": limit,',
+    '        "full": run_parallel("full", 0),',
+    '        "fullReference": run_sequential("full-reference", 0),',
+    '        "limited": run_parallel("limited", limit),',
+    '        "limitedReference": run_sequential("limited-reference", limit),',
+    '    }))'
+  ]);
+
+  const total = payload.sizes.reduce((sum, size) => sum + size, 0);
+  assert.equal(payload.full.imported, total);
+  assert.deepEqual(payload.full.digests, payload.fullReference);
+  assert.deepEqual(payload.full.converted, ['east', 'north', 'south', 'west']);
+  assert.deepEqual(payload.full.exports, payload.sizes);
+  assert.equal(payload.full.featureKindCounts.building + payload.full.featureKindCounts.building_part, total);
+
+  assert.equal(payload.limited.imported, payload.limit);
+  assert.deepEqual(payload.limited.digests, payload.limitedReference);
+  assert.deepEqual(payload.limited.exports, [payload.sizes[0], 5]);
+  assert.ok(!payload.limited.converted.includes('south'));
+  assert.ok(payload.limited.converted.includes('east') && payload.limited.converted.includes('west'));
+});
+
+test('parquet and PostgreSQL COPY DB outputs cannot be combined', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 10)',
+    'try:',
+    '    importer.export_rows_to_outputs(',
+    '        fixture, None, None, None, 0, db_parquet_path=workspace / "db.parquet", db_pgcopy_path=workspace / "db.pgcopy",',
+    '    )',
+    '    error = None',
+    'except ValueError as exc:',
+    '    error = str(exc)',
+    'print(json.dumps({"error": error, "written": sorted(path.name for path in workspace.glob("db.*"))}))'
+  ]);
+
+  assert.match(payload.error, /Parquet or a PostgreSQL COPY/);
+  assert.deepEqual(payload.written, []);
+});
@@ -0,0 +1,95 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const zlib = require('zlib');
+
+const { parseRowPayload } = require('../../scripts/region-sync/common');
+const { pythonImporterTestOptions, runImporterCli } = require('./sync-osm-buildings-python');
+
+const fixturesDir = path.resolve(__dirname, '..', 'fixtures', 'osc');
+
+function readFeatureKeys(filePath) {
+  return fs.readFileSync(filePath, 'utf8')
+    .split('\n')
+    .filter(Boolean)
+    .map((line) => JSON.parse(line))
+    .map((row) => `${row.osm_type}/${row.osm_id}`)
+    .sort();
+}
+
+test('--apply-osc rebuilds affected buildings and writes added/changed/deleted streams', pythonImporterTestOptions, () => {
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-osc-'));
+  const regionPath = path.join(workspace, 'region.duckdb');
+  const baseDeltaDir = path.join(workspace, 'delta-base');
+  const changeDeltaDir = path.join(workspace, 'delta-change');
+  const changePath = path.join(workspace, 'region-change.osc.gz');
+  const summaryPath = path.join(workspace, 'summary.json');
+
+  try {
+    runImporterCli([
+      '--apply-osc', path.join(fixturesDir, 'region-base.osc'),
+      '--region-duckdb', regionPath,
+      '--out-delta-dir', baseDeltaDir
+    ]);
+    assert.deepEqual(readFeatureKeys(path.join(baseDeltaDir, 'added.ndjson')), [
+      'relation/200',
+      'way/100',
+      'way/101',
+      'way/103',
+      'way/104'
+    ]);
+
+    fs.writeFileSync(changePath, zlib.gzipSync(fs.readFileSync(path.join(fixturesDir, 'region-change.osc'))));
+    runImporterCli([
+      '--apply-osc', changePath,
+      '--region-duckdb', regionPath,
+      '--out-delta-dir', changeDeltaDir,
+      '--out-summary-json', summaryPath
+    ]);
+
+    assert.deepEqual(readFeatureKeys(path.join(changeDeltaDir, 'added.ndjson')), ['relation/201', 'way/105']);
+    assert.deepEqual(readFeatureKeys(path.join(changeDeltaDir, 'changed.ndjson')), ['relation/200', 'way/100', 'way/101']);
+    assert.deepEqual(readFeatureKeys(path.join(changeDeltaDir, 'deleted.ndjson')), ['way/103', 'way/104']);
+
+    const changedRows = fs.readFileSync(path.join(changeDeltaDir, 'changed.ndjson'), 'utf8')
+      .split('\n')
+      .filter(Boolean)
+      .map((line) => parseRowPayload(line, { requireGeometryWkbHex: true }));
+    const wing = changedRows.find((row) => row.osm_id === 101);
+    assert.equal(wing.feature_kind, 'building_part');
+    assert.equal(JSON.parse(wing.tags_json).name, 'Wing');
+
+    const summary = JSON.parse(fs.readFileSync(summaryPath, 'utf8'));
+    assert.deepEqual(summary.deltaCounts, { added: 2, changed: 3, deleted: 2 });
+  } finally {
+    fs.rmSync(workspace, { recursive: true, force: true });
+  }
+});
+
+test('--apply-osc writes to its own copy of a hardlinked region DuckDB', pythonImporterTestOptions, () => {
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-osc-link-'));
+  const regionPath = path.join(workspace, 'region.duckdb');
+  const cachedPath = path.join(workspace, 'cached.duckdb');
+
+  try {
+    runImporterCli([
+      '--apply-osc', path.join(fixturesDir, 'region-base.osc'),
+      '--region-duckdb', regionPath
+    ]);
+    fs.linkSync(regionPath, cachedPath);
+    const cachedBefore = fs.readFileSync(cachedPath);
+
+    runImporterCli([
+      '--apply-osc', path.join(fixturesDir, 'region-change.osc'),
+      '--region-duckdb', regionPath
+    ]);
+
+    assert.equal(fs.statSync(regionPath).nlink, 1);
+    assert.equal(fs.statSync(cachedPath).nlink, 1);
+    assert.ok(fs.readFileSync(cachedPath).equals(cachedBefore));
+  } finally {
+    fs.rmSync(workspace, { recursive: true, force: true });
+  }
+});
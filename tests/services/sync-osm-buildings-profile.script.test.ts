@@ -0,0 +1,43 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+function assertProfiled(profile, phases, profiledPhase) {
+  assert.equal(profile.phases.run.status, 'ok');
+  assert.deepEqual(profile.phases.phases.map((record) => record.phase), phases);
+  assert.ok(profile.phases.phases.every((record) => record.cpuSec >= 0));
+  assert.ok(profile.pstatsBytes > 0);
+  const pattern = new RegExp(`^main-\\d{4}-${profiledPhase}\\.json$`);
+  assert.ok(profile.queryProfiles.some((name) => pattern.test(name)), profile.queryProfiles.join(', '));
+  assert.ok(profile.queryProfiles.every((name) => /^main-\d{4}-[a-z-]+\.json$/.test(name)));
+  for (const phase of phases) {
+    assert.match(profile.report, new RegExp(`^ {2}${phase}\\s+1\\s`, 'm'));
+  }
+  assert.match(profile.report, /Slowest DuckDB queries/);
+  assert.match(profile.report, new RegExp(`main-\\d{4}-${profiledPhase}\\.json`));
+  assert.match(profile.report, /Python hotspots by cumulative time/);
+}
+
+test('--profile records DuckDB query profiles for the export and direct SQLite phases', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fake_quackosm(make_fixture("raw.duckdb", 50))',
+    'run_main("--extract-query", "test", "--out-db-ndjson", workspace / "out" / "db.ndjson", "--profile", workspace / "export")',
+    'os.environ["OSM_DB_PATH"] = str(workspace / "osm.db")',
+    'run_main("--pbf", workspace / "geofabrik_europe_test.osm.pbf", "--profile", workspace / "sqlite")',
+    'def read_profile(name):',
+    '    profile_dir = workspace / name',
+    '    return {',
+    '        "phases": json.loads((profile_dir / "phases.json").read_text(encoding="utf-8")),',
+    '        "pstatsBytes": (profile_dir / "python-main.pstats").stat().st_size,',
+    '        "queryProfiles": sorted(path.name for path in (profile_dir / "duckdb").iterdir()),',
+    '        "report": (profile_dir / "report.txt").read_text(encoding="utf-8"),',
+    '    }',
+    'print(json.dumps({"export": read_profile("export"), "sqlite": read_profile("sqlite")}))'
+  ]);
+
+  assertProfiled(payload.export, ['resolve', 'convert', 'export'], 'export');
+  assert.match(payload.export.report, /COPY \(/);
+  assertProfiled(payload.sqlite, ['convert', 'sqlite-apply', 'cleanup', 'rtree'], 'sqlite-apply');
+  assert.match(payload.sqlite.report, /CREATE TABLE stage\.import_rows/);
+});
@@ -0,0 +1,139 @@
+const assert = require('node:assert/strict');
+const { spawnSync } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const { ensurePythonImporterDeps, getDefaultImporterPath } = require('../../scripts/region-sync/python-extractor');
+
+const benchmarkPath = path.resolve(__dirname, '..', '..', 'scripts', 'benchmark-importer-export.py');
+
+let pythonCandidate = null;
+let pythonDepsSkipReason = null;
+try {
+  pythonCandidate = ensurePythonImporterDeps();
+} catch (error) {
+  pythonDepsSkipReason = String(error?.message || error || 'Python importer dependencies are unavailable');
+}
+
+const pythonImporterTestOptions = pythonDepsSkipReason
+  ? { skip: `python importer deps unavailable: ${pythonDepsSkipReason}` }
+  : {};
+
+// Loads the importer as `importer` and the export benchmark as `benchmark`; fixtures are the
+// benchmark's synthetic quackosm_raw tables. The script runs from a file, so spawned worker
+// processes re-run it as __mp_main__ and find the importer module by name. `fake_quackosm` stands
+// in for the QuackOSM conversion, extract index and download, and `run_main` runs the CLI in-process.
+const pythonPrelude = [
+  'import enum, hashlib, importlib.util, json, os, shutil, sqlite3, sys, types',
+  'from pathlib import Path',
+  'def load(name, file_path):',
+  '    spec = importlib.util.spec_from_file_location(name, file_path)',
+  '    module = importlib.util.module_from_spec(spec)',
+  '    sys.modules[name] = module',
+  '    spec.loader.exec_module(module)',
+  '    return module',
+  'importer = load("sync_osm_buildings", sys.argv[1])',
+  'benchmark = load("benchmark_importer_export", sys.argv[2])',
+  'workspace = Path(sys.argv[3])',
+  'from osm_importer import conversion_cache, extract_index',
+  'def make_fixture(name, rows):',
+  '    fixture_path = workspace / name',
+  '    with importer.duckdb.connect(str(fixture_path)) as con:',
+  '        con.load_extension("spatial")',
+  '        con.execute(f"SELECT setseed({benchmark.SEED})")',
+  '        con.execute(benchmark.FIXTURE_SQL.format(rows=rows))',
+  '    return fixture_path',
+  'def derive_fixture(source, name, *statements):',
+  '    fixture_path = workspace / name',
+  '    shutil.copyfile(source, fixture_path)',
+  '    with importer.duckdb.connect(str(fixture_path)) as con:',
+  '        con.load_extension("spatial")',
+  '        for statement in statements:',
+  '            con.execute(statement)',
+  '    return fixture_path',
+  'def feature_id_sql(modulus):',
+  '    return f"CAST(split_part(feature_id, \'/\', 2) AS INTEGER) % {modulus} = 0"',
+  'def open_sqlite(name):',
+  '    conn = sqlite3.connect(str(workspace / name))',
+  '    importer.ensure_sqlite_schema(conn)',
+  '    importer.migrate_sqlite_schema_for_duckdb(conn)',
+  '    return conn',
+  'def file_sha256(file_path):',
+  '    return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()',
+  'def fake_quackosm(fixture_path):',
+  '    calls = {"conversions": [], "indexLoads": [], "downloads": []}',
+  '    class FakePbfFileReader:',
+  '        def __init__(self, **kwargs):',
+  '            pass',
+  '        def convert_pbf_to_duckdb(self, pbf_path, result_file_path, **kwargs):',
+  '            calls["conversions"].append(Path(pbf_path).name)',
+  '            shutil.copyfile(fixture_path, result_file_path)',
+  '    class OsmExtractSource(str, enum.Enum):',
+  '        any = "any"',
+  '        geofabrik = "Geofabrik"',
+  '    def load_index(force_recalculation=False):',
+  '        import pandas',
+  '        calls["indexLoads"].append(force_recalculation)',
+  '        return pandas.DataFrame([{',
+  '            "id": "geofabrik_europe_test", "name": "Test", "file_name": "geofabrik_europe_test", "parent": "geofabrik_europe",',
+  '            "url": "https://download.geofabrik.de/europe/test-latest.osm.pbf", "area": 1.0,',
+  '        }])',
+  '    def download_extract_by_query(query, source):',
+  '        calls["downloads"].append(query)',
+  '        pbf_path = workspace / f"{query}.osm.pbf"',
+  '        pbf_path.write_bytes(query.encode("utf-8"))',
+  '        return str(pbf_path)',
+  '    osm_extracts = types.ModuleType("quackosm.osm_extracts")',
+  '    osm_extracts.OsmExtractSource = OsmExtractSource',
+  '    osm_extracts.OSM_EXTRACT_SOURCE_INDEX_FUNCTION = {OsmExtractSource.geofabrik: load_index}',
+  '    osm_extracts.download_extract_by_query = download_extract_by_query',
+  '    sys.modules["quackosm.osm_extracts"] = osm_extracts',
+  '    conversion_cache.quackosm = types.SimpleNamespace(PbfFileReader=FakePbfFileReader)',
+  '    extract_index._extract_index_cache_dir = lambda: workspace / "extract-index"',
+  '    importer.QUACKOSM_DATA_DIR = workspace / "quackosm"',
+  '    return calls',
+  'def run_main(*args):',
+  '    argv = sys.argv',
+  '    sys.argv = ["sync-osm-buildings.py", *(str(arg) for arg in args)]',
+  '    try:',
+  '        importer.main()',
+  '    finally:',
+  '        sys.argv = argv'
+];
+
+function runImporterPython(lines, options = {}) {
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-importer-python-'));
+  try {
+    const scriptPath = path.join(workspace, 'importer_test_script.py');
+    fs.writeFileSync(scriptPath, [...pythonPrelude, ...lines].join('\n'));
+    const result = spawnSync(
+      pythonCandidate.exe,
+      [...pythonCandidate.prefixArgs, scriptPath, getDefaultImporterPath(), benchmarkPath, workspace],
+      {
+        encoding: 'utf8',
+        env: { ...process.env, ...(options.env || {}) },
+        maxBuffer: 16 * 1024 * 1024
+      }
+    );
+    assert.equal(result.status, 0, result.stderr || result.stdout);
+    return JSON.parse(String(result.stdout || '').trim().split('\n').pop());
+  } finally {
+    fs.rmSync(workspace, { recursive: true, force: true });
+  }
+}
+
+function runImporterCli(args, options = {}) {
+  const result = spawnSync(pythonCandidate.exe, [...pythonCandidate.prefixArgs, getDefaultImporterPath(), ...args], {
+    encoding: 'utf8',
+    env: { ...process.env, ...(options.env || {}) }
+  });
+  assert.equal(result.status, 0, result.stderr || result.stdout);
+  return result;
+}
+
+module.exports = {
+  pythonImporterTestOptions,
+  runImporterCli,
+  runImporterPython
+};
@@ -0,0 +1,134 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+const GiB = 1024 ** 3;
+
+// Each case is a fake cgroup mount (files relative to its root) plus the /proc/self/cgroup text.
+const cgroupCases = [
+  {
+    name: 'v2 quota and memory.max',
+    proc: '0::/\n',
+    files: { 'cgroup.controllers': 'cpu memory', 'cpu.max': '200000 100000', 'memory.max': String(GiB) },
+    expected: { version: 2, cpus: 2, memoryBytes: GiB }
+  },
+  {
+    name: 'v2 unlimited',
+    proc: '0::/\n',
+    files: { 'cgroup.controllers': 'cpu memory', 'cpu.max': 'max 100000', 'memory.max': 'max' },
+    expected: { version: 2, cpus: null, memoryBytes: null }
+  },
+  {
+    name: 'v2 quota without period',
+    proc: '0::/\n',
+    files: { 'cgroup.controllers': 'cpu', 'cpu.max': '150000' },
+    expected: { version: 2, cpus: 1.5, memoryBytes: null }
+  },
+  {
+    name: 'v2 own cgroup below the mount root',
+    proc: '0::/kubepods/pod-1\n',
+    files: {
+      'cgroup.controllers': 'cpu memory',
+      'cpu.max': 'max 100000',
+      'memory.max': 'max',
+      'kubepods/pod-1/cpu.max': '50000 100000',
+      'kubepods/pod-1/memory.max': String(GiB / 2)
+    },
+    expected: { version: 2, cpus: 0.5, memoryBytes: GiB / 2 }
+  },
+  {
+    name: 'v2 own cgroup not mounted falls back to the root',
+    proc: '0::/not/mounted\n',
+    files: { 'cgroup.controllers': 'cpu memory', 'cpu.max': '300000 100000', 'memory.max': String(2 * GiB) },
+    expected: { version: 2, cpus: 3, memoryBytes: 2 * GiB }
+  },
+  {
+    name: 'v1 quota/period and memory limit',
+    proc: '5:memory:/docker/abc\n4:cpu,cpuacct:/docker/abc\n',
+    files: {
+      'cpu/docker/abc/cpu.cfs_quota_us': '150000',
+      'cpu/docker/abc/cpu.cfs_period_us': '100000',
+      'memory/docker/abc/memory.limit_in_bytes': String(2 * GiB)
+    },
+    expected: { version: 1, cpus: 1.5, memoryBytes: 2 * GiB }
+  },
+  {
+    name: 'v1 unlimited',
+    proc: '5:memory:/\n4:cpu,cpuacct:/\n',
+    files: {
+      'cpu/cpu.cfs_quota_us': '-1',
+      'cpu/cpu.cfs_period_us': '100000',
+      'memory/memory.limit_in_bytes': '9223372036854771712'
+    },
+    expected: { version: 1, cpus: null, memoryBytes: null }
+  },
+  {
+    name: 'no cgroup mount',
+    proc: '',
+    files: {},
+    expected: { version: null, cpus: null, memoryBytes: null }
+  }
+];
+
+test('cgroup limits are read from v1 and v2 hierarchies', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'from osm_importer import resources',
+    `cases = json.loads(${JSON.stringify(JSON.stringify(cgroupCases))})`,
+    'results = {}',
+    'for position, case in enumerate(cases):',
+    '    root = workspace / f"cgroup-{position}"',
+    '    root.mkdir()',
+    '    for relative_path, content in case["files"].items():',
+    '        file_path = root / relative_path',
+    '        file_path.parent.mkdir(parents=True, exist_ok=True)',
+    '        file_path.write_text(content, encoding="utf-8")',
+    '    proc_path = workspace / f"proc-{position}"',
+    '    proc_path.write_text(case["proc"], encoding="utf-8")',
+    '    results[case["name"]] = resources.detect_cgroup_limits(root, proc_path)',
+    'print(json.dumps(results))'
+  ]);
+
+  for (const cgroupCase of cgroupCases) {
+    assert.deepEqual(payload[cgroupCase.name], cgroupCase.expected, cgroupCase.name);
+  }
+});
+
+test('DuckDB resources split cgroup limits across jobs and honour overrides', pythonImporterTestOptions, () => {
+  const resourceCases = [
+    { name: 'split across jobs', limits: { version: 2, cpus: 4, memoryBytes: 8 * GiB }, jobs: 2, env: {}, threads: 2, memoryLimit: '3072MiB' },
+    { name: 'fractional quota rounds up', limits: { version: 2, cpus: 1.5, memoryBytes: null }, jobs: 1, env: {}, threads: 2, memoryLimit: null },
+    { name: 'memory floor', limits: { version: 1, cpus: 1, memoryBytes: 256 * 1024 ** 2 }, jobs: 4, env: {}, threads: 1, memoryLimit: '256MiB' },
+    {
+      name: 'environment overrides',
+      limits: { version: 2, cpus: 4, memoryBytes: 8 * GiB },
+      jobs: 2,
+      env: { DUCKDB_THREADS: '3', DUCKDB_MEMORY_LIMIT: '5GB' },
+      threads: 3,
+      memoryLimit: '5GB'
+    }
+  ];
+  const payload = runImporterPython([
+    'from osm_importer import resources',
+    `cases = json.loads(${JSON.stringify(JSON.stringify(resourceCases))})`,
+    'resources._available_cpus = lambda: 8',
+    'resources._physical_memory_bytes = lambda: None',
+    'results = {}',
+    'for case in cases:',
+    '    resources.detect_cgroup_limits = lambda limits=case["limits"]: dict(limits)',
+    '    for name in ("DUCKDB_THREADS", "DUCKDB_MEMORY_LIMIT"):',
+    '        os.environ.pop(name, None)',
+    '    os.environ.update(case["env"])',
+    '    settings = resources.configure_duckdb_resources(jobs=case["jobs"], work_dir=workspace)',
+    '    results[case["name"]] = {"threads": settings["threads"], "memoryLimit": settings["memoryLimit"]}',
+    'print(json.dumps(results))'
+  ]);
+
+  for (const resourceCase of resourceCases) {
+    assert.deepEqual(
+      payload[resourceCase.name],
+      { threads: resourceCase.threads, memoryLimit: resourceCase.memoryLimit },
+      resourceCase.name
+    );
+  }
+});
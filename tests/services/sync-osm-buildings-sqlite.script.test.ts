@@ -0,0 +1,327 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const { pythonImporterTestOptions, runImporterPython } = require('./sync-osm-buildings-python');
+
+test('python SQLite engine upserts across batch boundaries', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'importer.BATCH_SIZE = 7',
+    'fixture = make_fixture("raw.duckdb", 40)',
+    'first = derive_fixture(fixture, "first.duckdb", "DELETE FROM quackosm_raw WHERE " + feature_id_sql(4))',
+    'second = derive_fixture(fixture, "second.duckdb", "UPDATE quackosm_raw SET tags = map_concat(tags, MAP {\'name\': \'Renamed\'}) WHERE " + feature_id_sql(3))',
+    'conn = open_sqlite("osm.db")',
+    'first_generation = importer.next_sqlite_sync_generation(conn)',
+    'first_imported = importer._import_rows_sqlite_python(first, conn, 0, "run-1", first_generation)',
+    'importer.rebuild_sqlite_rtree_if_needed(conn)',
+    'first_state = importer.read_sqlite_sync_state(conn)',
+    'second_generation = importer.next_sqlite_sync_generation(conn)',
+    'second_imported = importer._import_rows_sqlite_python(second, conn, 0, "run-2", second_generation)',
+    'limited = open_sqlite("limited.db")',
+    'limited_imported = importer._import_rows_sqlite_python(second, limited, 17, "run-1", 1)',
+    'print(json.dumps({',
+    '    "firstImported": first_imported,',
+    '    "firstState": first_state,',
+    '    "secondImported": second_imported,',
+    '    "secondState": importer.read_sqlite_sync_state(conn),',
+    '    "generations": conn.execute("SELECT sync_generation, updated_at, COUNT(*) FROM building_contours GROUP BY 1, 2").fetchall(),',
+    '    "renamed": conn.execute("SELECT COUNT(*) FROM building_contours WHERE json_extract(tags_json, \'$.name\') = \'Renamed\'").fetchone()[0],',
+    '    "rtree": conn.execute("SELECT COUNT(*) FROM building_contours_rtree").fetchone()[0],',
+    '    "limitedImported": limited_imported,',
+    '    "limitedRows": limited.execute("SELECT COUNT(*) FROM building_contours").fetchone()[0],',
+    '}))'
+  ]);
+
+  assert.equal(payload.firstImported, 30);
+  assert.equal(payload.firstState.contour_count, 30);
+  assert.equal(payload.secondImported, 40);
+  assert.equal(payload.secondState.contour_count, 40);
+  assert.equal(payload.secondState.rtree_count, 40);
+  assert.deepEqual(payload.generations, [[2, 'run-2', 40]]);
+  assert.equal(payload.renamed, 13);
+  assert.equal(payload.rtree, 40);
+  assert.equal(payload.limitedImported, 17);
+  assert.equal(payload.limitedRows, 17);
+});
+
+test('R*Tree bulk load refills the index once per sync and matches the table', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 40)',
+    'first = derive_fixture(fixture, "first.duckdb", "DELETE FROM quackosm_raw WHERE " + feature_id_sql(4))',
+    'second = derive_fixture(',
+    '    fixture, "second.duckdb",',
+    '    "UPDATE quackosm_raw SET geometry = ST_Translate(geometry, 1.0, 1.0) WHERE " + feature_id_sql(3),',
+    '    "DELETE FROM quackosm_raw WHERE " + feature_id_sql(5),',
+    ')',
+    'fills = []',
+    'fill_sqlite_rtree = importer.fill_sqlite_rtree',
+    'def counting_fill(conn):',
+    '    fills.append(1)',
+    '    return fill_sqlite_rtree(conn)',
+    'importer.fill_sqlite_rtree = counting_fill',
+    'def rtree_mismatches(conn):',
+    '    return conn.execute("""',
+    '        SELECT COUNT(*) FROM building_contours bc',
+    '        LEFT JOIN building_contours_rtree br ON br.contour_rowid = bc.rowid',
+    '        WHERE br.contour_rowid IS NULL',
+    '           OR abs(br.min_lon - bc.min_lon) > 1e-4 OR abs(br.max_lon - bc.max_lon) > 1e-4',
+    '           OR abs(br.min_lat - bc.min_lat) > 1e-4 OR abs(br.max_lat - bc.max_lat) > 1e-4',
+    '    """).fetchone()[0] + abs(',
+    '        conn.execute("SELECT COUNT(*) FROM building_contours").fetchone()[0]',
+    '        - conn.execute("SELECT COUNT(*) FROM building_contours_rtree").fetchone()[0]',
+    '    )',
+    'def bulk_sync(conn, engine, finish=True):',
+    '    generation = importer.next_sqlite_sync_generation(conn)',
+    '    importer.import_rows_direct_duckdb_sqlite(second, conn, 0, "run-2", generation, engine=engine, rtree_bulk_load=True)',
+    '    deleted = importer.cleanup_stale(conn, 0, generation, rtree_bulk_load=True)',
+    '    suspended = importer.sqlite_rtree_suspended(conn)',
+    '    if finish:',
+    '        importer.rebuild_sqlite_rtree_if_needed(conn)',
+    '    return deleted, suspended',
+    'results = {}',
+    'for engine in ("duckdb", "python"):',
+    '    conn = open_sqlite(f"{engine}.db")',
+    '    importer._import_rows_sqlite_python(first, conn, 0, "run-1", importer.next_sqlite_sync_generation(conn))',
+    '    importer.rebuild_sqlite_rtree_if_needed(conn)',
+    '    fills.clear()',
+    '    deleted, suspended = bulk_sync(conn, engine)',
+    '    results[engine] = {',
+    '        "deleted": deleted,',
+    '        "suspendedBeforeRebuild": suspended,',
+    '        "suspendedAfterRebuild": importer.sqlite_rtree_suspended(conn),',
+    '        "fills": len(fills),',
+    '        "rows": conn.execute("SELECT COUNT(*) FROM building_contours").fetchone()[0],',
+    '        "state": importer.read_sqlite_sync_state(conn),',
+    '        "mismatches": rtree_mismatches(conn),',
+    '    }',
+    '    conn.close()',
+    'conn = open_sqlite("interrupted.db")',
+    'importer._import_rows_sqlite_python(first, conn, 0, "run-1", importer.next_sqlite_sync_generation(conn))',
+    'importer.rebuild_sqlite_rtree_if_needed(conn)',
+    'bulk_sync(conn, "duckdb", finish=False)',
+    'stale_mismatches = rtree_mismatches(conn)',
+    'conn.close()',
+    'fills.clear()',
+    'conn = open_sqlite("interrupted.db")',
+    'print(json.dumps({',
+    '    "results": results,',
+    '    "staleMismatches": stale_mismatches,',
+    '    "recoveryFills": len(fills),',
+    '    "recoveredMismatches": rtree_mismatches(conn),',
+    '    "recoveredSuspended": importer.sqlite_rtree_suspended(conn),',
+    '}))'
+  ]);
+
+  for (const engine of ['duckdb', 'python']) {
+    const result = payload.results[engine];
+    assert.equal(result.deleted, 6, engine);
+    assert.equal(result.suspendedBeforeRebuild, true, engine);
+    assert.equal(result.suspendedAfterRebuild, false, engine);
+    assert.equal(result.fills, 1, engine);
+    assert.equal(result.rows, 32, engine);
+    assert.equal(result.state.contour_count, 32, engine);
+    assert.equal(result.state.rtree_count, 32, engine);
+    assert.equal(result.mismatches, 0, engine);
+  }
+  assert.ok(payload.staleMismatches > 0);
+  assert.equal(payload.recoveryFills, 1);
+  assert.equal(payload.recoveredMismatches, 0);
+  assert.equal(payload.recoveredSuspended, false);
+});
+
+test('SQLite engines write the same rows and R*Tree, with and without bulk load', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 60)',
+    'first = derive_fixture(fixture, "first.duckdb", "DELETE FROM quackosm_raw WHERE " + feature_id_sql(4))',
+    'second = derive_fixture(',
+    '    fixture, "second.duckdb",',
+    '    "UPDATE quackosm_raw SET geometry = ST_Translate(geometry, 0.5, -0.5) WHERE " + feature_id_sql(3),',
+    '    "UPDATE quackosm_raw SET tags = map_concat(tags, MAP {\'name\': \'Renamed\'}) WHERE " + feature_id_sql(7),',
+    '    "DELETE FROM quackosm_raw WHERE " + feature_id_sql(5),',
+    ')',
+    'staged = importer._import_rows_sqlite_staged',
+    'staging_failures = []',
+    'def failing_staged(*args):',
+    '    staging_failures.append(1)',
+    '    raise importer.duckdb.Error("staging unavailable")',
+    'def sync(name, engine, bulk, fail_staging=False):',
+    '    importer._import_rows_sqlite_staged = failing_staged if fail_staging else staged',
+    '    conn = open_sqlite(f"{name}.db")',
+    '    imported = []',
+    '    for run, source in enumerate((first, second), start=1):',
+    '        generation = importer.next_sqlite_sync_generation(conn)',
+    '        imported.append(importer.import_rows_direct_duckdb_sqlite(',
+    '            source, conn, 0, f"run-{run}", generation, engine=engine, rtree_bulk_load=bulk,',
+    '        )[1])',
+    '        imported.append(importer.cleanup_stale(conn, 0, generation, rtree_bulk_load=bulk))',
+    '        importer.rebuild_sqlite_rtree_if_needed(conn)',
+    '    rows = conn.execute("""',
+    '        SELECT osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat, updated_at, sync_generation',
+    '        FROM building_contours ORDER BY osm_type, osm_id',
+    '    """).fetchall()',
+    '    rtree = conn.execute("""',
+    '        SELECT bc.osm_type, bc.osm_id, br.min_lon, br.max_lon, br.min_lat, br.max_lat',
+    '        FROM building_contours_rtree br JOIN building_contours bc ON bc.rowid = br.contour_rowid',
+    '        ORDER BY bc.osm_type, bc.osm_id',
+    '    """).fetchall()',
+    '    rtree_count = conn.execute("SELECT COUNT(*) FROM building_contours_rtree").fetchone()[0]',
+    '    conn.close()',
+    '    return {',
+    '        "imported": imported,',
+    '        "rows": len(rows),',
+    '        "rowsSha256": hashlib.sha256(json.dumps(rows).encode()).hexdigest(),',
+    '        "rtreeCount": rtree_count,',
+    '        "rtreeSha256": hashlib.sha256(json.dumps(rtree).encode()).hexdigest(),',
+    '    }',
+    'print(json.dumps({',
+    '    "duckdb": sync("duckdb", "duckdb", False),',
+    '    "duckdbBulk": sync("duckdb-bulk", "duckdb", True),',
+    '    "python": sync("python", "python", False),',
+    '    "pythonBulk": sync("python-bulk", "python", True),',
+    '    "fallback": sync("fallback", "duckdb", False, fail_staging=True),',
+    '    "stagingFailures": len(staging_failures),',
+    '}))'
+  ]);
+
+  const reference = payload.duckdb;
+  assert.equal(reference.rows, reference.rtreeCount);
+  assert.ok(reference.imported[0] > 0 && reference.imported[2] > 0 && reference.imported[3] > 0);
+  for (const name of ['duckdbBulk', 'python', 'pythonBulk', 'fallback']) {
+    assert.deepEqual(payload[name], reference, name);
+  }
+  assert.equal(payload.stagingFailures, 2);
+});
+
+test('stale cleanup deletes older generations and keeps Node applier rows working', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 40)',
+    'second = derive_fixture(fixture, "second.duckdb", "DELETE FROM quackosm_raw WHERE " + feature_id_sql(4))',
+    'with importer.duckdb.connect(str(fixture), read_only=True) as con:',
+    '    kept_id = int(con.execute("SELECT split_part(feature_id, \'/\', 2) FROM quackosm_raw WHERE feature_id LIKE \'way/%\' ORDER BY feature_id LIMIT 1").fetchone()[0])',
+    '# osm.db as left by the Node region applier: no sync_generation column, datetime(\'now\') default.',
+    'legacy = sqlite3.connect(str(workspace / "osm.db"))',
+    'legacy.executescript("""',
+    'CREATE TABLE building_contours (',
+    '  osm_type TEXT NOT NULL, osm_id INTEGER NOT NULL, tags_json TEXT, geometry_json TEXT NOT NULL,',
+    '  min_lon REAL NOT NULL, min_lat REAL NOT NULL, max_lon REAL NOT NULL, max_lat REAL NOT NULL,',
+    '  updated_at TEXT NOT NULL DEFAULT (datetime(\'now\')), PRIMARY KEY (osm_type, osm_id)',
+    ');',
+    '""")',
+    'legacy.executemany(',
+    '    "INSERT INTO building_contours (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat) VALUES (?, ?, \'{}\', \'{}\', 0, 0, 1, 1)",',
+    '    [("way", kept_id), ("way", 999999999)],',
+    ')',
+    'legacy.commit()',
+    'legacy.close()',
+    'conn = open_sqlite("osm.db")',
+    'def generations():',
+    '    return conn.execute("SELECT sync_generation, COUNT(*) FROM building_contours GROUP BY 1 ORDER BY 1").fetchall()',
+    'migrated = generations()',
+    'first_generation = importer.next_sqlite_sync_generation(conn)',
+    'importer.import_rows_direct_duckdb_sqlite(fixture, conn, 0, "run-1", first_generation)',
+    'first_deleted = importer.cleanup_stale(conn, 0, first_generation)',
+    'orphan_left = conn.execute("SELECT COUNT(*) FROM building_contours WHERE osm_id = 999999999").fetchone()[0]',
+    'kept_generation = conn.execute("SELECT sync_generation FROM building_contours WHERE osm_type = \'way\' AND osm_id = ?", (kept_id,)).fetchone()[0]',
+    'after_first = generations()',
+    'second_generation = importer.next_sqlite_sync_generation(conn)',
+    'importer.import_rows_direct_duckdb_sqlite(second, conn, 0, "run-2", second_generation)',
+    'limited_deleted = importer.cleanup_stale(conn, 5, second_generation)',
+    'after_limited = generations()',
+    'second_deleted = importer.cleanup_stale(conn, 0, second_generation)',
+    'plan = " ".join(str(row[-1]) for row in conn.execute("EXPLAIN QUERY PLAN DELETE FROM building_contours WHERE sync_generation < ?", (second_generation,)))',
+    'print(json.dumps({',
+    '    "migrated": migrated,',
+    '    "generations": [first_generation, second_generation],',
+    '    "firstDeleted": first_deleted,',
+    '    "orphanLeft": orphan_left,',
+    '    "keptGeneration": kept_generation,',
+    '    "afterFirst": after_first,',
+    '    "limitedDeleted": limited_deleted,',
+    '    "afterLimited": after_limited,',
+    '    "secondDeleted": second_deleted,',
+    '    "afterSecond": generations(),',
+    '    "rtree": conn.execute("SELECT COUNT(*) FROM building_contours_rtree").fetchone()[0],',
+    '    "plan": plan,',
+    '}))'
+  ]);
+
+  assert.deepEqual(payload.migrated, [[0, 2]]);
+  assert.deepEqual(payload.generations, [1, 2]);
+  assert.equal(payload.firstDeleted, 1);
+  assert.equal(payload.orphanLeft, 0);
+  assert.equal(payload.keptGeneration, 1);
+  assert.deepEqual(payload.afterFirst, [[1, 40]]);
+  assert.equal(payload.limitedDeleted, 0);
+  assert.deepEqual(payload.afterLimited, [[1, 10], [2, 30]]);
+  assert.equal(payload.secondDeleted, 10);
+  assert.deepEqual(payload.afterSecond, [[2, 30]]);
+  assert.equal(payload.rtree, 30);
+  assert.match(payload.plan, /idx_building_contours_sync_generation/);
+});
+
+test('R*Tree check takes the marker fast path only when counts and watermarks match', pythonImporterTestOptions, () => {
+  const payload = runImporterPython([
+    'fixture = make_fixture("raw.duckdb", 20)',
+    'conn = open_sqlite("osm.db")',
+    'generation = importer.next_sqlite_sync_generation(conn)',
+    'importer.import_rows_direct_duckdb_sqlite(fixture, conn, 0, "run-1", generation)',
+    'importer.rebuild_sqlite_rtree_if_needed(conn)',
+    'statements = []',
+    'conn.set_trace_callback(statements.append)',
+    'def check(verify=False):',
+    '    statements.clear()',
+    '    importer.rebuild_sqlite_rtree_if_needed(conn, verify=verify)',
+    '    full = any("LEFT JOIN building_contours_rtree" in statement for statement in statements)',
+    '    rebuilt = any(statement.strip().startswith("DELETE FROM building_contours_rtree") for statement in statements)',
+    '    return {"full": full, "rebuilt": rebuilt}',
+    'def insert_row(osm_id):',
+    '    with conn:',
+    '        conn.execute(',
+    '            "INSERT INTO building_contours (osm_type, osm_id, tags_json, geometry_json, min_lon, min_lat, max_lon, max_lat) "',
+    '            "VALUES (\'way\', ?, \'{}\', \'{}\', 0, 0, 1, 1)",',
+    '            (osm_id,),',
+    '        )',
+    'checks = {"matching": check()}',
+    '# Another writer keeps the row count but moves the rowid watermark.',
+    'insert_row(900000001)',
+    'with conn:',
+    '    conn.execute("DELETE FROM building_contours WHERE osm_id = 900000001")',
+    'insert_row(900000002)',
+    'checks["movedWatermark"] = check()',
+    'checks["afterFullCheck"] = check()',
+    'with conn:',
+    '    conn.execute("UPDATE building_contours_sync_state SET rtree_count = rtree_count - 1")',
+    'checks["countMismatch"] = check()',
+    'with conn:',
+    '    conn.execute("DELETE FROM building_contours_sync_state")',
+    'checks["missingMarker"] = check()',
+    '# A lost R*Tree entry is only found by the full check, which --verify-rtree forces.',
+    'with conn:',
+    '    conn.execute("DELETE FROM building_contours_rtree WHERE contour_rowid = (SELECT MIN(rowid) FROM building_contours)")',
+    '    conn.execute("INSERT INTO building_contours_rtree (contour_rowid, min_lon, max_lon, min_lat, max_lat) VALUES (-1, 0, 1, 0, 1)")',
+    'checks["corruptMarkerMatches"] = check()',
+    'checks["corruptVerify"] = check(verify=True)',
+    'checks["afterRebuild"] = check()',
+    'conn.set_trace_callback(None)',
+    'state = importer.read_sqlite_sync_state(conn)',
+    'print(json.dumps({',
+    '    "checks": checks,',
+    '    "state": state,',
+    '    "watermarks": list(importer._sqlite_rowid_watermarks(conn)),',
+    '    "rows": conn.execute("SELECT COUNT(*) FROM building_contours").fetchone()[0],',
+    '}))'
+  ]);
+
+  assert.deepEqual(payload.checks, {
+    matching: { full: false, rebuilt: false },
+    movedWatermark: { full: true, rebuilt: false },
+    afterFullCheck: { full: false, rebuilt: false },
+    countMismatch: { full: true, rebuilt: false },
+    missingMarker: { full: true, rebuilt: false },
+    corruptMarkerMatches: { full: false, rebuilt: false },
+    corruptVerify: { full: true, rebuilt: true },
+    afterRebuild: { full: false, rebuilt: false }
+  });
+  assert.equal(payload.state.contour_count, payload.rows);
+  assert.equal(payload.state.rtree_count, payload.rows);
+  assert.deepEqual([payload.state.contour_max_rowid, payload.state.rtree_max_rowid], payload.watermarks);
+});
@@ -7,6 +7,7 @@ const path = require('path');
 const {
   buildRuntimeFollowupEnv,
   readExportSummary,
+  resolvePgImportFormat,
   runRuntimeFollowups,
   shouldRunRuntimeFollowup
 } = require('../../scripts/sync-osm-region');
@@ -20,6 +21,12 @@ test('shouldRunRuntimeFollowup skips pmtiles-only and managed runtime env', () =
   assert.equal(shouldRunRuntimeFollowup({ pmtilesOnly: false, env: {} }), true);
 });
 
+test('resolvePgImportFormat opts into PGCOPY only when requested', () => {
+  assert.equal(resolvePgImportFormat({}), 'ndjson');
+  assert.equal(resolvePgImportFormat({ REGION_SYNC_PG_IMPORT_FORMAT: ' PGCOPY ' }), 'pgcopy');
+  assert.equal(resolvePgImportFormat({ REGION_SYNC_PG_IMPORT_FORMAT: 'parquet' }), 'ndjson');
+});
+
 test('buildRuntimeFollowupEnv carries explicit runtime DB paths and provider config', () => {
   const env = buildRuntimeFollowupEnv({
     dbProvider: 'sqlite',
@@ -102,6 +109,33 @@ test('readExportSummary returns normalized summary for valid exporter metadata',
   }
 });
 
+test('readExportSummary keeps per-kind feature counts from exporter metadata', () => {
+  const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-export-summary-'));
+  const summaryPath = path.join(workspace, 'region-export-summary.json');
+
+  try {
+    fs.writeFileSync(summaryPath, JSON.stringify({
+      importedFeatureCount: 5,
+      bounds: null,
+      featureKindCounts: {
+        building: 3,
+        building_part: 2
+      }
+    }));
+
+    assert.deepEqual(readExportSummary(summaryPath), {
+      importedFeatureCount: 5,
+      bounds: null,
+      featureKindCounts: {
+        building: 3,
+        building_part: 2
+      }
+    });
+  } finally {
+    fs.rmSync(workspace, { recursive: true, force: true });
+  }
+});
+
 test('readExportSummary returns null for missing or malformed exporter metadata', () => {
   const workspace = fs.mkdtempSync(path.join(os.tmpdir(), 'archimap-export-summary-'));
   const missingPath = path.join(workspace, 'missing.json');